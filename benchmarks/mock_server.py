@@ -0,0 +1,271 @@
+# /* coding: UTF-8 */
+
+import json
+import random
+from bisect import bisect_left, bisect_right
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from os import path
+from threading import Lock, Thread
+from time import sleep
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES_DIR = path.join(path.dirname(path.abspath(__file__)), 'fixtures')
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+SEARCH_DEPTH = 2000
+
+SKILLS = ('Python', 'SQL', 'Git', 'Docker', 'Linux', 'PostgreSQL', 'Django Framework', 'REST', 'Kubernetes',
+          'Английский язык', 'Redis', 'FastAPI', 'ООП', 'Celery', 'CI/CD', 'Kafka', 'asyncio', 'Pandas', 'MongoDB',
+          'Nginx', 'RabbitMQ', 'Bash', 'Flask', 'Grafana', 'ClickHouse', 'Jira', 'Agile', 'Scrum', 'TypeScript')
+EXPERIENCE = (('noExperience', 'Нет опыта'), ('between1And3', 'От 1 года до 3 лет'),
+              ('between3And6', 'От 3 до 6 лет'), ('moreThan6', 'Более 6 лет'))
+SCHEDULE = (('fullDay', 'Полный день'), ('remote', 'Удаленная работа'), ('flexible', 'Гибкий график'))
+CURRENCIES = ('RUR', 'RUR', 'RUR', 'RUR', 'USD', 'KZT')
+
+
+def load_fixture(name: str):
+    """Читает JSON-фикстуру из benchmarks/fixtures."""
+
+    with open(path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+class Corpus:
+    def __init__(self, size: int, period: int = 365, seed: int = 0):
+        """
+        Класс Corpus - детерминированный набор из size вакансий, равномерно опубликованных за последние period дней
+        и распределённых по "листовым" регионам фикстуры areas.json. Вакансии строятся по образцу фикстур
+        vacancy.json (детали) и search_item.json (элемент выдачи поиска).
+
+        :param size: число вакансий.
+        :param period: окно публикации, дней.
+        :param seed: зерно генератора (одинаковое зерно - одинаковый набор).
+        """
+
+        rnd = random.Random(seed)
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        step = timedelta(days=period) / max(size, 1)
+
+        self.detail = load_fixture('vacancy.json')
+        self.item = load_fixture('search_item.json')
+        self.areas = load_fixture('areas.json')
+        self.leaves = {}            # {id региона: id всех листовых регионов внутри него}
+        self.names = {}
+        self.__index_areas(self.areas)
+
+        leaves = sorted(self.leaves[None])
+        self.vacancies = []
+        for i in range(size):
+            bottom = rnd.randrange(30, 400) * 1000
+            self.vacancies.append({'id': str(10_000_000 + i),
+                                   'area': leaves[i % len(leaves)],
+                                   'published': now - step * i,
+                                   'created': now - step * i - timedelta(days=rnd.randrange(60)),
+                                   'salary': None if i % 3 == 0 else (bottom, bottom + rnd.randrange(0, 150) * 1000,
+                                                                      rnd.choice(CURRENCIES), rnd.random() < 0.3),
+                                   'experience': rnd.choice(EXPERIENCE),
+                                   'schedule': rnd.choice(SCHEDULE),
+                                   'skills': rnd.sample(SKILLS, rnd.randrange(0, 12))})
+
+        # Индекс для поиска: {(регион, только с ЗП): отсортированные по возрастанию даты публикации (время, номер)}
+        self.by_area = {}
+        for number, vacancy in enumerate(self.vacancies):
+            for with_salary in (False, True):
+                if with_salary and vacancy['salary'] is None:
+                    continue
+                entry = (vacancy['published'].timestamp(), number)
+                self.by_area.setdefault((vacancy['area'], with_salary), []).append(entry)
+        for entries in self.by_area.values():
+            entries.sort()
+
+    def __index_areas(self, areas: list, parents: tuple = (None,)):
+        """Заполняет self.leaves: для каждого региона (и для None - "все регионы") - его листовые регионы."""
+
+        for area in areas:
+            self.names[area['id']] = area['name']
+            if area['areas']:
+                self.__index_areas(area['areas'], parents + (area['id'],))
+                continue
+            for parent in parents + (area['id'],):
+                self.leaves.setdefault(parent, set()).add(area['id'])
+
+    def search(self, area: str | None, date_from: datetime | None, date_to: datetime | None,
+               only_with_salary: bool) -> list[tuple[float, int]]:
+        """
+        Возвращает вакансии, подходящие под фильтры, в порядке убывания даты публикации.
+
+        :return: Список кортежей (время публикации, номер вакансии).
+        """
+
+        low = date_from.timestamp() if date_from else float('-inf')
+        high = date_to.timestamp() if date_to else float('inf')
+
+        found = []
+        for leaf in self.leaves.get(area, ()):
+            entries = self.by_area.get((leaf, only_with_salary), [])
+            found.extend(entries[bisect_left(entries, (low,)):bisect_right(entries, (high, float('inf')))])
+        found.sort(reverse=True)
+        return found
+
+    def __common(self, template: dict, vacancy: dict) -> dict:
+        """Подставляет в шаблон (детали или элемент выдачи) поля конкретной вакансии."""
+
+        job = deepcopy(template)
+        job['id'] = vacancy['id']
+        job['name'] = f'Python-разработчик #{vacancy["id"]}'
+        job['area'] = {'id': vacancy['area'], 'name': self.names[vacancy['area']],
+                       'url': f'/areas/{vacancy["area"]}'}
+        if vacancy['salary'] is None:
+            job['salary'] = None
+        else:
+            bottom, top, currency, gross = vacancy['salary']
+            job['salary'] = {'from': bottom, 'to': top, 'currency': currency, 'gross': gross}
+        job['experience'] = dict(zip(('id', 'name'), vacancy['experience']))
+        job['schedule'] = dict(zip(('id', 'name'), vacancy['schedule']))
+        job['published_at'] = vacancy['published'].strftime(DATE_FORMAT)
+        job['created_at'] = job['published_at']
+        job['alternate_url'] = f'https://hh.ru/vacancy/{vacancy["id"]}'
+        return job
+
+    def detail_of(self, number: int) -> dict:
+        """Возвращает подробные данные вакансии (как /vacancies/{id})."""
+
+        vacancy = self.vacancies[number]
+        job = self.__common(self.detail, vacancy)
+        job['initial_created_at'] = vacancy['created'].strftime(DATE_FORMAT)
+        job['key_skills'] = [{'name': skill} for skill in vacancy['skills']]
+        return job
+
+    def item_of(self, number: int, base_url: str) -> dict:
+        """Возвращает краткие данные вакансии (элемент выдачи /vacancies)."""
+
+        item = self.__common(self.item, self.vacancies[number])
+        item['url'] = f'{base_url}/vacancies/{item["id"]}?host=hh.ru'
+        return item
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, как у настоящего API
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, obj, status: int = 200, headers: dict = None):
+        body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        # Обработчики работают в разных потоках: счётчики и генератор ошибок - под блокировкой
+        with server.lock:
+            server.requests += 1
+            failed = url.path.startswith('/vacancies') and server.random.random() < server.error_rate
+            if failed:
+                server.errors += 1
+                kind = server.random.random()
+
+        if server.latency:
+            sleep(server.latency)
+
+        if failed:
+            if kind < 0.2:
+                return self.send_json({'errors': [{'type': 'captcha_required'}]}, 403)
+            if kind < 0.4:
+                return self.send_json({'errors': [{'type': 'too_many_requests'}]}, 429, {'Retry-After': '1'})
+            return self.send_json({'errors': [{'type': 'service_unavailable'}]}, 503)
+
+        if url.path == '/areas':
+            return self.send_json(server.corpus.areas)
+        if url.path == '/dictionaries':
+            return self.send_json(server.dictionaries)
+        if url.path == '/vacancies':
+            return self.send_json(self.search(parse_qs(url.query)))
+        if url.path.startswith('/vacancies/'):
+            number = int(url.path.rsplit('/', 1)[1]) - 10_000_000
+            if 0 <= number < len(server.corpus.vacancies):
+                return self.send_json(server.corpus.detail_of(number))
+        self.send_json({'errors': [{'type': 'not_found'}]}, 404)
+
+    def search(self, query: dict) -> dict:
+        """Обрабатывает /vacancies: фильтры area, date_from, date_to, period, only_with_salary и пагинация."""
+
+        def param(name, default=None):
+            return query[name][0] if name in query else default
+
+        page, per_page = int(param('page', 0)), int(param('per_page', 20))
+        date_from, date_to = param('date_from'), param('date_to')
+        date_from = datetime.strptime(date_from, DATE_FORMAT) if date_from else None
+        date_to = datetime.strptime(date_to, DATE_FORMAT) if date_to else None
+        if param('period') and not date_from:
+            date_from = datetime.now(timezone.utc) - timedelta(days=int(param('period')))
+
+        corpus = self.server.corpus
+        found = corpus.search(param('area'), date_from, date_to, param('only_with_salary') == 'True')
+
+        start = page * per_page
+        end = min(start + per_page, SEARCH_DEPTH)
+        base_url = f'http://{self.headers["Host"]}'
+        items = [corpus.item_of(number, base_url) for _, number in found[start:end]]
+        return {'items': items, 'found': len(found), 'pages': -(-min(len(found), SEARCH_DEPTH) // per_page),
+                'page': page, 'per_page': per_page}
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, corpus: Corpus, latency: float = 0.0, error_rate: float = 0.0, port: int = 0, seed: int = 0):
+        """
+        Класс MockServer - локальный HTTP-сервер, имитирующий API hh.ru (/vacancies, /vacancies/{id},
+        /areas, /dictionaries) поверх набора вакансий Corpus. Выдача поиска, как и у настоящего API,
+        ограничена первыми SEARCH_DEPTH вакансиями.
+
+        :param corpus: набор вакансий (можно заменить между прогонами через атрибут corpus).
+        :param latency: искусственная задержка каждого ответа, сек.
+        :param error_rate: доля запросов к /vacancies, на которые отвечается ошибкой: 429 (с Retry-After),
+                           403 (Captcha) или 503.
+        :param port: порт (0 - любой свободный).
+        :param seed: зерно генератора ошибок.
+        """
+
+        super().__init__(('127.0.0.1', port), MockHandler)
+        self.corpus = corpus
+        self.dictionaries = load_fixture('dictionaries.json')
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = Lock()
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def start(self) -> 'MockServer':
+        """Запускает сервер в фоновом потоке."""
+
+        Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == '__main__':
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description='Локальный сервер, имитирующий API hh.ru.')
+    arg_parser.add_argument('--size', type=int, default=10_000, help='число вакансий')
+    arg_parser.add_argument('--port', type=int, default=8000)
+    arg_parser.add_argument('--latency', type=float, default=0.0, help='задержка ответа, сек.')
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help='доля ответов 429/403/503')
+    args = arg_parser.parse_args()
+
+    mock = MockServer(Corpus(args.size), args.latency, args.error_rate, args.port)
+    print(f'Сервер запущен: {mock.url} (JOBINSIGHTS_API_URL={mock.url})')
+    mock.serve_forever()
@@ -0,0 +1,165 @@
+# /* coding: UTF-8 */
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from time import perf_counter
+
+from .mock_server import MockServer, Corpus
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def measure(name: str, size: int, func, *args) -> dict:
+    """
+    Выполняет func(*args) и возвращает результат замера.
+
+    :param name: название этапа.
+    :param size: число обработанных вакансий.
+    :return: Словарь {stage, size, seconds, per_second}.
+    """
+
+    started = perf_counter()
+    func(*args)
+    seconds = perf_counter() - started
+    result = {'stage': name, 'size': size, 'seconds': round(seconds, 4),
+              'per_second': round(size / seconds, 1) if seconds else None}
+    print(f'{name:<28}{size:>9} вакансий  {seconds:>9.3f} с  {result["per_second"] or 0:>12.1f} ваканс./с')
+    return result
+
+
+def run_end_to_end(server: MockServer, size: int, rps: float, workdir: str,
+                   lean: bool = False, skills_sample: float = 0.0) -> dict:
+    """
+    Прогоняет полный цикл Report.run (поиск, загрузка деталей, запись книги и диаграмм) на локальном сервере.
+    Хранилище деталей каждый раз новое, поэтому все детали загружаются по сети.
+
+    :param server: запущенный MockServer.
+    :param size: число вакансий в наборе.
+    :param rps: ограничение частоты запросов.
+    :param workdir: директория для книг и хранилищ.
+    :param lean: быстрый режим (без загрузки деталей вакансий).
+    :param skills_sample: доля вакансий, для которых в быстром режиме загружаются навыки.
+    """
+
+    from modules.fetcher import DetailFetcher, rate_limiter
+    from modules.parser import Parser
+    from modules.report import Report
+    from modules.storage import DetailStore
+
+    server.corpus = Corpus(size)
+    rate_limiter.rate = rate_limiter.max_rate = rate_limiter.capacity = rps
+
+    parser = Parser()
+    # Новое хранилище деталей, остальное - как у парсера задания: его JobLimiter и событие отмены
+    parser.fetcher = DetailFetcher(limiter=parser.fetcher.limiter,
+                                   store=DetailStore(os.path.join(workdir, f'details-{size}.sqlite3')),
+                                   metrics=parser.metrics, cancel=parser.cancelled)
+    options = {'request': f'benchmark {size}', 'region': '', 'area_id': None, 'pages': 20, 'period': 365,
+               'order_by': 'publication_time', 'only_with_salary': False, 'full_coverage': size > 2000,
+               'lean': lean, 'skills_sample': skills_sample}
+
+    requests_before = server.requests
+    report = Report(options, directory=workdir, parser=parser)
+    result = measure('end-to-end (lean)' if lean else 'end-to-end', size, report.run)
+    result['requests'] = server.requests - requests_before
+    result['vacancies'] = parser.total.count
+    result['metrics'] = parser.metrics.snapshot()
+    return result
+
+
+def run_stages(server: MockServer, size: int, workdir: str) -> list[dict]:
+    """
+    Замеряет отдельные этапы обработки без сети: создание Vacancy (по одной и пакетно), запись строк в книгу,
+    накопление статистики, подсчёт ТОП навыков и закрытие (сохранение) книги.
+
+    :param server: запущенный MockServer (нужен для справочников и построения JSON'ов вакансий).
+    :param size: число вакансий.
+    :param workdir: директория для книг.
+    """
+
+    from modules.vacancy import Vacancy
+    from modules.normalizer import normalize
+    from modules.stats import VacancyStatistics, SkillCounter
+    from modules.excel import CustomWorkbook, CustomWorksheet
+
+    corpus = server.corpus = Corpus(size)
+    jobs = [corpus.detail_of(number) for number in range(size)]
+    vacancies = []
+    results = [measure('Vacancy(job)', size, lambda: vacancies.extend(Vacancy(job) for job in jobs)),
+               measure('normalize(jobs)', size, normalize, jobs)]
+
+    workbook = CustomWorkbook(workdir, f'stages {size}', 'Все регионы')
+    table = CustomWorksheet('Вакансии', workbook)
+
+    def write_rows():
+        for row, vacancy in enumerate(vacancies, 2):
+            table.write_all_data(vacancy, row)
+
+    def add_statistics():
+        stats = VacancyStatistics()
+        for vacancy in vacancies:
+            stats.add(vacancy)
+
+    def count_skills():
+        skills = SkillCounter()
+        for vacancy in vacancies:
+            skills.update(vacancy.skills)
+        skills.most_common(20)
+
+    results.append(measure('write_all_data', size, write_rows))
+    results.append(measure('VacancyStatistics.add', size, add_statistics))
+    results.append(measure('SkillCounter (ТОП-20)', size, count_skills))
+    results.append(measure('workbook.close', size, workbook.close))
+    return results
+
+
+def main(argv: list[str] = None) -> int:
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks.run',
+                                         description='Бенчмарки JobInsights на локальном сервере, '
+                                                     'имитирующем API hh.ru.')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                            help='размеры наборов вакансий для замеров этапов (по умолчанию 1000 10000 100000)')
+    arg_parser.add_argument('--e2e-sizes', type=int, nargs='*', default=[1_000],
+                            help='размеры наборов для полного прогона Report.run (по умолчанию 1000)')
+    arg_parser.add_argument('--rps', type=float, default=1_000, help='ограничение частоты запросов при полном прогоне')
+    arg_parser.add_argument('--lean', action='store_true', help='полный прогон в быстром режиме')
+    arg_parser.add_argument('--skills-sample', type=float, default=0.0,
+                            help='доля вакансий, для которых в быстром режиме загружаются навыки')
+    arg_parser.add_argument('--latency', type=float, default=0.0, help='задержка ответа сервера, сек.')
+    arg_parser.add_argument('--error-rate', type=float, default=0.0, help='доля ответов 429/403/503 сервера')
+    arg_parser.add_argument('-o', '--output', default='bench_results.json', help='файл с результатами (JSON)')
+    args = arg_parser.parse_args(argv)
+
+    server = MockServer(Corpus(0), args.latency, args.error_rate).start()
+    workdir = tempfile.mkdtemp(prefix='jobinsights-bench-')
+
+    # Настройки читаются при импорте modules, поэтому переменные окружения задаются до первого импорта
+    os.environ['JOBINSIGHTS_API_URL'] = server.url
+    os.environ['JOBINSIGHTS_DATA_DIR'] = os.path.join(workdir, 'data')
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_stages(server, size, workdir))
+    for size in args.e2e_sizes:
+        results.append(run_end_to_end(server, size, args.rps, workdir, args.lean, args.skills_sample))
+
+    report = {'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'python': sys.version.split()[0],
+              'platform': platform.platform(),
+              'params': vars(args),
+              'results': results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'Результаты сохранены в {args.output}')
+
+    server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
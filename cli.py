@@ -0,0 +1,9 @@
+# /* coding: UTF-8 */
+
+from modules.cli import main
+
+import sys
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,13 +3,12 @@
 import sys
 import traceback
 
-from PyQt5.QtWidgets import QMessageBox
-from .user_interface import MainWindow
-
 
 def log_uncaught_exceptions(ex_cls, ex, tb):
     """Функция, которая позволяет выводить (в консоль и отдельное окно) ошибки интерфейса, идущие мимо stderr"""
 
+    from PyQt5.QtWidgets import QMessageBox
+
     text = f'{ex_cls.__name__}: {ex}:\n'
     text += ''.join(traceback.format_tb(tb))
     print(text)
@@ -17,4 +16,13 @@ def log_uncaught_exceptions(ex_cls, ex, tb):
     sys.exit()
 
 
+def __getattr__(name):
+    """Ленивый импорт графического интерфейса, чтобы пакетный режим работал без PyQt."""
+
+    if name == 'MainWindow':
+        from .user_interface import MainWindow
+        return MainWindow
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 sys.except_hook = log_uncaught_exceptions
@@ -1,8 +1,24 @@
 # /* coding: UTF-8 */
 
-from requests import get
+from functools import cache
+from .transport import get
+from .cache import reference_cache
+from .areas import AreaIndex
+from .settings import API_URL
 
 
+@cache
+def get_dictionaries() -> dict:
+    """
+    Функция возвращает справочники API hh.ru (загружаются один раз и кэшируются на диске).
+
+    :return: JSON-объект со справочниками.
+    """
+
+    return reference_cache.load('dictionaries', f'{API_URL}/dictionaries')
+
+
+@cache
 def get_rates() -> dict[str, str]:
     """
     Функция для получения курса валют по API hh.ru.
@@ -10,44 +26,60 @@ def get_rates() -> dict[str, str]:
     :return: Словарь с курсами валют {код_валюты: курс}.
     """
 
-    with get('https://api.hh.ru/dictionaries') as r:
-        return {curr['code']: curr['rate'] for curr in r.json()['currency']}
+    return {curr['code']: curr['rate'] for curr in get_dictionaries()['currency']}
 
 
+@cache
 def get_vacancy_search_order():
     """Возвращает ключи сортировок получаемых вакансий в JSON'ах. (Кроме ключа связанного с расстоянием)."""
 
-    with get('https://api.hh.ru/dictionaries') as r:
-        return {curr['name']: curr['id'] for curr in r.json()['vacancy_search_order'] if curr['id'] != 'distance'}
+    return {curr['name']: curr['id'] for curr in get_dictionaries()['vacancy_search_order'] if curr['id'] != 'distance'}
 
 
-def get_my_area_id(my_region: str, areas: dict[str, str]) -> int:
+def get_my_area_id(my_region: str) -> int | None:
     """
     Функция возвращает актуальный id заданного пользователем региона.
 
-        Примечание! Предварительно должен быть сформирован словарь areas c актуальными id для различных регионов.
+        Примечание! Поиск выполняется по индексу AreaIndex, который строится вместе со словарём areas.
 
     :param my_region: город (регион) пользователя.
-    :param areas: словарь, полученный от API {id: название}.
-    :return: id города (региона).
+    :return: id города (региона) или None, если регион не найден.
+    """
+
+    return get_area_index().lookup(my_region)
+
+
+def get_my_area_ids(my_regions: str) -> list[int]:
     """
+    Функция возвращает id нескольких регионов, перечисленных пользователем через запятую.
 
-    for area_id, name_area in areas.items():
-        if name_area.lower() == my_region.lower():
-            return int(area_id)
+        Примечание! Неизвестные регионы пропускаются, повторы удаляются.
 
+    :param my_regions: города (регионы) пользователя через запятую.
+    :return: Список id городов (регионов) в порядке перечисления.
+    """
 
-def get_page(request: str, area_id: int, period,
-             only_with_salary=False, order_by='relevance', page=0) -> tuple:
+    area_ids = (get_my_area_id(region) for region in my_regions.split(','))
+    return list(dict.fromkeys(area_id for area_id in area_ids if area_id is not None))
+
+
+def get_page(request: str, area_id: int | list[int] | None, period,
+             only_with_salary=False, order_by='relevance', page=0,
+             per_page=100, date_from: str = None, date_to: str = None, **kwargs) -> tuple:
     """
     Функция необходима для создания запроса к API hh.ru с целью - получения данных о вакансиях.
 
     :param request: текст запроса пользователя.
-    :param area_id: id города (региона) пользователя.
+    :param area_id: id города (региона) пользователя (None - поиск по всем регионам).
     :param period: период, в который были опубликованы вакансии.
     :param only_with_salary: в выборку JSON попадают только вакансии с указанной ЗП.
     :param order_by: сортировка JSON по (соответствию, дате, убыванию и возрастанию дохода).
     :param page: номер страницы по порядку (начинается от нуля).
+    :param per_page: число вакансий на странице (не более 100).
+    :param date_from: начало окна публикации (ISO 8601), заменяет period.
+    :param date_to: конец окна публикации (ISO 8601), заменяет period.
+    :param kwargs: прочие аргументы requests (например, hooks для учёта ответов в метриках).
+    :raises HTTPError: при неуспешном ответе (429, Captcha, ошибка сервера).
     :return:
             1) JSON-объект с вакансиями;
             2) количество найденных вакансий по запросу.
@@ -56,30 +88,34 @@ def get_page(request: str, area_id: int, period,
     params = {'text': request,
               'area': area_id,
               'page': page,
-              'per_page': 100,
+              'per_page': per_page,
               'only_with_salary': only_with_salary,
               'order_by': order_by,
-              'period': period}
+              'period': None if date_from or date_to else period,  # API не принимает period вместе с датами
+              'date_from': date_from,
+              'date_to': date_to}
 
-    with get('https://api.hh.ru/vacancies', params=params) as r:
+    with get(f'{API_URL}/vacancies', params=params, **kwargs) as r:
+        r.raise_for_status()
         json_object = r.json()
         return json_object['items'], json_object['found']
 
 
+@cache
 def init_areas():
     """
     Функция собирает актуальные данные о городах и регионах {id: название},
     что позволяет не привязываться к id, которые могут быть изменены в API hh.ru.
 
+    Примечание! Дерево регионов разворачивается один раз, результат хранится в ReferenceCache.
+
     :return:
             Словарь городов (регионов) {id: название},
-            Множество id городов и областей, относящихся только к РФ (для расчёта чистой ЗП).
+            Множество id городов и областей, относящихся только к РФ (для расчёта чистой ЗП),
+            Индекс для поиска регионов по названию (AreaIndex).
     """
 
-    with get('https://api.hh.ru/areas') as r:
-        json_obj = r.json()
-
-    def get_areas(locations, in_russia=False):
+    def get_areas(locations, in_russia=False, parents=None):
         areas = {}
 
         if in_russia:
@@ -87,17 +123,46 @@ def init_areas():
 
         for loc in locations:
             areas[loc['id']] = loc['name']
+            if parents is not None:
+                parents[loc['id']] = loc.get('parent_id')
             if loc['areas']:
-                areas.update(get_areas(loc['areas']))
+                areas.update(get_areas(loc['areas'], parents=parents))
 
         return areas
 
-    all_locations = get_areas(json_obj)
-    russian_areas = set(get_areas(json_obj, in_russia=True))
+    def flatten(json_obj):
+        parents = {}
+        all_locations = get_areas(json_obj, parents=parents)
+        return all_locations, set(get_areas(json_obj, in_russia=True)), AreaIndex(all_locations, parents)
+
+    return reference_cache.load('areas', f'{API_URL}/areas', build=flatten, version=3)
+
+
+def get_areas() -> dict[str, str]:
+    """Возвращает словарь городов (регионов) {id: название}. Данные загружаются при первом обращении."""
+
+    return init_areas()[0]
+
+
+def get_russian_areas() -> set[str]:
+    """Возвращает множество id городов и областей РФ. Данные загружаются при первом обращении."""
 
-    return all_locations, russian_areas
+    return init_areas()[1]
 
 
-rates = get_rates()
-areas, russian_areas = init_areas()
-vacancy_search_order = get_vacancy_search_order()
+def get_area_index() -> AreaIndex:
+    """Возвращает индекс городов (регионов) по названию. Данные загружаются при первом обращении."""
+
+    return init_areas()[2]
+
+
+def load_reference_data() -> None:
+    """
+    Загружает все справочные данные (курсы валют, регионы, сортировки).
+
+    Примечание! Функция блокирующая, поэтому вызывается из фонового потока при запуске приложения.
+    """
+
+    get_rates()
+    init_areas()
+    get_vacancy_search_order()
@@ -0,0 +1,101 @@
+# /* coding: UTF-8 */
+
+from bisect import bisect_left
+
+
+class AreaIndex:
+    def __init__(self, areas: dict[str, str], parents: dict[str, str | None]):
+        """
+        Класс AreaIndex - индекс городов (регионов) для поиска id по названию и автодополнения.
+
+        Названия хранятся в регистронезависимом виде (casefold). Если одно название носят несколько
+        населённых пунктов, каждому из них присваивается уточнённая подпись: 'Название (Родительский регион)'.
+        Если и подписи совпадают (одноимённые пункты одного региона), к подписи каждого следующего пункта
+        добавляется его id: 'Название (Родительский регион) [id]' - о таких совпадениях сообщается.
+
+        :param areas: словарь городов (регионов) {id: название} в порядке обхода дерева API hh.ru.
+        :param parents: словарь {id: id родительского региона}.
+        """
+
+        by_name = {}
+        for area_id, name in areas.items():
+            by_name.setdefault(name.casefold(), []).append(area_id)
+
+        self.labels = {}  # {id: подпись для пользователя}
+        for area_id, name in areas.items():
+            if len(by_name[name.casefold()]) > 1 and parents.get(area_id):
+                name = f'{name} ({areas[parents[area_id]]})'
+            self.labels[area_id] = name
+
+        self.children = {}  # {id родителя (None - верхний уровень): [id дочерних регионов]}
+        for area_id in areas:
+            self.children.setdefault(parents.get(area_id), []).append(area_id)
+
+        self.__by_name = by_name
+        self.__by_label = {}
+        for area_id, label in self.labels.items():
+            other_id = self.__by_label.setdefault(label.casefold(), area_id)
+            if other_id != area_id:
+                print(f'Подпись региона {label!r} (id {area_id}) совпадает с подписью региона id {other_id}.')
+                self.labels[area_id] = label = f'{label} [{area_id}]'
+                self.__by_label[label.casefold()] = area_id
+        self.__sorted_keys = sorted(self.__by_label)
+
+    def __contains__(self, name: str) -> bool:
+        """Проверяет, известен ли индексу город (регион) с таким названием или подписью."""
+
+        return self.lookup(name) is not None
+
+    def lookup(self, name: str) -> int | None:
+        """
+        Возвращает id города (региона) по названию или уточнённой подписи.
+
+        Примечание! Для неоднозначного названия без уточнения возвращается первый из одноимённых регионов
+        в порядке обхода дерева API hh.ru (не обязательно регион верхнего уровня).
+
+        :param name: название или подпись города (региона), регистр не важен.
+        :return: id города (региона) или None, если он не найден.
+        """
+
+        key = name.strip().casefold()
+        area_id = self.__by_label.get(key) or self.__by_name.get(key, [None])[0]
+        return int(area_id) if area_id is not None else None
+
+    def descendants(self, area_id: int | str) -> list[str]:
+        """
+        Возвращает id города (региона) вместе с id всех вложенных в него регионов и городов.
+
+        :param area_id: id города (региона).
+        :return: Список id (строками, как в JSON'ах вакансий).
+        """
+
+        area_ids, stack = [], [str(area_id)]
+        while stack:
+            area_id = stack.pop()
+            area_ids.append(area_id)
+            stack.extend(self.children.get(area_id, ()))
+        return area_ids
+
+    def complete(self, prefix: str, limit: int = 20) -> list[str]:
+        """
+        Возвращает подписи городов (регионов), начинающиеся с prefix.
+
+        :param prefix: начало названия, регистр не важен.
+        :param limit: максимальное число подсказок.
+        :return: Список подписей в алфавитном порядке.
+        """
+
+        prefix = prefix.strip().casefold()
+        suggestions = []
+
+        for key in self.__sorted_keys[bisect_left(self.__sorted_keys, prefix):]:
+            if not key.startswith(prefix) or len(suggestions) == limit:
+                break
+            suggestions.append(self.labels[self.__by_label[key]])
+
+        return suggestions
+
+    def sorted_labels(self) -> list[str]:
+        """Возвращает все подписи в регистронезависимом алфавитном порядке (для QCompleter)."""
+
+        return [self.labels[self.__by_label[key]] for key in self.__sorted_keys]
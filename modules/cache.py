@@ -0,0 +1,112 @@
+# /* coding: UTF-8 */
+
+import json
+import pickle
+from os import path, makedirs, replace
+from time import time
+from typing import Any, Callable
+from requests import RequestException
+from .transport import get
+from .settings import CACHE_DIR, CACHE_TTL
+
+
+class ReferenceCache:
+    def __init__(self, directory: str = CACHE_DIR, ttl: float = CACHE_TTL):
+        """
+        Класс ReferenceCache хранит на диске справочные данные API hh.ru (словари, дерево регионов).
+
+        Данные сохраняются уже в обработанном виде (pickle), поэтому повторный запуск не разбирает JSON заново.
+        По истечении ttl данные перепроверяются условным запросом (If-None-Match / If-Modified-Since):
+        при ответе 304 используется локальная копия. Если сеть недоступна - также используется локальная копия.
+
+        :param directory: директория для хранения кэша.
+        :param ttl: время (сек.), в течение которого кэш считается свежим без обращения к серверу.
+        """
+
+        self.directory = directory
+        self.ttl = ttl
+
+    def __paths(self, name: str) -> tuple[str, str]:
+        """Возвращает пути до файла метаданных и файла с данными для записи name."""
+
+        return path.join(self.directory, f'{name}.meta.json'), path.join(self.directory, f'{name}.pickle')
+
+    def __read(self, name: str, version: int) -> tuple[dict, Any]:
+        """
+        Читает запись из кэша.
+
+        :return: Кортеж (метаданные, данные). Если записи нет или она повреждена - ({}, None).
+        """
+
+        meta_path, data_path = self.__paths(name)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != version:
+                return {}, None
+            with open(data_path, 'rb') as f:
+                return meta, pickle.load(f)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            return {}, None
+
+    def __write(self, name: str, meta: dict, data: Any = None) -> None:
+        """Атомарно записывает метаданные (и данные, если они переданы) в кэш."""
+
+        makedirs(self.directory, exist_ok=True)
+        meta_path, data_path = self.__paths(name)
+
+        if data is not None:
+            with open(f'{data_path}.tmp', 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            replace(f'{data_path}.tmp', data_path)
+
+        with open(f'{meta_path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        replace(f'{meta_path}.tmp', meta_path)
+
+    def load(self, name: str, url: str, build: Callable[[Any], Any] = lambda obj: obj, version: int = 1) -> Any:
+        """
+        Возвращает справочник name: из кэша, если он свежий или не изменился на сервере, иначе - загружает заново.
+
+        :param name: имя записи в кэше.
+        :param url: адрес справочника в API hh.ru.
+        :param build: функция, преобразующая JSON ответа в сохраняемую структуру.
+        :param version: версия формата build; при её изменении кэш перестраивается.
+        :return: Результат build для актуального JSON.
+        """
+
+        meta, data = self.__read(name, version)
+        cached = data is not None
+
+        if cached and time() - meta['fetched_at'] < self.ttl:
+            return data
+
+        headers = {}
+        if cached and meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if cached and meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            with get(url, headers=headers) as r:
+                if r.status_code == 304 and cached:
+                    self.__write(name, {**meta, 'fetched_at': time()})
+                    return data
+
+                r.raise_for_status()
+                data = build(r.json())
+                meta = {'version': version,
+                        'fetched_at': time(),
+                        'etag': r.headers.get('ETag'),
+                        'last_modified': r.headers.get('Last-Modified')}
+        except RequestException:
+            if cached:
+                print(f'Справочник {name} недоступен, используется локальная копия.')
+                return data
+            raise
+
+        self.__write(name, meta, data)
+        return data
+
+
+reference_cache = ReferenceCache()
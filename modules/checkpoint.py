@@ -0,0 +1,110 @@
+# /* coding: UTF-8 */
+
+import json
+import pickle
+from glob import glob
+from hashlib import sha1
+from os import path, makedirs, replace, remove
+from typing import Any, Iterable
+from .settings import CHECKPOINT_DIR
+
+
+def dump(obj: Any, file_path: str) -> None:
+    """Атомарно сохраняет объект в файл (через временный файл), чтобы сбой не оставил повреждённую копию."""
+
+    makedirs(path.dirname(file_path), exist_ok=True)
+    with open(f'{file_path}.tmp', 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    replace(f'{file_path}.tmp', file_path)
+
+
+class Checkpoint:
+    def __init__(self, options: dict, directory: str = CHECKPOINT_DIR):
+        """
+        Класс Checkpoint - контрольная точка поиска, позволяющая продолжить прерванный парсинг.
+
+        Состоит из двух файлов:
+            1) entries - параметры запроса и собранные со страниц поиска вакансии (пишется один раз);
+            2) state - число обработанных вакансий и накопленная статистика (пишется периодически).
+
+        Уже обработанные вакансии при продолжении берутся из DetailStore, поэтому повторно не загружаются.
+
+        :param options: параметры запроса (по ним вычисляется ключ контрольной точки).
+        :param directory: директория для хранения контрольных точек.
+        """
+
+        self.options = options
+        self.directory = directory
+        self.key = sha1(json.dumps(options, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:16]
+
+        self.entries = None     # Список (краткие данные вакансии, регионы) в порядке обработки.
+        self.done = 0           # Число обработанных вакансий (с начала списка entries).
+        self.stats = None       # Накопленная статистика Parser (salaries, skills, regions).
+
+    def __path(self, part: str) -> str:
+        return path.join(self.directory, f'{self.key}.{part}.pickle')
+
+    @classmethod
+    def load(cls, options: dict, directory: str = CHECKPOINT_DIR) -> 'Checkpoint | None':
+        """
+        Загружает контрольную точку для запроса с параметрами options.
+
+        :return: Объект Checkpoint или None, если контрольной точки нет (или она повреждена).
+        """
+
+        checkpoint = cls(options, directory)
+        try:
+            with open(checkpoint.__path('entries'), 'rb') as f:
+                _, checkpoint.entries = pickle.load(f)
+            with open(checkpoint.__path('state'), 'rb') as f:
+                checkpoint.done, checkpoint.stats = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        return checkpoint
+
+    @classmethod
+    def latest(cls, directory: str = CHECKPOINT_DIR, exclude: Iterable[str] = ()) -> 'Checkpoint | None':
+        """
+        Возвращает последнюю по времени сохранения контрольную точку (или None).
+
+        :param directory: директория для хранения контрольных точек.
+        :param exclude: ключи контрольных точек, которые нужно пропустить (например, выполняемых поисков).
+        """
+
+        exclude = set(exclude)
+        states = sorted(glob(path.join(directory, '*.state.pickle')), key=path.getmtime, reverse=True)
+        for state in states:
+            if path.basename(state).split('.')[0] in exclude:
+                continue
+            try:
+                with open(state.replace('.state.', '.entries.'), 'rb') as f:
+                    options, _ = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                continue
+            return cls.load(options, directory)
+        return None
+
+    def save_entries(self, entries: list[tuple[dict, list]]) -> None:
+        """Сохраняет собранные со страниц поиска вакансии (и обнуляет прогресс)."""
+
+        self.entries = entries
+        dump((self.options, entries), self.__path('entries'))
+        self.save_state(0, None)
+
+    def save_state(self, done: int, stats: tuple) -> None:
+        """
+        Сохраняет прогресс обработки.
+
+        :param done: число обработанных вакансий.
+        :param stats: накопленная статистика (salaries, skills, regions).
+        """
+
+        self.done, self.stats = done, stats
+        dump((done, stats), self.__path('state'))
+
+    def remove(self) -> None:
+        """Удаляет контрольную точку (после успешного завершения поиска)."""
+
+        for part in ('state', 'entries'):
+            if path.exists(self.__path(part)):
+                remove(self.__path(part))
@@ -0,0 +1,270 @@
+# /* coding: UTF-8 */
+
+import csv
+import json
+import logging
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .api import get_my_area_ids, get_area_index, load_reference_data
+from .fetcher import rate_limiter
+from .report import Report
+from .parser import Parser
+from .registry import SavedQuery
+from .progress import ProgressEvent
+from .sinks import SINKS
+from .stats import VacancyStatistics
+from .warehouse import warehouse
+
+logger = logging.getLogger('jobinsights')
+
+# Значения параметров запроса, если они не указаны в файле.
+DEFAULTS = {'region': '',
+            'period': 365,
+            'pages': 10,
+            'order_by': 'relevance',
+            'only_with_salary': False,
+            'full_coverage': False,
+            'lean': False,
+            'skills_sample': 0.0}
+
+
+def read_queries(file_path: str) -> list[dict]:
+    """
+    Читает список запросов из файла CSV (с заголовком) или JSON Lines (по объекту на строку).
+
+    Поля запроса: text (обязательное), region, period, pages, order_by, only_with_salary, full_coverage,
+    lean (быстрый режим без деталей вакансий), skills_sample (доля вакансий, для которых в быстром режиме
+    загружаются навыки, от 0 до 1), name (имя сохранённого запроса для режима --refresh).
+    В поле region можно перечислить несколько регионов через запятую.
+
+    :param file_path: путь до файла со списком запросов.
+    :return: Список словарей с параметрами запросов.
+    """
+
+    with open(file_path, encoding='utf-8') as f:
+        if file_path.endswith(('.jsonl', '.json')):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    queries = []
+    for row in rows:
+        query = DEFAULTS | {key: value for key, value in row.items() if value not in (None, '')}
+        query['period'] = int(query['period'])
+        query['pages'] = int(query['pages'])
+        query['skills_sample'] = float(query['skills_sample'])
+        for flag in ('only_with_salary', 'full_coverage', 'lean'):
+            query[flag] = str(query[flag]).lower() in ('1', 'true', 'yes', 'да')
+        queries.append(query)
+
+    return queries
+
+
+def make_options(query: dict, formats: tuple = ()) -> dict:
+    """
+    Преобразует запрос из файла в параметры объекта Report (аналогично MainWindow.search).
+
+    :param query: параметры запроса.
+    :param formats: дополнительные форматы данных рядом с xlsx.
+    :return: Словарь параметров для Report.
+    """
+
+    area_ids = get_my_area_ids(query['region'])
+
+    return {'request': query['text'],
+            'region': query['region'],
+            'area_id': area_ids[0] if len(area_ids) == 1 else area_ids or None,
+            'pages': query['pages'],
+            'period': query['period'],
+            'order_by': query['order_by'],
+            'only_with_salary': query['only_with_salary'],
+            'full_coverage': query['full_coverage'],
+            'lean': query['lean'],
+            'skills_sample': query['skills_sample'],
+            'formats': formats}
+
+
+def log_progress(request: str, step: int = 10):
+    """
+    Создаёт функцию прогресса, которая пишет в лог каждые step процентов (вместо сигналов Qt),
+    а также сообщения об этапах поиска.
+
+    :param request: текст запроса (для подписи в логе).
+    :param step: шаг логирования в процентах.
+    """
+
+    last = -step
+
+    def progress(event: ProgressEvent):
+        nonlocal last
+        if not event.total:
+            logger.info('[%s] %s', request, event.text)
+        elif event.percent - last >= step or event.done == event.total:
+            last = event.percent
+            logger.info('[%s] %d%% (%d из %d, %s) %s', request, event.percent, event.done, event.total,
+                        event.summary(), event.text)
+
+    return progress
+
+
+def run_query(query: dict, directory: str, resume: bool = False, refresh: bool = False, prune: bool = True,
+              formats: tuple = (), parser: Parser = None) -> str:
+    """
+    Формирует книгу Excel по одному запросу.
+
+    :param query: параметры запроса.
+    :param directory: директория для сохранения книги.
+    :param resume: продолжить запрос с контрольной точки, если она есть.
+    :param refresh: сохранить запрос и при повторных запусках загружать только новые вакансии.
+    :param prune: при обновлении удалить вакансии, пропавшие из выдачи поиска.
+    :param formats: дополнительные форматы данных рядом с xlsx.
+    :param parser: парсер запроса (по нему запрос можно остановить из другого потока).
+    :return: Путь до созданного файла.
+    """
+
+    options = make_options(query, formats)
+    saved_query = None
+    if refresh:
+        name = query.get('name') or f"{query['text']} ({query['region'] or 'Все регионы'})"
+        saved_query = SavedQuery.load(name) or SavedQuery(name, options)
+
+    report = Report(options, directory=directory, parser=parser, resume=resume, saved_query=saved_query,
+                    prune=prune)
+    try:
+        return report.run(progress=log_progress(query['text']))
+    finally:
+        logger.info('[%s] Отчёт о прогоне: %s', query['text'], report.save_run_report())
+
+
+def format_statistics(stats: VacancyStatistics, top: int = 20) -> str:
+    """
+    Форматирует статистику для вывода в консоль (те же показатели, что на листах зарплат и навыков книги).
+
+    :param stats: статистика вакансий.
+    :param top: число самых востребованных навыков.
+    :return: Текст отчёта.
+    """
+
+    lines = [f'Вакансий: {stats.count}, удалённых: {stats.remote}']
+    salaries = stats.salaries
+    if salaries:
+        lines.append(f'Зарплата (на руки, ₽), указана в {salaries.count} вакансиях:')
+        for title, value in (('Медианная', salaries.median), ('Средняя', salaries.mean), ('Модальная', salaries.mode),
+                             ('Минимальная', stats.salary_min), ('Максимальная', stats.salary_max),
+                             ('10-й перцентиль', salaries.quantile(0.1)), ('90-й перцентиль', salaries.quantile(0.9))):
+            lines.append(f'  {title:<16}{int(value):>12,}'.replace(',', ' '))
+
+    skills = stats.skills.most_common(top)
+    if skills:
+        lines.append(f'ТОП-{len(skills)} навыков:')
+        lines.extend(f'  {name:<40}{count:>8}' for name, count in skills)
+    return '\n'.join(lines)
+
+
+def query(argv: list[str]) -> int:
+    """Статистика по всем собранным вакансиям из локального хранилища (cli.py query ...)."""
+
+    arg_parser = ArgumentParser(prog='cli.py query',
+                                description='JobInsights: статистика по всем собранным вакансиям из хранилища.')
+    arg_parser.add_argument('--text', default=None, help='подстрока названия вакансии')
+    arg_parser.add_argument('--skill', action='append', default=[],
+                            help='навык, который должен быть у вакансии (можно указать несколько раз)')
+    arg_parser.add_argument('--region', default='',
+                            help='города (регионы) через запятую, включая вложенные в них регионы')
+    arg_parser.add_argument('--employer', default=None, help='название работодателя')
+    arg_parser.add_argument('--days', type=int, default=None, help='опубликованные за последние N дней')
+    arg_parser.add_argument('--remote', action='store_true', help='только удалённые вакансии')
+    arg_parser.add_argument('--top', type=int, default=20, help='число самых востребованных навыков')
+    arg_parser.add_argument('--json', action='store_true', help='вывести результат в формате JSON')
+    args = arg_parser.parse_args(argv)
+
+    area_ids = None
+    if args.region:
+        load_reference_data()
+        index = get_area_index()
+        area_ids = [area_id for region_id in get_my_area_ids(args.region) for area_id in index.descendants(region_id)]
+        if not area_ids:
+            arg_parser.error(f'регион не найден: {args.region}')
+
+    stats = warehouse.statistics(text=args.text, skills=args.skill, area_ids=area_ids, employer=args.employer,
+                                 days=args.days, remote=args.remote or None, top=args.top)
+
+    if args.json:
+        salary = stats.salaries.snapshot()
+        if stats.salaries:
+            salary |= {'min': stats.salary_min, 'max': stats.salary_max}
+        print(json.dumps({'count': stats.count, 'remote': stats.remote, 'salary': salary,
+                          'skills': dict(stats.skills.most_common(args.top))}, ensure_ascii=False, indent=2))
+    else:
+        print(format_statistics(stats, args.top))
+    return 0
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Точка входа пакетного (консольного) режима JobInsights.
+    Первый аргумент query - статистика по локальному хранилищу вместо парсинга (см. query).
+    """
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['query']:
+        return query(argv[1:])
+
+    arg_parser = ArgumentParser(description='JobInsights: пакетный парсинг вакансий hh.ru без GUI.')
+    arg_parser.add_argument('queries', help='файл со списком запросов (.csv с заголовком или .jsonl)')
+    arg_parser.add_argument('-o', '--output', default=None, help='директория для xlsx (по умолчанию "Мои запросы")')
+    arg_parser.add_argument('-w', '--workers', type=int, default=4, help='число одновременно обрабатываемых запросов')
+    arg_parser.add_argument('--resume', action='store_true', help='продолжить прерванные запросы с контрольных точек')
+    arg_parser.add_argument('--refresh', action='store_true',
+                            help='сохранять запросы и при повторном запуске загружать только новые вакансии')
+    arg_parser.add_argument('--no-prune', dest='prune', action='store_false',
+                            help='при --refresh не проверять, пропали ли прежние вакансии из выдачи '
+                                 '(проверка стоит 1 запрос на 100 вакансий)')
+    arg_parser.add_argument('-f', '--formats', default='',
+                            help=f'дополнительные форматы данных через запятую: {", ".join(SINKS)}')
+    arg_parser.add_argument('--rps', type=float, default=None,
+                            help='общий лимит запросов к API в секунду (частота не растёт выше него)')
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    if args.rps:
+        rate_limiter.rate = rate_limiter.max_rate = args.rps
+
+    formats = tuple(fmt.strip() for fmt in args.formats.split(',') if fmt.strip())
+    unknown = set(formats) - set(SINKS)
+    if unknown:
+        arg_parser.error(f'неизвестные форматы: {", ".join(unknown)}')
+
+    queries = read_queries(args.queries)
+    directory = args.output or Report.get_path()
+    load_reference_data()
+
+    logger.info('Запросов: %d, параллельно: %d, лимит: %s запр./сек.', len(queries), args.workers, rate_limiter.rate)
+
+    failed = 0
+    parsers = [Parser() for _ in queries]
+    executor = ThreadPoolExecutor(args.workers)
+    futures = {executor.submit(run_query, query, directory, args.resume, args.refresh, args.prune, formats,
+                               parser): query for query, parser in zip(queries, parsers)}
+    try:
+        for future in as_completed(futures):
+            request = futures[future]['text']
+            try:
+                logger.info('[%s] Готово: %s', request, future.result())
+            except Exception:
+                failed += 1
+                logger.exception('[%s] Ошибка при обработке запроса', request)
+    except KeyboardInterrupt:
+        # Выполняемые запросы останавливаются (не позже CANCEL_POLL) и сохраняют контрольные точки
+        logger.warning('Прерывание: запросы останавливаются, контрольные точки сохраняются...')
+        for parser in parsers:
+            parser.stop_parsing()
+        executor.shutdown(wait=True, cancel_futures=True)
+        logger.warning('Прервано. Продолжить с контрольных точек: --resume.')
+        return 130
+    executor.shutdown()
+
+    logger.info('Завершено: %d из %d запросов.', len(queries) - failed, len(queries))
+    return 1 if failed else 0
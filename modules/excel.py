@@ -2,9 +2,8 @@
 
 from string import ascii_uppercase
 from xlsxwriter import Workbook
-from statistics import mean, median, mode
-from collections import Counter
-from .vacancy import Vacancy
+from .vacancy import Vacancy, COLUMNS
+from .stats import SkillCounter, VacancyStatistics
 
 
 class CustomWorkbook(Workbook):
@@ -20,7 +19,28 @@ class CustomWorkbook(Workbook):
 
         self.request = request
         self.region = region
-        super().__init__(rf'{f_path}/{request} ({self.region}).xlsx', {'constant_memory': True})
+        super().__init__(self.file_path(f_path, request, region), {'constant_memory': True})
+
+    @staticmethod
+    def file_path(f_path: str, request: str, region: str) -> str:
+        """Путь до xlsx файла книги по запросу request и региону region в директории f_path."""
+
+        return rf'{f_path}/{request} ({region}).xlsx'
+
+    def add_partial_note(self, note: str):
+        """
+        Помечает книгу неполной (поиск остановлен или прерван): добавляет лист "Неполные данные" с пояснением,
+        который открывается первым, и указывает пояснение в свойствах документа.
+
+        :param note: текст пояснения.
+        """
+
+        self.set_properties({'title': f'{self.request} ({self.region}) - неполные данные', 'comments': note})
+        sheet = self.add_worksheet('Неполные данные')
+        sheet.set_column(0, 0, 100)
+        sheet.write(0, 0, note, self.add_format({'bold': True, 'font_size': 13, 'font_name': 'Times New Roman',
+                                                 'text_wrap': True, 'font_color': 'red'}))
+        sheet.activate()
 
     def make_cells_formats(self):
         """
@@ -203,8 +223,7 @@ class CustomWorksheet:
         :param headings_format: Форматы заголовков.
         """
 
-        headlines = ['Должность', 'Зарплата от, ₽', 'Зарплата до, ₽', 'Минимум лет опыта',
-                     'Удалёнка', 'Опубликовано\n(дней)', 'Создано\n(дней)', 'Работодатель', 'Подробнее']
+        headlines = [headline for _, headline in COLUMNS]
 
         self.write_row('A1', headlines, headings_format)
 
@@ -218,23 +237,32 @@ class CustomWorksheet:
         self.write_comment('F1', comment_updated)
         self.write_comment('G1', comment_added)
 
-    def add_conditional_formatting(self):
-        """Метод для добавления условного форматирования ячеек."""
+    def add_conditional_formatting(self, last_row: int):
+        """
+        Метод для добавления условного форматирования ячеек.
+
+        Примечание! Диапазоны задаются по фактическому числу строк, поэтому метод вызывается после записи данных.
+
+        :param last_row: Номер последней заполненной строки таблицы.
+        """
+
+        if last_row < 2:
+            return
 
-        self.conditional_format('B2:B2000', {'type': '3_color_scale'})
+        self.conditional_format(f'B2:B{last_row}', {'type': '3_color_scale'})
 
-        self.conditional_format('C2:C2000', {'type': '3_color_scale'})
+        self.conditional_format(f'C2:C{last_row}', {'type': '3_color_scale'})
 
-        self.conditional_format('D2:D2000', {'type': 'data_bar',
-                                             'bar_border_color': '#008AEF',
-                                             'bar_color': '#008AEF'})
+        self.conditional_format(f'D2:D{last_row}', {'type': 'data_bar',
+                                                    'bar_border_color': '#008AEF',
+                                                    'bar_color': '#008AEF'})
 
-        self.conditional_format('E2:E2000', {'type': 'icon_set',
-                                             'icon_style': '3_symbols_circled',
-                                             'icons_only': True,
-                                             'icons': [{'criteria': '>=', 'type': 'number', 'value': 1},
-                                                       {'criteria': '>', 'type': 'number', 'value': 0},
-                                                       {'criteria': '<=', 'type': 'number', 'value': 0}]})
+        self.conditional_format(f'E2:E{last_row}', {'type': 'icon_set',
+                                                    'icon_style': '3_symbols_circled',
+                                                    'icons_only': True,
+                                                    'icons': [{'criteria': '>=', 'type': 'number', 'value': 1},
+                                                              {'criteria': '>', 'type': 'number', 'value': 0},
+                                                              {'criteria': '<=', 'type': 'number', 'value': 0}]})
 
     def set_cell_formats(self, strings: dict, numbers: dict, days: dict):
         """
@@ -265,50 +293,81 @@ class CustomWorksheet:
         self.set_default_row(hide_unused_rows=True)
         self.set_column(f'{ascii_uppercase[col]}:XFD', None, None, {'hidden': True})
 
-    def write_salary_statistics(self, salaries_list: list[int]):
+    def write_salary_statistics(self, stats: VacancyStatistics):
         """
         Метод для записи статистических данных по заработным платам.
 
-        :param salaries_list: Список значений зарплат.
+        Примечание! Все значения вычисляются во время парсинга и записываются готовыми числами (без формул).
+        Строки 2-6 используются столбчатой диаграммой, перцентили записываются ниже.
+
+        :param stats: Накопленная статистика вакансий.
         """
 
-        if not salaries_list:
+        salaries = stats.salaries
+        if not salaries:
             return
 
-        functions = {'Медианная': median,
-                     'Средняя': mean,
-                     'Модальная': mode}
+        values = {'Медианная': salaries.median,
+                  'Средняя': salaries.mean,
+                  'Модальная': salaries.mode}
 
         self.set_column('A:A', 30)
         self.write('A1', 'Зарплата')
 
-        for row, f_name in enumerate(functions, 2):
-            self.write_row(f'A{row}', (f_name, int(functions[f_name](salaries_list))))
+        for row, f_name in enumerate(values, 2):
+            self.write_row(f'A{row}', (f_name, int(values[f_name])))
+
+        self.write_row('A5', ('Минимальная', stats.salary_min))
+        self.write_row('A6', ('Максимальная', '', stats.salary_max))
 
-        self.write_row('A5', ('Минимальная', '=MIN(Вакансии!B:B, Вакансии!C:C)'))
-        self.write_row('A6', ('Максимальная', '', '=MAX(Вакансии!B:B, Вакансии!C:C)'))
+        self.write_row('A7', ('10-й перцентиль', int(salaries.quantile(0.1))))
+        self.write_row('A8', ('90-й перцентиль', int(salaries.quantile(0.9))))
 
-    def write_skills(self, skills_list: list[str]):
+    def write_skills(self, skills: SkillCounter):
         """
         Метод для записи данных о ключевых навыках.
 
-        :param skills_list: Список ключевых навыков.
+        :param skills: Счётчик ключевых навыков.
         """
 
         self.set_column('A:A', 30)
-        skills_data = reversed(Counter(skills_list).most_common(20))
+        skills_data = reversed(skills.most_common(20))
 
         for row, data in enumerate(skills_data, 1):
             self.write_row(f'A{row}', data)
 
-    def write_remote_data(self):
-        """Метод для записи данных о формате работы."""
+    def write_remote_data(self, stats: VacancyStatistics):
+        """
+        Метод для записи данных о формате работы.
 
-        self.write('A1', 'Удалёнка')
-        self.write_formula('B1', f'=SUM(Вакансии!E:E)')
+        :param stats: Накопленная статистика вакансий.
+        """
+
+        self.write_row('A1', ('Удалёнка', stats.remote))
+        self.write_row('A2', ('Офис', stats.count - stats.remote))
+
+    def write_region_statistics(self, regions: dict[str, VacancyStatistics], headings_format):
+        """
+        Метод для записи сравнительной таблицы по регионам (при поиске сразу по нескольким регионам).
+
+        :param regions: Словарь {название региона: статистика вакансий региона}.
+        :param headings_format: Формат заголовков.
+        """
+
+        headlines = ['Регион', 'Вакансий', 'Удалёнка', 'Медианная ЗП, ₽', 'Средняя ЗП, ₽',
+                     '10-й перцентиль, ₽', '90-й перцентиль, ₽', 'ТОП-5 навыков']
+
+        self.set_column('A:A', 30)
+        self.set_column('B:G', 18)
+        self.set_column('H:H', 80)
+        self.write_row('A1', headlines, headings_format)
 
-        self.write('A2', 'Офис')
-        self.write_formula('B2', f'=COUNTA(Вакансии!E:E) - SUM(Вакансии!E:E) - 1')
+        for row, (region, stats) in enumerate(regions.items(), 2):
+            salaries = stats.salaries
+            salary_values = [int(v) if salaries else '' for v in (salaries.median, salaries.mean,
+                                                                 salaries.quantile(0.1), salaries.quantile(0.9))]
+            top_skills = ', '.join(skill for skill, _ in stats.skills.most_common(5))
+            self.write_row(f'A{row}', (region, stats.count, stats.remote, *salary_values, top_skills))
 
     def write_all_data(self, vacancy: Vacancy, row: int):
         """
@@ -318,5 +377,4 @@ class CustomWorksheet:
         :param row: Номер строки для записи данных.
         """
 
-        # Примечание! Опасное использование срезов в случае создания новых локальных атрибутов в объектах Vacancy.
-        self.write_row(f'A{row}', list(vacancy.__dict__.values())[2:-1])
+        self.write_row(row - 1, 0, vacancy.as_row())
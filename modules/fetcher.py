@@ -0,0 +1,438 @@
+# /* coding: UTF-8 */
+
+from collections import deque
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from datetime import datetime, timezone
+from random import uniform
+from threading import Condition, Event, Lock
+from time import monotonic
+from typing import Any, Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from requests import Response, HTTPError
+from requests.exceptions import ConnectionError, Timeout, ChunkedEncodingError
+from .transport import get
+from .storage import DetailStore, detail_store
+from .metrics import RunMetrics
+from .settings import (MAX_WORKERS, REQUESTS_PER_SECOND, BURST, MIN_REQUESTS_PER_SECOND, MAX_REQUESTS_PER_SECOND,
+                       RATE_STEP, RETRY_BUDGET, MAX_ATTEMPTS, BACKOFF_BASE, BACKOFF_MAX, CANCEL_POLL)
+
+THROTTLE_STATUSES = {403, 429}              # Превышен лимит запросов или требуется Captcha.
+TRANSIENT_STATUSES = {500, 502, 503, 504}   # Временные ошибки сервера.
+
+
+class RetryBudgetExhausted(Exception):
+    """Исключение: запас повторных попыток прогона исчерпан, продолжать загрузку бессмысленно."""
+
+
+class Cancelled(Exception):
+    """Исключение: поиск отменён пользователем, ожидание (лимита, паузы, ответа) прервано."""
+
+
+def ordered_results(futures: Iterable[Future], cancel: Event) -> Iterator[Any]:
+    """
+    Отдаёт результаты futures строго по порядку, проверяя отмену не реже раза в CANCEL_POLL секунд:
+    при отмене ожидание результата (например, медленного ответа сервера) бросается, выбрасывается Cancelled.
+
+    :param futures: задачи пула потоков.
+    :param cancel: событие отмены.
+    :return: Итератор результатов.
+    """
+
+    for future in futures:
+        while not wait((future,), CANCEL_POLL).done:
+            if cancel.is_set():
+                raise Cancelled('ожидание ответа прервано')
+        yield future.result()
+
+
+def submit_ahead(executor: ThreadPoolExecutor, fn: Callable[[Any], Any], items: Iterable[Any],
+                 window: int) -> Iterator[Future]:
+    """
+    Отдаёт задачи пула по порядку items, отправляя в пул не более window задач наперёд: следующая задача
+    отправляется при выдаче очередной. Выданные задачи не удерживаются, поэтому память (результаты задач)
+    не растёт с числом items.
+
+    :param executor: пул потоков.
+    :param fn: функция, выполняемая для каждого элемента.
+    :param items: элементы.
+    :param window: максимальное число отправленных, но ещё не выданных задач.
+    :return: Итератор задач (Future).
+    """
+
+    items = iter(items)
+    pending = deque(executor.submit(fn, item) for item in islice(items, window))
+    while pending:
+        future = pending.popleft()
+        for item in islice(items, 1):
+            pending.append(executor.submit(fn, item))
+        yield future
+
+
+class RateLimiter:
+    def __init__(self, rate: float, capacity: int = 1, min_rate: float = MIN_REQUESTS_PER_SECOND,
+                 max_rate: float = None):
+        """
+        Класс RateLimiter ограничивает частоту запросов по алгоритму "маркерной корзины" (token bucket).
+        Один экземпляр может безопасно использоваться из нескольких потоков, маркеры выдаются ожидающим потокам
+        строго в порядке очереди (FIFO).
+
+        Частота подстраивается под ответы сервера: после каждого успешного запроса (success) она растёт
+        на RATE_STEP, но не выше max_rate; при ответе 429/403 (backoff) - уменьшается вдвое, но не ниже min_rate,
+        а все потоки приостанавливаются на время Retry-After или экспоненциально растущую паузу.
+
+        :param rate: начальная скорость пополнения корзины (запросов в секунду).
+        :param capacity: ёмкость корзины (максимальный "залп" запросов).
+        :param min_rate: нижняя граница частоты при снижении.
+        :param max_rate: верхняя граница частоты при росте (по умолчанию - rate, т.е. частота только снижается).
+        """
+
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max_rate or rate
+        self.__tokens = float(capacity)
+        self.__updated = monotonic()
+        self.__paused_until = 0.0
+        self.__strikes = 0          # Число ограничений подряд (для экспоненциальной паузы)
+        self.__tickets = 0          # Номер, который получит следующий ожидающий поток
+        self.__serving = 0          # Номер потока, которому выдаётся следующий маркер
+        self.__abandoned = set()    # Номера потоков, переставших ждать (отменённые поиски)
+        self.__lock = Condition()
+
+    def acquire(self, cancel: Event = None) -> None:
+        """
+        Блокирует вызывающий поток до появления свободного маркера (и окончания паузы) и забирает его.
+
+        :param cancel: событие отмены: после его установки ожидание прерывается не позже чем через CANCEL_POLL
+                       секунд исключением Cancelled, а очередь переходит к следующему потоку.
+        """
+
+        poll = CANCEL_POLL if cancel is not None else None
+        with self.__lock:
+            ticket = self.__tickets
+            self.__tickets += 1
+
+            while True:
+                if cancel is not None and cancel.is_set():
+                    self.__abandon(ticket)
+                    raise Cancelled('ожидание лимита запросов прервано')
+
+                if ticket != self.__serving:
+                    self.__lock.wait(poll)
+                    continue
+
+                now = monotonic()
+                if now < self.__paused_until:
+                    delay = self.__paused_until - now
+                else:
+                    self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated) * self.rate)
+                    self.__updated = now
+
+                    if self.__tokens >= 1:
+                        self.__tokens -= 1
+                        self.__advance()
+                        return
+
+                    delay = (1 - self.__tokens) / self.rate
+                self.__lock.wait(delay if poll is None else min(delay, poll))
+
+    def __advance(self) -> None:
+        """Передаёт очередь следующему ожидающему потоку (пропуская переставших ждать)."""
+
+        self.__serving += 1
+        while self.__serving in self.__abandoned:
+            self.__abandoned.remove(self.__serving)
+            self.__serving += 1
+        self.__lock.notify_all()
+
+    def __abandon(self, ticket: int) -> None:
+        """Убирает из очереди поток с номером ticket, переставший ждать маркер."""
+
+        if ticket == self.__serving:
+            self.__advance()
+        else:
+            self.__abandoned.add(ticket)
+
+    def success(self) -> None:
+        """Учитывает успешный ответ: плавно увеличивает частоту запросов (аддитивный рост)."""
+
+        with self.__lock:
+            self.__strikes = 0
+            self.rate = min(self.max_rate, self.rate + RATE_STEP)
+
+    def backoff(self, delay: float = None) -> float:
+        """
+        Учитывает ответ "слишком много запросов" (429) или Captcha (403): вдвое снижает частоту
+        и приостанавливает выдачу маркеров всем потокам.
+
+        Ответы, пришедшие во время уже объявленной паузы (на запросы, отправленные до неё), частоту повторно
+        не снижают - иначе одновременные ответы нескольких потоков обрушили бы её до минимума.
+
+        :param delay: пауза, указанная сервером в Retry-After (сек.); по умолчанию - экспоненциальная.
+        :return: Назначенная пауза, сек.
+        """
+
+        with self.__lock:
+            now = monotonic()
+            if now < self.__paused_until:
+                return self.__paused_until - now
+
+            self.__strikes += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            if delay is None:
+                delay = uniform(0.5, 1) * min(BACKOFF_MAX, BACKOFF_BASE * 2 ** self.__strikes)
+            self.__paused_until = now + delay
+            self.__tokens = 0.0
+            self.__updated = self.__paused_until
+            return delay
+
+
+class JobLimiter:
+    def __init__(self, shared: RateLimiter):
+        """
+        Класс JobLimiter - доля общего ограничителя частоты, выделенная одному заданию (поиску).
+
+        Все задания расходуют общий лимит shared, но в ожидании маркера от каждого задания стоит не больше
+        одного потока: остальные потоки задания ждут своей очереди внутри него. Поэтому маркеры делятся между
+        одновременно выполняемыми заданиями поровну, независимо от числа их потоков, и поиск с полным охватом
+        не вытесняет небольшие поиски из очереди.
+
+        Снижение и рост частоты (backoff, success) применяются к общему ограничителю.
+
+        :param shared: общий ограничитель частоты запросов.
+        """
+
+        self.shared = shared
+        self.__turn = Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.shared.rate
+
+    def acquire(self, cancel: Event = None) -> None:
+        """
+        Дожидается очереди задания и забирает маркер из общего ограничителя.
+
+        :param cancel: событие отмены (см. RateLimiter.acquire).
+        """
+
+        while not self.__turn.acquire(timeout=CANCEL_POLL if cancel is not None else -1):
+            if cancel.is_set():
+                raise Cancelled('ожидание лимита запросов прервано')
+        try:
+            self.shared.acquire(cancel)
+        finally:
+            self.__turn.release()
+
+    def success(self) -> None:
+        self.shared.success()
+
+    def backoff(self, delay: float = None) -> float:
+        return self.shared.backoff(delay)
+
+
+def retry_after(response: Response) -> float | None:
+    """
+    Возвращает паузу из заголовка Retry-After (в секундах или HTTP-датой).
+
+    :param response: объект ответа requests.
+    :return: Пауза в секундах или None, если заголовка нет (или он некорректен).
+    """
+
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    def __init__(self, limiter: RateLimiter | JobLimiter = None, metrics: RunMetrics = None,
+                 budget: int = RETRY_BUDGET, max_attempts: int = MAX_ATTEMPTS, cancel: Event = None):
+        """
+        Класс RetryPolicy выполняет запросы к API с учётом ограничения частоты и повторяет неудачные:
+            1) 429 и 403 (Captcha) - частота запросов снижается, все потоки ждут Retry-After
+               (или экспоненциальную паузу), затем запрос повторяется;
+            2) 5xx, обрывы соединения и тайм-ауты - запрос повторяется после экспоненциальной паузы;
+            3) прочие ответы (например, 404 у снятой вакансии) не повторяются - HTTPError передаётся выше.
+
+        Повторы расходуют общий на прогон запас budget. Когда он исчерпан (или один запрос не удался
+        max_attempts раз), выбрасывается RetryBudgetExhausted.
+
+        После установки события cancel ожидание лимита и паузы перед повтором прерываются, выбрасывается Cancelled.
+
+        :param limiter: ограничитель частоты запросов (по умолчанию общий для всего приложения).
+        :param metrics: метрики прогона (ожидание лимита, длительности запросов, число повторов).
+        :param budget: число повторных попыток на прогон.
+        :param max_attempts: число попыток одного запроса.
+        :param cancel: событие отмены поиска.
+        """
+
+        self.limiter = limiter or rate_limiter
+        self.metrics = metrics or RunMetrics()
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self.cancel = cancel or Event()
+        self.left = budget
+        self.__lock = Lock()
+
+    def reset(self) -> None:
+        """Восстанавливает запас повторных попыток (перед новым прогоном)."""
+
+        with self.__lock:
+            self.left = self.budget
+
+    def __spend(self) -> bool:
+        """Забирает одну попытку из запаса; False, если он исчерпан."""
+
+        with self.__lock:
+            if self.left <= 0:
+                return False
+            self.left -= 1
+            return True
+
+    def call(self, stage: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Выполняет func(*args, **kwargs) с учётом ограничения частоты и повторов.
+        Функция должна выбрасывать HTTPError при неуспешном ответе (response.raise_for_status()).
+
+        :param stage: этап, под которым длительность запроса учитывается в метриках.
+        :param func: функция, выполняющая запрос.
+        :return: Результат func.
+        """
+
+        metrics = self.metrics
+        for attempt in range(1, self.max_attempts + 1):
+            with metrics.timer('throttle'):
+                self.limiter.acquire(self.cancel)
+
+            try:
+                with metrics.timer(stage):
+                    result = func(*args, **kwargs)
+            except HTTPError as ex:
+                status = ex.response.status_code
+                if status in THROTTLE_STATUSES:
+                    metrics.count('throttled_responses')
+                    delay = self.limiter.backoff(retry_after(ex.response))
+                    print(f'Ответ {status}: частота запросов снижена до {self.limiter.rate:.1f} в сек., '
+                          f'пауза {delay:.0f} сек.')
+                    error, delay = ex, 0.0      # Пауза уже назначена всем потокам через limiter
+                elif status in TRANSIENT_STATUSES:
+                    error, delay = ex, retry_after(ex.response)
+                else:
+                    raise
+            except (ConnectionError, Timeout, ChunkedEncodingError) as ex:
+                error, delay = ex, None
+            else:
+                self.limiter.success()
+                return result
+
+            if attempt == self.max_attempts or not self.__spend():
+                raise RetryBudgetExhausted(f'запрос не удался {attempt} раз(а), '
+                                           f'осталось повторов на прогон: {self.left}') from error
+
+            metrics.count('retries')
+            if delay is None:
+                delay = uniform(0.5, 1) * min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+            if self.cancel.wait(delay):
+                raise Cancelled('пауза перед повтором прервана') from error
+
+        raise RetryBudgetExhausted('число попыток должно быть положительным')
+
+
+class DetailFetcher:
+    def __init__(self, max_workers: int = MAX_WORKERS, limiter: RateLimiter | JobLimiter = None,
+                 store: DetailStore = None, metrics: RunMetrics = None, cancel: Event = None):
+        """
+        Класс DetailFetcher загружает подробные данные о вакансиях пулом потоков,
+        удерживая до max_workers запросов "в полёте" одновременно.
+
+        Вакансии, не изменившиеся с прошлой загрузки, берутся из локального хранилища без обращения к API.
+        Запросы выполняются через RetryPolicy (retry), которую также используют страницы поиска и QueryPlanner.
+
+        :param max_workers: число одновременных запросов.
+        :param limiter: ограничитель частоты запросов (по умолчанию общий для всего приложения).
+        :param store: хранилище JSON'ов вакансий (по умолчанию общее для всего приложения).
+        :param metrics: метрики прогона, в которые замеряются этапы загрузки.
+        :param cancel: событие отмены поиска (прерывает ожидания загрузки, см. RetryPolicy и fetch_all).
+        """
+
+        self.max_workers = max_workers
+        self.limiter = limiter or rate_limiter
+        self.store = store or detail_store
+        self.metrics = metrics or RunMetrics()
+        self.cancel = cancel or Event()
+        self.retry = RetryPolicy(self.limiter, self.metrics, cancel=self.cancel)
+
+    def download(self, url: str) -> Response:
+        """Загружает JSON вакансии по url (HTTPError при неуспешном ответе)."""
+
+        with get(url, hooks=self.metrics.hooks) as r:
+            r.raise_for_status()
+        return r
+
+    def fetch(self, item: dict) -> tuple[int, dict | None]:
+        """
+        Возвращает подробные данные вакансии: из хранилища, если копия актуальна,
+        иначе - загружает с учётом ограничения частоты запросов и повторов.
+
+        Примечание! Если запас повторов прогона исчерпан, выбрасывается RetryBudgetExhausted.
+
+        :param item: краткие данные вакансии из выдачи поиска (нужны id, url и published_at).
+        :return: Кортеж (статус код, JSON вакансии или None при неуспешном ответе, например, 404).
+        """
+
+        metrics = self.metrics
+        with metrics.timer('store_lookup'):
+            job = self.store.get(item['id'], item['published_at'])
+        if job is not None:
+            metrics.count('store_hits')
+            return 200, job
+
+        try:
+            r = self.retry.call('detail_request', self.download, item['url'])
+        except HTTPError as ex:
+            return ex.response.status_code, None
+
+        with metrics.timer('json_decode'):
+            job = r.json()
+
+        with metrics.timer('store_put'):
+            self.store.put(job)
+        return 200, job
+
+    def fetch_all(self, items: Iterable[dict],
+                  needs_detail: Callable[[dict], bool] = None) -> Iterator[tuple[int, dict | None]]:
+        """
+        Конкурентно загружает вакансии и отдаёт результаты строго в порядке следования items. Наперёд
+        отправляется не более 2 * max_workers запросов, поэтому в памяти не копятся JSON'ы всех вакансий поиска.
+
+        Примечание! При досрочном закрытии генератора ещё не начатые запросы отменяются. При отмене поиска
+        (событие cancel) выбрасывается Cancelled, не дожидаясь ответов на уже отправленные запросы.
+
+        :param items: краткие данные вакансий из выдачи поиска.
+        :param needs_detail: функция, решающая, нужны ли детали вакансии (быстрый режим). Для остальных вакансий
+                             без запроса возвращаются их краткие данные. По умолчанию детали загружаются для всех.
+        :return: Итератор кортежей (статус код, JSON вакансии).
+        """
+
+        def sampled_fetch(item: dict) -> tuple[int, dict | None]:
+            return self.fetch(item) if needs_detail(item) else (200, item)
+
+        fetch = self.fetch if needs_detail is None else sampled_fetch
+
+        executor = ThreadPoolExecutor(self.max_workers)
+        try:
+            yield from ordered_results(submit_ahead(executor, fetch, items, 2 * self.max_workers), self.cancel)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+rate_limiter = RateLimiter(REQUESTS_PER_SECOND, BURST, max_rate=MAX_REQUESTS_PER_SECOND)
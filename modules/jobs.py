@@ -0,0 +1,168 @@
+# /* coding: UTF-8 */
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from .report import Report
+from .parser import Parser
+from .progress import ProgressEvent
+from .registry import SavedQuery
+from .worker import FileWorker
+from .settings import MAX_JOBS
+
+PENDING = 'В очереди'
+RUNNING = 'Выполняется'
+FINISHED = 'Готово'
+STOPPED = 'Остановлено'
+FAILED = 'Ошибка'
+
+
+class Job:
+    def __init__(self, number: int, options: dict, resume: bool = False, saved_query: SavedQuery = None):
+        """
+        Класс Job - одно задание (поиск) очереди. Каждое задание имеет собственный Parser, поэтому статистика,
+        флаг остановки и метрики одновременно выполняемых поисков не смешиваются.
+
+        :param number: порядковый номер задания.
+        :param options: параметры запроса.
+        :param resume: продолжить поиск с последней контрольной точки для этих параметров.
+        :param saved_query: сохранённый запрос для инкрементального обновления.
+        """
+
+        self.number = number
+        self.options = options
+        self.parser = Parser()
+        self.report = Report(options, parser=self.parser, resume=resume, saved_query=saved_query)
+        self.workbook_path = self.report.workbook_path()
+        self.status = PENDING
+        self.percent = 0
+        self.text = ''
+        self.stats = ''
+        self.error = None
+        self.cancelled = False
+        self.worker = None
+
+    @property
+    def title(self) -> str:
+        return f'{self.options["request"]} ({self.options.get("region") or "Все регионы"})'
+
+    @property
+    def active(self) -> bool:
+        return self.status in (PENDING, RUNNING)
+
+    def cancel(self) -> None:
+        """Отменяет задание: ожидающее - сразу, выполняемое - после остановки парсера (файл будет сохранён)."""
+
+        self.cancelled = True
+        if self.status == PENDING:
+            self.status = STOPPED
+        elif self.status == RUNNING:
+            self.parser.stop_parsing()
+
+
+class JobQueue(QObject):
+    """
+    Класс JobQueue - очередь поисков GUI. Задания выполняются в порядке добавления, одновременно -
+    не более max_jobs (каждое в своём потоке FileWorker). Лимит запросов к API общий для всех заданий
+    и делится между выполняемыми поровну (см. JobLimiter).
+
+    Класс JobQueue имеет следующие сигналы:
+        1) jobChanged: Сигнал с номером задания, у которого изменились статус или прогресс (тип int).
+        2) queueFinished: Сигнал, который отправляется, когда в очереди не осталось ожидающих и выполняемых заданий.
+    """
+
+    jobChanged = pyqtSignal(int)
+    queueFinished = pyqtSignal()
+
+    def __init__(self, max_jobs: int = MAX_JOBS):
+        super().__init__()
+        self.max_jobs = max_jobs
+        self.jobs = {}
+
+    @property
+    def running(self) -> list[Job]:
+        return [job for job in self.jobs.values() if job.status == RUNNING]
+
+    @property
+    def pending(self) -> list[Job]:
+        return [job for job in self.jobs.values() if job.status == PENDING]
+
+    @property
+    def checkpoints(self) -> set[str]:
+        """Ключи контрольных точек ожидающих и выполняемых заданий (их нельзя продолжать вторым заданием)."""
+
+        return {job.report.checkpoint.key for job in self.jobs.values() if job.active}
+
+    def submit(self, options: dict, resume: bool = False, saved_query: SavedQuery = None) -> Job | None:
+        """
+        Добавляет поиск в очередь и запускает его, если есть свободное место.
+
+        Поиск не добавляется, если ожидающее или выполняемое задание уже пишет в ту же книгу
+        (например, тот же запрос с другим числом страниц).
+
+        :param options: параметры запроса.
+        :param resume: продолжить поиск с последней контрольной точки для этих параметров.
+        :param saved_query: сохранённый запрос для инкрементального обновления.
+        :return: Объект Job или None, если такой поиск уже есть в очереди.
+        """
+
+        job = Job(len(self.jobs), options, resume, saved_query)
+        if any(other.active and other.workbook_path == job.workbook_path for other in self.jobs.values()):
+            return None
+
+        self.jobs[job.number] = job
+        self.jobChanged.emit(job.number)
+        self.__start_pending()
+        return job
+
+    def cancel(self, number: int) -> None:
+        """Отменяет задание с номером number."""
+
+        job = self.jobs[number]
+        if job.active:
+            job.cancel()
+            self.jobChanged.emit(number)
+            self.__check_finished()
+
+    def cancel_all(self) -> None:
+        """Отменяет все ожидающие и выполняемые задания."""
+
+        for job in list(self.jobs.values()):
+            self.cancel(job.number)
+
+    def __start_pending(self) -> None:
+        """Запускает ожидающие задания, пока число выполняемых меньше max_jobs."""
+
+        free = self.max_jobs - len(self.running)
+        for job in self.pending[:max(free, 0)]:
+            self.__start(job)
+
+    def __start(self, job: Job) -> None:
+        job.status = RUNNING
+        job.worker = FileWorker(job.report)
+        job.worker.progressUpdated.connect(lambda event: self.__progress(job, event))
+        job.worker.taskFailed.connect(lambda error: setattr(job, 'error', error))
+        job.worker.taskFinished.connect(lambda: self.__finished(job))
+        # Ссылка на поток снимается только после выхода из QThread.run (taskFinished отправляется раньше)
+        job.worker.finished.connect(lambda: setattr(job, 'worker', None))
+        job.worker.start()
+        self.jobChanged.emit(job.number)
+
+    def __progress(self, job: Job, event: ProgressEvent) -> None:
+        job.percent = event.percent
+        job.text = event.text
+        job.stats = event.summary() if event.total else ''
+        self.jobChanged.emit(job.number)
+
+    def __finished(self, job: Job) -> None:
+        if job.error is not None:
+            job.status = FAILED
+        elif job.cancelled or not job.report.finished:
+            job.status = STOPPED
+        else:
+            job.status = FINISHED
+        self.jobChanged.emit(job.number)
+        self.__start_pending()
+        self.__check_finished()
+
+    def __check_finished(self) -> None:
+        if not any(job.active for job in self.jobs.values()):
+            self.queueFinished.emit()
@@ -0,0 +1,267 @@
+# /* coding: UTF-8 */
+
+import sys
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from math import ceil, log2
+from threading import Lock
+from time import perf_counter
+from .settings import TRACE_MEMORY
+
+HISTOGRAM_BASE = 1e-4       # Верхняя граница первой корзины гистограммы, сек. (0.1 мс).
+HISTOGRAM_BUCKETS = 25      # Корзины удваиваются: последняя - до ~28 минут.
+
+
+class Histogram:
+    def __init__(self):
+        """
+        Класс Histogram - гистограмма длительностей с логарифмическими корзинами (каждая вдвое шире предыдущей).
+        Занимает постоянный объём памяти независимо от числа замеров.
+        """
+
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Учитывает один замер длительностью seconds."""
+
+        index = ceil(log2(seconds / HISTOGRAM_BASE)) if seconds > HISTOGRAM_BASE else 0
+        self.buckets[min(index, HISTOGRAM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, p: float) -> float:
+        """Оценка p-квантиля сверху: верхняя граница корзины, в которую он попадает (не больше максимума)."""
+
+        rank, seen = p * self.count, 0
+        for index, amount in enumerate(self.buckets):
+            seen += amount
+            if seen >= rank:
+                return min(HISTOGRAM_BASE * 2 ** index, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        """Возвращает гистограмму в виде словаря (для JSON-отчёта)."""
+
+        return {'count': self.count,
+                'total': round(self.total, 6),
+                'mean': round(self.total / self.count, 6) if self.count else None,
+                'min': round(self.min, 6) if self.count else None,
+                'max': round(self.max, 6),
+                'p50': round(self.quantile(0.5), 6),
+                'p90': round(self.quantile(0.9), 6),
+                'p99': round(self.quantile(0.99), 6),
+                'buckets': {f'<={HISTOGRAM_BASE * 2 ** index:g}': amount
+                            for index, amount in enumerate(self.buckets) if amount}}
+
+
+def peak_rss() -> int | None:
+    """Пиковый объём резидентной памяти процесса, байт (None, если его не удалось определить)."""
+
+    try:
+        import resource
+    except ImportError:     # Windows
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.PeakWorkingSetSize
+        except (OSError, AttributeError):
+            pass
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024    # В Linux ru_maxrss - в килобайтах
+
+
+class MemoryTracer:
+    def __init__(self):
+        """
+        Класс MemoryTracer - общий на процесс счётчик пользователей tracemalloc. Отслеживание памяти глобально,
+        а прогонов (заданий очереди) одновременно может быть несколько: tracemalloc запускается первым
+        пользователем и останавливается последним, поэтому завершение одного прогона не стирает данные
+        остальных. Отслеживание, запущенное не нами (например, PYTHONTRACEMALLOC), не останавливается.
+        """
+
+        self.__lock = Lock()
+        self.__users = 0
+        self.__owner = False     # tracemalloc запущен этим объектом
+
+    def acquire(self) -> None:
+        """Начинает отслеживание памяти (если оно ещё не идёт)."""
+
+        with self.__lock:
+            if self.__users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.__owner = True
+            self.__users += 1
+
+    def release(self, top: int = 10) -> list[dict]:
+        """
+        Снимает top мест выделения памяти и, если пользователей больше нет, останавливает отслеживание.
+
+        :param top: число мест выделения памяти.
+        :return: Список словарей (where, size, count) по убыванию объёма.
+        """
+
+        with self.__lock:
+            statistics = tracemalloc.take_snapshot().statistics('lineno')[:top] if tracemalloc.is_tracing() else []
+            self.__users -= 1
+            if self.__users == 0 and self.__owner:
+                tracemalloc.stop()
+                self.__owner = False
+
+        return [{'where': str(stat.traceback), 'size': stat.size, 'count': stat.count} for stat in statistics]
+
+
+memory_tracer = MemoryTracer()
+
+
+class RunMetrics:
+    def __init__(self):
+        """
+        Класс RunMetrics собирает метрики одного прогона: гистограммы длительностей по этапам
+        (запросы страниц поиска и деталей, ожидание RateLimiter, разбор JSON, создание Vacancy, запись в книгу...),
+        счётчики HTTP-статусов и объёма полученных данных, пиковую память и (при TRACE_MEMORY)
+        самые "тяжёлые" места выделения памяти по tracemalloc.
+
+        Методы потокобезопасны: этапы замеряются в том числе из потоков DetailFetcher и QueryPlanner.
+        """
+
+        self.__lock = Lock()
+        self.__tracing = False
+        self.stages = {}
+        self.statuses = Counter()
+        self.counters = Counter()
+        self.bytes_received = 0
+        self.started = None
+        self.elapsed = None
+        self.top_allocations = []
+        self.hooks = {'response': self.on_response}     # Хук requests: учёт статусов и объёма ответов
+
+    def start(self, trace_memory: bool = TRACE_MEMORY) -> None:
+        """
+        Сбрасывает метрики и начинает новый прогон.
+
+        :param trace_memory: отслеживать выделения памяти через tracemalloc (замедляет работу в несколько раз).
+        """
+
+        with self.__lock:
+            self.stages = {}
+            self.statuses = Counter()
+            self.counters = Counter()
+            self.bytes_received = 0
+            self.top_allocations = []
+            self.elapsed = None
+            self.started = (datetime.now(timezone.utc), perf_counter())
+
+        if trace_memory and not self.__tracing:
+            memory_tracer.acquire()
+            self.__tracing = True
+
+    def finish(self, top: int = 10) -> None:
+        """
+        Завершает прогон: фиксирует длительность и (если отслеживалась память) top мест выделения памяти.
+
+        :param top: число мест выделения памяти в отчёте.
+        """
+
+        if self.started is not None:
+            self.elapsed = perf_counter() - self.started[1]
+
+        if self.__tracing:
+            self.top_allocations = memory_tracer.release(top)
+            self.__tracing = False
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Учитывает длительность seconds этапа stage."""
+
+        with self.__lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.add(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Контекстный менеджер, замеряющий длительность блока как этап stage."""
+
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, perf_counter() - started)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Увеличивает счётчик name (например, попадания в DetailStore)."""
+
+        with self.__lock:
+            self.counters[name] += amount
+
+    def on_response(self, response, *args, **kwargs):
+        """Хук ответа requests (hooks={'response': ...}): учитывает статус код и размер тела ответа."""
+
+        with self.__lock:
+            self.statuses[response.status_code] += 1
+            self.bytes_received += len(response.content)
+        return response
+
+    def snapshot(self) -> dict:
+        """
+        Возвращает метрики в виде словаря (для JSON-отчёта и панели статистики).
+        Может вызываться во время прогона.
+        """
+
+        with self.__lock:
+            stages = {stage: histogram.snapshot() for stage, histogram in self.stages.items()}
+            statuses = {str(status): amount for status, amount in sorted(self.statuses.items())}
+            counters = dict(self.counters)
+            bytes_received = self.bytes_received
+
+        elapsed = self.elapsed
+        if elapsed is None and self.started is not None:
+            elapsed = perf_counter() - self.started[1]
+
+        return {'started': self.started and self.started[0].isoformat(timespec='seconds'),
+                'elapsed': elapsed and round(elapsed, 3),
+                'throttled': stages.get('throttle', {}).get('total', 0.0),
+                'statuses': statuses,
+                'bytes_received': bytes_received,
+                'counters': counters,
+                'peak_rss': peak_rss(),
+                'stages': stages,
+                'top_allocations': self.top_allocations}
+
+    def summary(self) -> str:
+        """Возвращает краткую текстовую сводку метрик (для живой панели статистики)."""
+
+        snapshot = self.snapshot()
+        lines = [f'Прошло: {snapshot["elapsed"] or 0:.1f} с, ожидание лимита: {snapshot["throttled"]:.1f} с',
+                 f'Получено: {snapshot["bytes_received"] / 2 ** 20:.1f} МБ, '
+                 f'статусы: {", ".join(f"{k}: {v}" for k, v in snapshot["statuses"].items()) or "-"}']
+        if snapshot['peak_rss']:
+            lines.append(f'Пиковая память: {snapshot["peak_rss"] / 2 ** 20:.0f} МБ')
+        lines.append(f'{"Этап":<16}{"число":>8}{"сред., мс":>11}{"p90, мс":>10}')
+        for stage, histogram in snapshot['stages'].items():
+            lines.append(f'{stage:<16}{histogram["count"]:>8}'
+                         f'{1000 * histogram["mean"]:>11.1f}{1000 * histogram["p90"]:>10.1f}')
+        return '\n'.join(lines)
@@ -1,11 +1,42 @@
 # /* coding: UTF-8 */
 
-from time import sleep
-from requests import get
-from statistics import mean
-from itertools import count
+from typing import Callable
+from datetime import datetime, timedelta, timezone
+from collections import defaultdict
+from zlib import crc32
+from threading import Event
+from concurrent.futures import ThreadPoolExecutor
 from .vacancy import Vacancy
+from .normalizer import normalize
 from .api import get_page
+from .fetcher import DetailFetcher, JobLimiter, RetryBudgetExhausted, Cancelled, ordered_results, rate_limiter
+from .metrics import RunMetrics
+from .stats import SalaryStatistics, SkillCounter, VacancyStatistics
+from .planner import QueryPlanner, SEARCH_DEPTH, DATE_FORMAT
+from .checkpoint import Checkpoint
+from .sinks import Sink
+from .progress import ProgressReporter
+from .settings import MAX_WORKERS, CHECKPOINT_EVERY
+
+REPLAY_BATCH = 500      # Размер пачки вакансий, пакетно нормализуемых при восстановлении с контрольной точки.
+
+
+def detail_sampler(lean: bool, skills_sample: float) -> Callable[[dict], bool] | None:
+    """
+    Возвращает функцию, решающую, загружать ли детали вакансии (ради ключевых навыков) в быстром режиме.
+
+    Выборка детерминирована (по контрольной сумме id вакансии), поэтому при продолжении с контрольной точки
+    и повторных запусках в неё попадают те же вакансии.
+
+    :param lean: быстрый режим - вакансии строятся из элементов выдачи поиска.
+    :param skills_sample: доля вакансий (от 0 до 1), для которых всё же загружаются детали с навыками.
+    :return: Функция item -> bool или None, если детали нужны для всех вакансий.
+    """
+
+    if not lean or skills_sample >= 1:
+        return None
+    threshold = skills_sample * 2 ** 32
+    return lambda item: crc32(item['id'].encode()) < threshold
 
 
 class Parser:
@@ -13,113 +44,332 @@ class Parser:
     Класс необходимый для постраничного парсинга вакансий, использует API hh.ru.
 
     Экземпляр класса Parser обладает двумя локальными атрибутами:
-        1) список средних значений, взятых из диапазонов ЗП;
-        2) список требуемых навыков.
+        1) total - сводная статистика по всем вакансиям: число вакансий и удалённых вакансий,
+           статистика средних значений, взятых из диапазонов ЗП, и счётчик самых востребованных навыков;
+        2) regions - такая же статистика по каждому региону (при поиске сразу по нескольким регионам).
+
+    Атрибуты занимают постоянный объём памяти независимо от числа вакансий.
+
+    Длительности этапов (запросы, разбор JSON, создание Vacancy, запись в приёмник) замеряются в metrics.
+
+    Каждый поиск использует собственный экземпляр Parser (статистика, флаг остановки, метрики), а общий
+    лимит запросов к API делится между одновременно работающими парсерами поровну (JobLimiter).
+
+    Отмена (stop_parsing) устанавливает событие cancelled, которое прерывает все ожидания парсера: лимит запросов,
+    паузы перед повторами и ответы сервера. Поэтому поиск останавливается не позже чем через CANCEL_POLL секунд.
     """
 
     def __init__(self):
-        self.salaries_list = []
-        self.skills_list = []
-        self.__stop = False
+        self.total = VacancyStatistics()
+        self.regions = defaultdict(VacancyStatistics)
+        self.entries = []
+        self.metrics = RunMetrics()
+        self.cancelled = Event()
+        self.fetcher = DetailFetcher(limiter=JobLimiter(rate_limiter), metrics=self.metrics, cancel=self.cancelled)
 
-    def stop_parsing(self) -> None:
-        """
-        Функция останавливает парсинг страницы и привязана к кнопке СТОП интерфейса программы.
-
-        :return: None
-        """
+    @property
+    def salaries(self) -> SalaryStatistics:
+        return self.total.salaries
 
-        self.__stop = True
+    @property
+    def skills(self) -> SkillCounter:
+        return self.total.skills
 
-    def collect_salary_data(self, vacancy: Vacancy) -> None:
+    def stop_parsing(self) -> None:
         """
-        Функция определяет среднее значение для диапазона заработной платы (если таковой указан в вакансии),
-        полученное значение сохраняется в локальный атрибут salaries_list (класса Parser).
+        Функция останавливает парсинг страницы, вызывается при отмене задания (кнопки СТОП и "Отменить").
+        Может вызываться из любого потока.
 
-        Если для объекта класса Vacancy не указаны данные о ЗП - ничего не происходит.
+        Примечание! Отменённый парсер остаётся остановленным: потоки, ещё ожидающие ответа сервера,
+        завершаются, не отправляя новых запросов. Для нового поиска нужен новый Parser.
 
-        :param vacancy: текущая вакансия (экземпляр класса Vacancy).
-        :return: None.
+        :return: None
         """
 
-        if vacancy.salary_from or vacancy.salary_to:
-            salary_tuple = tuple(filter(None, (vacancy.salary_from, vacancy.salary_to)))
-            self.salaries_list.append(mean(salary_tuple))
+        self.cancelled.set()
 
-    def collect_skills_data(self, vacancy: Vacancy) -> None:
+    def collect_data(self, vacancy: Vacancy, regions: list) -> None:
         """
-        Функция добавляет данные о ключевых навыках, указанных в вакансии в атрибут skills_list, который потом будет
-        использован для вывода ТОП-20 навыков.
+        Функция учитывает вакансию в сводной статистике: число вакансий и удалённых вакансий, среднее значение
+        для диапазона заработной платы (если таковой указан в вакансии), границы ЗП и ключевые навыки.
 
         :param vacancy: текущая вакансия (экземпляр класса Vacancy).
+        :param regions: регионы, в которых найдена вакансия (пустой список, если поиск по одному региону).
         :return: None.
         """
 
-        self.skills_list.extend(vacancy.skills)
+        self.total.add(vacancy)
+        for region in regions:
+            self.regions[region].add(vacancy)
 
-    def get_collected_data(self):
-        """Функция возвращает salaries_list и skills_list, соответственно."""
+    def get_collected_data(self) -> tuple[SalaryStatistics, SkillCounter]:
+        """Функция возвращает salaries и skills, соответственно (в том числе во время парсинга)."""
 
-        return self.salaries_list, self.skills_list
+        return self.salaries, self.skills
 
     def clear_collected_data(self):
-        self.salaries_list.clear()
-        self.skills_list.clear()
+        self.total = VacancyStatistics()
+        self.regions.clear()
 
-    def parse_page(self, request: str, area_id: int, pages: int,
-                   period: int,  only_with_salary: bool, order_by: str, sheet, worker) -> None:
+    def collect_items(self, request: str, shards: list[dict], pages: int,
+                      period: int, only_with_salary: bool, order_by: str) -> dict[str, tuple[dict, list]]:
         """
-        Функция осуществляет парсинг страницы. Каждую итерацию она:
-            1) записывает данные в Excel (в главную и вспомогательные таблицы);
-            2) подаёт два сигнала на GUI (progressUpdated и progressText);
-            3) собирает данные о ЗП и навыках в локальные атрибуты (salaries_list и skills_list).
+        Функция собирает краткие данные вакансий со страниц поиска. Шарды (регионы или части запроса)
+        обходятся параллельно, вакансии, найденные сразу в нескольких шардах (например, удалённые),
+        учитываются один раз.
+
+        :param request: текст запроса пользователя.
+        :param shards: части запроса - словари с ключами region (регион для статистики), area_id
+                       и необязательными date_from, date_to (окно публикации).
+        :param pages: кол-во анализируемых страниц (для каждого шарда).
+        :param period: период, в который были опубликованы вакансии.
+        :param only_with_salary: в выборку JSON попадают только вакансии с указанной ЗП.
+        :param order_by: сортировка JSON по (соответствию, дате, убыванию и возрастанию дохода).
+        :return: Словарь {id вакансии: (краткие данные вакансии, список регионов, где она найдена)}.
+        """
+
+        def crawl(shard):
+            shard_items = []
+            for page in range(pages):
+                if self.cancelled.is_set():
+                    break
+
+                items, found = self.fetcher.retry.call('search_page', get_page, request, shard['area_id'], period,
+                                                       only_with_salary, order_by, page,
+                                                       date_from=shard.get('date_from'), date_to=shard.get('date_to'),
+                                                       hooks=self.metrics.hooks)
+                shard_items.extend(items)
+
+                if not items or 100 * (page + 1) >= found:
+                    break
+            return shard_items
+
+        if not shards:      # Планировщик ничего не нашёл (например, новых вакансий при обновлении)
+            return {}
+
+        # Ответы на уже отправленные запросы при отмене не дожидаются (ordered_results)
+        executor = ThreadPoolExecutor(min(len(shards), MAX_WORKERS))
+        try:
+            found_items = list(ordered_results([executor.submit(crawl, shard) for shard in shards], self.cancelled))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        unique = {}
+        for shard, items in zip(shards, found_items):
+            for item in items:
+                regions = unique.setdefault(item['id'], (item, []))[1]
+                if shard['region'] not in regions:
+                    regions.append(shard['region'])
+        return unique
+
+    def parse_page(self, request: str, area_id: int | list[int] | None, pages: int,
+                   period: int,  only_with_salary: bool, order_by: str, sink: Sink,
+                   progress: ProgressReporter, full_coverage: bool = False,
+                   checkpoint: Checkpoint = None, since: str = None, previous: list = None,
+                   prune: bool = True, lean: bool = False, skills_sample: float = 0.0) -> bool:
+        """
+        Функция осуществляет парсинг страниц поиска. Сначала собираются краткие данные вакансий (collect_items),
+        затем для каждой уникальной вакансии она:
+            1) передаёт вакансию в приёмник sink (таблица Excel, CSV, JSON Lines, Parquet);
+            2) сообщает о прогрессе (в процентах, число обработанных вакансий) и названии текущей вакансии
+               через progress (ProgressReporter объединяет частые обновления);
+            3) собирает данные о ЗП, навыках и формате работы в локальные атрибуты (total и regions).
 
         Примечание! Поиск не происходит, если на странице не найдено вакансий.
 
-        Ограничение! Для обхода блокировки (Captcha) от API hh.ru вводится задержка обработчика событий.
+        Детали вакансий загружаются конкурентно (DetailFetcher), но записываются строго в порядке выдачи.
+        В быстром режиме (lean) вакансии строятся прямо из элементов выдачи поиска (1 запрос на 100 вакансий),
+        а детали загружаются только для выборки skills_sample - ради статистики ключевых навыков.
+
+        Если передана контрольная точка, прогресс периодически сохраняется в неё (а также при остановке и ошибке).
+        Если она уже содержит собранные вакансии, поиск продолжается с места остановки: обработанные ранее
+        вакансии записываются в таблицу повторно (из DetailStore), а статистика восстанавливается.
+
+        Ограничение! Для обхода блокировки (Captcha) от API hh.ru частота запросов ограничена общим RateLimiter,
+        который снижает её при ответах 429/Captcha. Неудачные запросы повторяются (RetryPolicy), поиск прерывается
+        только когда исчерпан запас повторов. Вакансии, снятые с публикации после поиска (404), пропускаются.
 
         :param request: текст запроса пользователя.
-        :param area_id: id города (региона) пользователя.
-        :param pages: кол-во анализируемых страниц.
+        :param area_id: id города (региона) пользователя или список id для поиска сразу по нескольким регионам.
+        :param pages: кол-во анализируемых страниц (для каждого региона), не используется при full_coverage.
         :param period: период, в который были опубликованы вакансии.
         :param order_by: сортировка JSON по (соответствию, дате, убыванию и возрастанию дохода).
         :param only_with_salary: в выборку JSON попадают только вакансии с указанной ЗП.
-        :param sheet: лист (объект класса Worksheet), куда будет осуществляться запись.
-        :param worker: поток (объект класса FileWorker), который принимает сигналы и посылает их на GUI.
-        :return: None.
+        :param sink: приёмник (объект класса Sink), в который потоково записываются вакансии.
+        :param progress: объект ProgressReporter (или функция), принимающий прогресс, название вакансии
+                         и счётчики обработанных вакансий (done, total).
+        :param full_coverage: обойти все найденные вакансии, разбив запрос на части (QueryPlanner),
+                              вместо первых pages страниц выдачи.
+        :param checkpoint: контрольная точка для сохранения (и продолжения) прогресса.
+        :param since: инкрементальное обновление - искать только вакансии, опубликованные после since (ISO 8601).
+        :param previous: вакансии предыдущего запуска, с которыми объединяются новые (при since).
+        :param prune: при обновлении проверить страницы поиска и удалить снятые с публикации вакансии
+                      (1 запрос на 100 вакансий, детали вакансий не загружаются; включено по умолчанию).
+        :param lean: быстрый режим - не загружать детали вакансий (кроме выборки для навыков).
+        :param skills_sample: доля вакансий (от 0 до 1), для которых в быстром режиме загружаются навыки.
+        :return: True, если обработаны все найденные вакансии (поиск не был остановлен или прерван).
         """
 
         self.clear_collected_data()
-        counter = count(1)
-
-        for page in range(pages):
-            items, found = get_page(request, area_id, period, only_with_salary, order_by, page)
-            if not items:
-                return
-
-            for item in items:
-                if self.__stop:
-                    self.__stop = False
-                    return
-
-                with get(item['url']) as r:
-                    if r.status_code != 200:
-                        print(f'Поиск прерван. Статус код: {r.status_code}. Файл будет закрыт.')
-                        return
+        self.fetcher.retry.reset()
+        area_ids = list(area_id) if isinstance(area_id, (list, tuple)) else [area_id]
+        needs_detail = detail_sampler(lean, skills_sample)
+
+        if checkpoint is not None and checkpoint.entries is not None:
+            entries, done = checkpoint.entries, checkpoint.done
+            if checkpoint.stats is not None:
+                self.total, self.regions = checkpoint.stats
+            try:
+                self.replay(entries[:done], sink, progress, needs_detail)
+            except Cancelled:
+                print('Поиск отменён при восстановлении с контрольной точки.')
+                return False
+        else:
+            try:
+                entries, done = self.search(request, area_ids, pages, period, only_with_salary, order_by,
+                                            progress, full_coverage, since, previous, prune)
+            except RetryBudgetExhausted as ex:
+                print(f'Поиск прерван: {ex}.')
+                return False
+            except Cancelled:
+                print('Поиск отменён на этапе поиска вакансий.')
+                return False
+            if self.cancelled.is_set():
+                return False
+            if checkpoint is not None:
+                checkpoint.save_entries(entries)
+
+        self.entries = entries
+
+        results = self.fetcher.fetch_all((item for item, _ in entries[done:]), needs_detail)
+        finished = False
+
+        try:
+            for row, ((status_code, job), (item, regions)) in enumerate(zip(results, entries[done:]), done + 1):
+                if self.cancelled.is_set():
+                    return False
+
+                if status_code != 200:
+                    print(f'Вакансия {item["id"]} пропущена. Статус код: {status_code}.')
+                    self.metrics.count('skipped')
+                    done = row
+                    continue
+
+                with self.metrics.timer('vacancy'):
+                    vacancy = Vacancy(job)
+
+                progress(int(100 * row / len(entries)), vacancy.name[:70], row, len(entries))
+
+                with self.metrics.timer('sink_write'):
+                    sink.write(vacancy)
+                with self.metrics.timer('statistics'):
+                    self.collect_data(vacancy, regions if len(area_ids) > 1 else [])
+
+                done = row
+                if checkpoint is not None and done % CHECKPOINT_EVERY == 0:
+                    checkpoint.save_state(done, (self.total, self.regions))
+
+            finished = True
+            return True
+        except RetryBudgetExhausted as ex:
+            print(f'Поиск прерван: {ex}. Файл будет закрыт.')
+            return False
+        except Cancelled:
+            print('Поиск отменён. Файл будет закрыт.')
+            return False
+        finally:
+            if checkpoint is not None and finished:
+                checkpoint.remove()
+            elif checkpoint is not None:
+                checkpoint.save_state(done, (self.total, self.regions))
+                print(f'Контрольная точка сохранена: обработано {done} из {len(entries)} вакансий.')
+
+    def search(self, request: str, area_ids: list[int | None], pages: int, period: int, only_with_salary: bool,
+               order_by: str, progress: ProgressReporter, full_coverage: bool,
+               since: str = None, previous: list = None, prune: bool = True) -> tuple[list, int]:
+        """
+        Функция выполняет этап поиска: планирует шарды (при full_coverage) и собирает краткие данные вакансий.
 
-                    vacancy = Vacancy(r.json())
+        При инкрементальном обновлении (since) запрашиваются только вакансии, опубликованные после since,
+        они ставятся в начало списка, а из прежних вакансий (previous) остаются те, что не обновились
+        и ещё не вышли за пределы периода period (а при prune - ещё присутствуют в выдаче поиска).
 
-                    row = next(counter)
-                    worker.progressStatus.emit(int(100 * row / min(found, 100 * pages)))
-                    worker.progressText.emit(vacancy.name[:70])
+        :return: Кортеж (список (краткие данные вакансии, регионы), число уже обработанных вакансий - 0).
+        """
 
-                    sheet.write_all_data(vacancy, row=row + 1)
-                    self.collect_salary_data(vacancy)
-                    self.collect_skills_data(vacancy)
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        date_from = datetime.strptime(since, DATE_FORMAT) if since else None
+
+        if full_coverage:
+            progress(0, 'Планирование запроса...')
+            planner = QueryPlanner(request, period, only_with_salary, order_by, retry=self.fetcher.retry)
+            shards, pages = planner.plan(area_ids, date_from=date_from), SEARCH_DEPTH // 100
+        elif date_from:
+            shards = [{'region': area_id, 'area_id': area_id,
+                       'date_from': since, 'date_to': now.strftime(DATE_FORMAT)} for area_id in area_ids]
+        else:
+            shards = [{'region': area_id, 'area_id': area_id} for area_id in area_ids]
+
+        progress(0, 'Поиск вакансий...')
+        found = self.collect_items(request, shards, pages, period, only_with_salary, order_by)
+
+        if since and previous:
+            alive = None
+            if prune:
+                # Выдача без шардов ограничена SEARCH_DEPTH вакансиями на регион: при полном обходе живые
+                # вакансии ищутся по шардам всего периода, иначе прежние вакансии сверх лимита были бы удалены
+                progress(0, 'Проверка снятых вакансий...')
+                if full_coverage:
+                    alive_shards = planner.plan(area_ids)
+                else:
+                    alive_shards = [{'region': area_id, 'area_id': area_id} for area_id in area_ids]
+                alive = self.collect_items(request, alive_shards, SEARCH_DEPTH // 100, period,
+                                           only_with_salary, order_by).keys()
+
+            expired = now - timedelta(days=period)
+            for item, regions in previous:
+                if item['id'] in found or alive is not None and item['id'] not in alive:
+                    continue
+                if datetime.strptime(item['published_at'], DATE_FORMAT) >= expired:
+                    found[item['id']] = (item, regions)
+
+        return list(found.values()), 0
+
+    def replay(self, entries: list[tuple[dict, list]], sink: Sink, progress: ProgressReporter,
+               needs_detail: Callable[[dict], bool] = None) -> None:
+        """
+        Функция повторно записывает в таблицу вакансии, обработанные до контрольной точки.
+        Статистика при этом не пересчитывается - она восстанавливается из контрольной точки.
 
-                sleep(0.5)  # Пока что парсер синхронный, блочим обработчик событий на 0.5 сек каждую итерацию.
-            if page not in (found // 100, pages - 1):
-                sleep(5)
+        Детали вакансий берутся только из DetailStore (пачками по REPLAY_BATCH, без сравнения даты публикации),
+        по сети загружаются лишь вакансии, копий которых в хранилище нет. JSON'ы нормализуются пачками (normalize).
 
+        :param entries: обработанные ранее вакансии (краткие данные, регионы).
+        :param sink: приёмник (объект класса Sink), в который записываются вакансии.
+        :param progress: функция, принимающая прогресс и название вакансии.
+        :param needs_detail: функция выборки вакансий, для которых нужны детали (быстрый режим).
+        """
 
-parser = Parser()
+        progress(0, f'Восстановление {len(entries)} вакансий...')
+        store = self.fetcher.store
+
+        for start in range(0, len(entries), REPLAY_BATCH):
+            if self.cancelled.is_set():
+                raise Cancelled
+
+            items = [item for item, _ in entries[start:start + REPLAY_BATCH]]
+            detailed = [item for item in items if needs_detail is None or needs_detail(item)]
+            with self.metrics.timer('store_lookup'):
+                jobs = store.get_many([item['id'] for item in detailed])
+
+            missing = [item for item in detailed if item['id'] not in jobs]
+            if missing:
+                self.metrics.count('replay_missing', len(missing))
+                for item, (status_code, job) in zip(missing, self.fetcher.fetch_all(missing)):
+                    if status_code == 200:
+                        jobs[item['id']] = job
+
+            # В быстром режиме вакансии вне выборки строятся из кратких данных, как и при обработке
+            batch = [jobs.get(item['id']) if needs_detail is None or needs_detail(item) else item for item in items]
+            for vacancy in normalize(job for job in batch if job is not None):
+                sink.write(vacancy)
@@ -0,0 +1,112 @@
+# /* coding: UTF-8 */
+
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from .api import get_page, get_area_index
+from .fetcher import RetryPolicy, ordered_results
+from .settings import MAX_WORKERS
+
+SEARCH_DEPTH = 2000                 # API hh.ru отдаёт не более 2000 вакансий по одному запросу.
+MIN_WINDOW = timedelta(minutes=10)  # Минимальное окно публикации, которое ещё имеет смысл делить.
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+
+
+class QueryPlanner:
+    def __init__(self, request: str, period: int, only_with_salary: bool, order_by: str,
+                 retry: RetryPolicy = None):
+        """
+        Класс QueryPlanner разбивает запрос, по которому найдено больше SEARCH_DEPTH вакансий,
+        на непересекающиеся части (шарды), каждая из которых целиком помещается в выдачу API hh.ru.
+
+        Сначала запрос рекурсивно делится пополам по окну даты публикации. Если окно уже меньше MIN_WINDOW,
+        а вакансий всё ещё слишком много, запрос делится по дочерним регионам.
+
+        Примечание! Деление по вилкам ЗП не используется: фильтр salary в API hh.ru выбирает вакансии,
+        вилка которых содержит значение, поэтому такие части пересекаются и не покрывают вакансии без ЗП.
+
+        :param request: текст запроса пользователя.
+        :param period: период (в днях), в который были опубликованы вакансии.
+        :param only_with_salary: в выборку JSON попадают только вакансии с указанной ЗП.
+        :param order_by: сортировка JSON по (соответствию, дате, убыванию и возрастанию дохода).
+        :param retry: политика запросов (общий ограничитель частоты, повторы и метрики прогона).
+        """
+
+        self.request = request
+        self.period = period
+        self.only_with_salary = only_with_salary
+        self.order_by = order_by
+        self.retry = retry or RetryPolicy()
+
+    def count(self, shard: dict) -> int:
+        """
+        Возвращает число вакансий, найденных по шарду (один запрос к API с per_page=1).
+
+        :param shard: словарь с ключами area_id, date_from, date_to (datetime).
+        :return: Количество найденных вакансий.
+        """
+
+        _, found = self.retry.call('planner_probe', get_page, self.request, shard['area_id'], self.period,
+                                   self.only_with_salary, self.order_by, per_page=1,
+                                   date_from=shard['date_from'].strftime(DATE_FORMAT),
+                                   date_to=shard['date_to'].strftime(DATE_FORMAT), hooks=self.retry.metrics.hooks)
+        return found
+
+    @staticmethod
+    def split(shard: dict) -> list[dict]:
+        """
+        Делит шард на непересекающиеся части: по окну публикации или по дочерним регионам.
+
+        :param shard: словарь с ключами region, area_id, date_from, date_to.
+        :return: Список шардов (пустой, если делить дальше нельзя).
+        """
+
+        date_from, date_to = shard['date_from'], shard['date_to']
+
+        if date_to - date_from > MIN_WINDOW:
+            middle = date_from + (date_to - date_from) / 2
+            return [shard | {'date_to': middle}, shard | {'date_from': middle}]
+
+        children = get_area_index().children.get(None if shard['area_id'] is None else str(shard['area_id']), [])
+        return [shard | {'area_id': int(child)} for child in children]
+
+    def plan(self, area_ids: list[int | None], date_from: datetime = None) -> list[dict]:
+        """
+        Строит план обхода: список шардов, по каждому из которых найдено не более SEARCH_DEPTH вакансий.
+        Шарды одного уровня проверяются параллельно. При отмене поиска (retry.cancel) выбрасывается Cancelled.
+
+        :param area_ids: id городов (регионов) пользователя.
+        :param date_from: начало окна публикации (по умолчанию - period дней назад).
+        :return: Список шардов с ключами region (исходный регион), area_id, date_from, date_to (строки ISO 8601)
+                 и found (число вакансий в шарде).
+        """
+
+        date_to = datetime.now(timezone.utc).replace(microsecond=0)
+        date_from = date_from or date_to - timedelta(days=self.period)
+        pending = [{'region': area_id, 'area_id': area_id, 'date_from': date_from, 'date_to': date_to}
+                   for area_id in area_ids]
+        shards = []
+
+        executor = ThreadPoolExecutor(MAX_WORKERS)
+        try:
+            while pending:
+                splits = []
+                counts = ordered_results([executor.submit(self.count, shard) for shard in pending], self.retry.cancel)
+                for shard, found in zip(pending, counts):
+                    if not found:
+                        continue
+
+                    parts = self.split(shard) if found > SEARCH_DEPTH else []
+                    if parts:
+                        splits.extend(parts)
+                        continue
+
+                    if found > SEARCH_DEPTH:
+                        print(f'Шард {shard} не делится дальше, будут получены первые {SEARCH_DEPTH} из {found}.')
+                    shards.append(shard | {'found': found,
+                                           'date_from': shard['date_from'].strftime(DATE_FORMAT),
+                                           'date_to': shard['date_to'].strftime(DATE_FORMAT)})
+                pending = splits
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return shards
@@ -0,0 +1,94 @@
+# /* coding: UTF-8 */
+
+from time import monotonic
+from typing import Callable, NamedTuple
+from .metrics import RunMetrics
+from .settings import PROGRESS_INTERVAL
+
+
+class ProgressEvent(NamedTuple):
+    """Событие прогресса: процент, текст (название вакансии или этап), счётчики, скорость и оценка остатка."""
+
+    percent: int
+    text: str
+    done: int = 0               # Обработано вакансий
+    total: int = 0              # Всего вакансий к обработке
+    rate: float = 0.0           # Вакансий в секунду
+    bytes_received: int = 0     # Получено данных от API, байт
+    eta: float | None = None    # Оценка оставшегося времени, сек.
+
+    def summary(self) -> str:
+        """Краткая строка со скоростью, объёмом данных и оставшимся временем (для GUI и лога)."""
+
+        text = f'{self.rate:.1f} ваканс./с, {self.bytes_received / 2 ** 20:.1f} МБ'
+        if self.eta is not None:
+            minutes, seconds = divmod(int(self.eta), 60)
+            text += f', осталось ~{minutes}:{seconds:02d}'
+        return text
+
+
+class ProgressReporter:
+    def __init__(self, listener: Callable[[ProgressEvent], None], metrics: RunMetrics = None,
+                 interval: float = PROGRESS_INTERVAL):
+        """
+        Класс ProgressReporter - прослойка между парсером и потребителями прогресса (GUI, лог, CLI).
+
+        Парсер сообщает о каждой вакансии (вызов объекта как функции progress), а слушателю listener
+        передаются не чаще раза в interval секунд объединённые события ProgressEvent со скоростью обработки,
+        объёмом полученных данных и оценкой оставшегося времени. Поэтому при высокой скорости загрузки
+        очередь сигналов Qt не переполняется, а интерфейс остаётся отзывчивым.
+
+        Сообщения об этапах (без счётчиков, например 'Поиск вакансий...') и завершение передаются сразу.
+
+        :param listener: функция, принимающая ProgressEvent.
+        :param metrics: метрики прогона (источник объёма полученных данных).
+        :param interval: минимальный интервал между событиями, сек.
+        """
+
+        self.listener = listener
+        self.metrics = metrics
+        self.interval = interval
+        self.__last_emit = float('-inf')
+        self.__pending = None
+        self.__started = None       # (время, обработано) при первом обновлении со счётчиками
+
+    def __call__(self, percent: int, text: str, done: int = None, total: int = None) -> None:
+        """
+        Принимает прогресс от парсера.
+
+        :param percent: прогресс в процентах.
+        :param text: название текущей вакансии или этапа.
+        :param done: число обработанных вакансий (None - сообщение об этапе).
+        :param total: общее число вакансий.
+        """
+
+        now = monotonic()
+        bytes_received = self.metrics.bytes_received if self.metrics is not None else 0
+
+        if done is None:
+            self.__started = None
+            return self.__emit(ProgressEvent(percent, text, bytes_received=bytes_received), now)
+
+        if self.__started is None:
+            self.__started = (now, done)
+        started, done_before = self.__started
+        elapsed = now - started
+        rate = (done - done_before) / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate else None
+
+        event = ProgressEvent(percent, text, done, total, rate, bytes_received, eta)
+        if done >= total or now - self.__last_emit >= self.interval:
+            self.__emit(event, now)
+        else:
+            self.__pending = event
+
+    def __emit(self, event: ProgressEvent, now: float) -> None:
+        self.__pending = None
+        self.__last_emit = now
+        self.listener(event)
+
+    def flush(self) -> None:
+        """Передаёт слушателю последнее отложенное событие (например, при остановке поиска)."""
+
+        if self.__pending is not None:
+            self.__emit(self.__pending, monotonic())
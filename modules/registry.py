@@ -0,0 +1,63 @@
+# /* coding: UTF-8 */
+
+import pickle
+from glob import glob
+from hashlib import sha1
+from os import path, remove
+from .checkpoint import dump
+from .settings import QUERIES_DIR
+
+
+class SavedQuery:
+    def __init__(self, name: str, options: dict, directory: str = QUERIES_DIR):
+        """
+        Класс SavedQuery - сохранённый запрос для ежедневного инкрементального обновления.
+
+        Запрос помнит время последнего успешного запуска (last_run) и набор вакансий, полученный в тот раз.
+        При обновлении запрашиваются только вакансии, опубликованные (или обновлённые) после last_run,
+        и объединяются с прежним набором.
+
+        :param name: имя запроса (уникальное).
+        :param options: параметры запроса.
+        :param directory: директория для хранения сохранённых запросов.
+        """
+
+        self.name = name
+        self.options = options
+        self.directory = directory
+
+        self.last_run = None    # Время начала последнего успешного запуска (строка ISO 8601).
+        self.entries = None     # Список (краткие данные вакансии, регионы), полученный при последнем запуске.
+
+    def __path(self) -> str:
+        return path.join(self.directory, f'{sha1(self.name.encode()).hexdigest()[:16]}.pickle')
+
+    @classmethod
+    def load(cls, name: str, directory: str = QUERIES_DIR) -> 'SavedQuery | None':
+        """Загружает сохранённый запрос по имени (или возвращает None, если его нет)."""
+
+        try:
+            with open(cls(name, {}, directory).__path(), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+    @classmethod
+    def all(cls, directory: str = QUERIES_DIR) -> list['SavedQuery']:
+        """Возвращает все сохранённые запросы (по алфавиту имён), пропуская повреждённые и устаревшие файлы."""
+
+        queries = []
+        for file_path in glob(path.join(directory, '*.pickle')):
+            try:
+                with open(file_path, 'rb') as f:
+                    queries.append(pickle.load(f))
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                print(f'Сохранённый запрос {file_path} не удалось прочитать, он пропущен.')
+        return sorted(queries, key=lambda query: query.name)
+
+    def save(self) -> None:
+        dump(self, self.__path())
+
+    def remove(self) -> None:
+        if path.exists(self.__path()):
+            remove(self.__path())
@@ -0,0 +1,345 @@
+# /* coding: UTF-8 */
+
+import os
+import json
+from typing import Callable
+from datetime import datetime, timezone
+from .excel import CustomWorkbook, CustomWorksheet
+from .sinks import Sink, ExcelSink, MultiSink, WarehouseSink, SINKS
+from .parser import Parser
+from .vacancy import COLUMNS
+from .api import get_area_index
+from .checkpoint import Checkpoint
+from .registry import SavedQuery
+from .planner import DATE_FORMAT
+from .progress import ProgressEvent, ProgressReporter
+from .settings import RUN_REPORTS_DIR
+
+PARTIAL_SUFFIX = ' (неполный)'  # Добавляется к имени файлов остановленного или прерванного поиска.
+
+
+class Report:
+    """
+    Класс Report формирует книгу Excel по одному запросу: создаёт листы, запускает парсинг
+    и строит диаграммы. Класс не зависит от PyQt, поэтому используется как из GUI (FileWorker),
+    так и из командной строки (пакетный режим).
+    """
+
+    def __init__(self, options: dict, directory: str = None, parser: Parser = None, resume: bool = False,
+                 saved_query: SavedQuery = None, prune: bool = True):
+        """
+        Конструктор класса Report.
+
+        :param options: параметры запроса (request, region, area_id, pages, period, order_by, only_with_salary,
+                        full_coverage, formats, lean, skills_sample).
+                        formats - дополнительные форматы данных рядом с xlsx: 'csv', 'jsonl', 'parquet'.
+                        lean - быстрый режим без загрузки деталей вакансий; skills_sample - доля вакансий,
+                        для которых в быстром режиме всё же загружаются ключевые навыки.
+                        area_id может быть списком id - тогда поиск выполняется сразу по нескольким регионам.
+        :param directory: директория для сохранения книги (по умолчанию - "Мои запросы" на рабочем столе).
+        :param parser: объект Parser, выполняющий парсинг (по умолчанию создаётся новый).
+        :param resume: продолжить поиск с последней контрольной точки для этих параметров (если она есть).
+        :param saved_query: сохранённый запрос: если он уже запускался, выполняется инкрементальное обновление,
+                            по завершении в нём запоминаются время запуска и полученные вакансии.
+        :param prune: при обновлении удалить вакансии, пропавшие из выдачи поиска (по умолчанию - да).
+        """
+
+        self.request = None
+        self.region = None
+        self.pages = None
+        self.area_id = None
+        self.period = None
+        self.order_by = None
+        self.only_with_salary = None
+        self.full_coverage = False
+        self.formats = ()
+        self.lean = False
+        self.skills_sample = 0.0
+
+        for attr_name, value in options.items():
+            self.__setattr__(attr_name, value)
+
+        self.directory = directory or self.get_path()
+        self.parser = parser or Parser()
+        self.checkpoint = resume and Checkpoint.load(options) or Checkpoint(options)
+        self.saved_query = saved_query
+        self.prune = prune
+        self.file_path = None
+        self.excel_sink = None
+        self.finished = False       # Все вакансии обработаны (поиск не остановлен и не прерван)
+
+    def __check_region(self):
+        """Подпись для файла Excel по найденным регионам, если региона нет в JSON'e c HeadHunter, то поиск везде."""
+        labels = get_area_index().labels
+        area_ids = self.area_id if isinstance(self.area_id, list) else [self.area_id]
+        self.region = ', '.join(labels[str(area_id)] for area_id in area_ids if area_id is not None) or 'Все регионы'
+
+    def workbook_path(self) -> str:
+        """
+        Возвращает путь до книги, которую создаст run (до пометки неполной). Два поиска с одинаковым путём
+        писали бы в один файл, поэтому по нему очередь заданий отклоняет повторы.
+
+        :return: Путь до xlsx файла.
+        """
+
+        self.__check_region()
+        return CustomWorkbook.file_path(self.directory, self.request, self.region)
+
+    @staticmethod
+    def get_path() -> str:
+        """
+        Статический метод, который создаёт директорию для хранения файлов и возвращает её.
+
+        :return: Путь до директории с файлами.
+        """
+        desktop_path = os.path.expanduser("~/Desktop")
+        directory = os.path.join(desktop_path, "Мои запросы")
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+        return directory
+
+    def create_workbook(self) -> CustomWorkbook:
+        """
+        Метод создает книгу Excel и возвращает ее объект.
+
+        :return: Объект книги Excel.
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.__check_region()
+        return CustomWorkbook(self.directory, self.request, self.region)
+
+    @staticmethod
+    def create_sheets(workbook: CustomWorkbook) -> tuple:
+        """
+        Метод создаёт листы в книге Excel и возвращает их объекты.
+
+        :param workbook: Объект книги Excel.
+
+        :return: Кортеж из объектов листов Excel.
+        """
+
+        ws_1 = CustomWorksheet('Вакансии', workbook)
+        ws_2 = CustomWorksheet('Навыки_табл', workbook)
+        ws_3 = CustomWorksheet('Зарплата_табл', workbook)
+        ws_4 = CustomWorksheet('Удалёнка_табл', workbook)
+        return ws_1, ws_2, ws_3, ws_4
+
+    @staticmethod
+    def hide_data_sheets(*sheets: CustomWorksheet):
+        """
+        Метод скрывает листы с данными в Excel файле, так как они будут представлены на диаграммах.
+
+        :param sheets: Переменное количество объектов листов Excel, которые необходимо скрыть.
+        """
+
+        for s in sheets:
+            s.hide()
+
+    @staticmethod
+    def format_main_table(table: CustomWorksheet, formats_from: CustomWorkbook):
+        """
+        Форматирует главную таблицу.
+
+        :param table: Объект кастомного листа (сводная таблица данных).
+        :param formats_from: Объект, предоставляющий необходимые форматы для ячеек таблицы.
+        """
+
+        headlines_format, string_format, numbers_format, days_format = formats_from.make_cells_formats()
+        table.add_headlines(headlines_format)
+        table.set_cell_formats(string_format, numbers_format, days_format)
+        table.freeze_panes(1, 0)
+        table.cut_unused_cells(col=len(COLUMNS))
+
+    def create_sink(self, table: CustomWorksheet) -> Sink:
+        """
+        Создаёт приёмник вакансий: главная таблица Excel, локальное хранилище всех собранных вакансий
+        и (при необходимости) файлы данных рядом с книгой.
+
+        :param table: Объект кастомного листа (главная таблица).
+        :return: Объект приёмника вакансий.
+        """
+
+        base_path = os.path.splitext(self.file_path)[0]
+        sinks = [SINKS[fmt](f'{base_path}.{fmt}') for fmt in self.formats]
+        self.excel_sink = ExcelSink(table)
+        return MultiSink(self.excel_sink, WarehouseSink(self.request), *sinks)
+
+    def write_data(self, progress: ProgressReporter, table: CustomWorksheet, *others: CustomWorksheet):
+        """
+        Заполняет все таблицы собранными данными.
+
+        :param progress: объект ProgressReporter, которому парсер сообщает о прогрессе.
+        :param table: Объект кастомного листа (главная таблица).
+        :param others: Дополнительные листы, в которые будут записаны данные (навыки, зарплата, удаленка).
+        """
+
+        started = datetime.now(timezone.utc).strftime(DATE_FORMAT)
+        saved = self.saved_query
+        sink = self.create_sink(table)
+
+        try:
+            finished = self.parser.parse_page(self.request,
+                                              self.area_id,
+                                              self.pages,
+                                              self.period,
+                                              self.only_with_salary,
+                                              self.order_by,
+                                              sink,
+                                              progress=progress,
+                                              full_coverage=self.full_coverage,
+                                              checkpoint=self.checkpoint,
+                                              since=saved and saved.last_run,
+                                              previous=saved and saved.entries,
+                                              prune=self.prune,
+                                              lean=self.lean,
+                                              skills_sample=self.skills_sample)
+        finally:
+            sink.close()
+
+        self.finished = finished
+        if finished and saved is not None:
+            saved.last_run, saved.entries = started, self.parser.entries
+            saved.save()
+
+        table.add_conditional_formatting(last_row=self.excel_sink.rows)
+
+        with self.parser.metrics.timer('summary_sheets'):
+            others[0].write_skills(self.parser.skills)
+            others[1].write_salary_statistics(self.parser.total)
+            others[2].write_remote_data(self.parser.total)
+
+    def write_regions(self, workbook: CustomWorkbook):
+        """
+        Создаёт лист со сравнением регионов, если поиск выполнялся сразу по нескольким регионам.
+
+        :param workbook: Объект книги Excel.
+        """
+
+        if len(self.parser.regions) < 2:
+            return
+
+        labels = get_area_index().labels
+        regions = {labels[str(area_id)]: stats for area_id, stats in self.parser.regions.items()}
+
+        table = CustomWorksheet('Регионы', workbook)
+        table.write_region_statistics(regions, headings_format=workbook.make_cells_formats()[0])
+        table.freeze_panes(1, 0)
+
+    @staticmethod
+    def create_charts(workbook: CustomWorkbook):
+        """
+        Создает диаграммы для полученных данных.
+
+        :param workbook: Объект книги Excel.
+        """
+
+        workbook.create_bar_chart('Навыки')
+        workbook.create_column_chart('Зарплата')
+        workbook.create_pie_chart('Удалёнка')
+
+    def label_partial(self, workbook: CustomWorkbook):
+        """
+        Помечает книгу остановленного (или прерванного) поиска неполной: лист с пояснением и свойства документа.
+        Статистика и диаграммы в такой книге построены по обработанным вакансиям.
+
+        :param workbook: Объект книги Excel.
+        """
+
+        found = len(self.parser.entries)
+        workbook.add_partial_note(f'Поиск остановлен до завершения: обработано {self.parser.total.count} '
+                                  f'из {found or "?"} найденных вакансий. Статистика и диаграммы построены '
+                                  f'только по обработанным вакансиям.')
+
+    def rename_partial(self) -> str:
+        """
+        Добавляет к имени закрытой книги (и файлов данных рядом с ней) суффикс PARTIAL_SUFFIX.
+
+        :return: Новый путь до книги.
+        """
+
+        base_path, extension = os.path.splitext(self.file_path)
+        for ext in (extension.lstrip('.'), *self.formats):
+            os.replace(f'{base_path}.{ext}', f'{base_path}{PARTIAL_SUFFIX}.{ext}')
+        return f'{base_path}{PARTIAL_SUFFIX}{extension}'
+
+    def close_workbook(self, workbook: CustomWorkbook):
+        """
+        Закрывает книгу.
+
+        :param workbook: Объект книги Excel.
+        """
+
+        workbook.close()
+        print(f'Файл {self.request} закрыт.')
+
+    def run(self, progress: Callable[[ProgressEvent], None] = lambda event: None) -> str:
+        """
+        Запускает процесс формирования и заполнения книги Excel.
+        Если поиск остановлен или прерван, книга с уже обработанными вакансиями всё равно закрывается,
+        но помечается неполной (лист "Неполные данные" и суффикс PARTIAL_SUFFIX в имени файла).
+
+        :param progress: функция, принимающая события прогресса ProgressEvent (не чаще PROGRESS_INTERVAL).
+        :return: Путь до созданного файла.
+        """
+
+        metrics = self.parser.metrics
+        metrics.start()
+        reporter = ProgressReporter(progress, metrics)
+
+        try:
+            workbook = self.create_workbook()
+            self.file_path = workbook.filename
+
+            main_table, *charts = self.create_sheets(workbook)
+
+            self.hide_data_sheets(*charts)
+
+            self.format_main_table(main_table, formats_from=workbook)
+
+            self.write_data(reporter, main_table, *charts)
+
+            self.write_regions(workbook)
+
+            with metrics.timer('charts'):
+                self.create_charts(workbook)
+
+            if not self.finished:
+                self.label_partial(workbook)
+
+            with metrics.timer('workbook_close'):
+                self.close_workbook(workbook)
+
+            if not self.finished:
+                self.file_path = self.rename_partial()
+        finally:
+            reporter.flush()
+            metrics.finish()
+
+        return self.file_path
+
+    def save_run_report(self, directory: str = RUN_REPORTS_DIR) -> str:
+        """
+        Сохраняет JSON-отчёт о прогоне: параметры запроса, число вакансий и их скорость обработки,
+        гистограммы длительностей по этапам, HTTP-статусы, время ожидания лимита запросов и пиковую память.
+
+        :param directory: директория для отчётов.
+        :return: Путь до файла отчёта.
+        """
+
+        snapshot = self.parser.metrics.snapshot()
+        vacancies = self.parser.total.count
+        elapsed = snapshot['elapsed']
+        run_report = {'request': self.request,
+                      'options': self.checkpoint.options,
+                      'file': self.file_path,
+                      'finished': self.finished,
+                      'vacancies': vacancies,
+                      'vacancies_per_second': round(vacancies / elapsed, 2) if elapsed else None}
+
+        os.makedirs(directory, exist_ok=True)
+        started = datetime.fromisoformat(snapshot['started']) if snapshot['started'] else datetime.now(timezone.utc)
+        report_path = os.path.join(directory, f'{started:%Y%m%d-%H%M%S} {self.request}.json')
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(run_report | snapshot, f, ensure_ascii=False, indent=2)
+        return report_path
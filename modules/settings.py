@@ -0,0 +1,45 @@
+# /* coding: UTF-8 */
+
+from os import path, environ
+
+# Параметры конкурентной загрузки деталей вакансий.
+MAX_WORKERS = 8             # Число одновременных запросов деталей вакансий (на одну страницу поиска).
+REQUESTS_PER_SECOND = 7     # Допустимая частота запросов к API hh.ru (маркеров в секунду).
+BURST = 7                   # Ёмкость "корзины": сколько запросов можно отправить залпом после простоя.
+MAX_JOBS = 3                # Число поисков, одновременно выполняемых из очереди заданий GUI.
+
+# Адаптивная частота запросов и повторы при ошибках.
+MIN_REQUESTS_PER_SECOND = 0.5   # Нижняя граница частоты после ответов 429/Captcha.
+MAX_REQUESTS_PER_SECOND = 14    # Верхняя граница, до которой частота растёт при успешных ответах.
+RATE_STEP = 0.05            # Прирост частоты (запросов в секунду) после каждого успешного запроса.
+RETRY_BUDGET = 200          # Число повторных попыток на один прогон (поиск), после чего поиск прерывается.
+MAX_ATTEMPTS = 6            # Число попыток одного запроса.
+BACKOFF_BASE = 1            # Базовая пауза (сек.) экспоненциального ожидания перед повтором.
+BACKOFF_MAX = 60            # Максимальная пауза (сек.) перед повтором.
+CANCEL_POLL = 0.1           # Период (сек.) проверки отмены поиска в блокирующих ожиданиях.
+
+# Параметры HTTP-транспорта (общая сессия с пулом соединений).
+# Адрес API можно переопределить переменной окружения (например, для локального сервера бенчмарков).
+API_URL = environ.get('JOBINSIGHTS_API_URL', 'https://api.hh.ru')
+USER_AGENT = 'JobInsights/1.0 (https://github.com/SIGBREAK/JobInsights)'
+POOL_CONNECTIONS = 4        # Число пулов (хостов), соединения с которыми кэшируются.
+POOL_MAXSIZE = 16           # Максимум keep-alive соединений на один хост.
+CONNECT_TIMEOUT = 5         # Тайм-аут установки соединения, сек.
+READ_TIMEOUT = 30           # Тайм-аут ожидания ответа, сек.
+
+# Локальные данные приложения (кэш справочников и т.п.).
+DATA_DIR = environ.get('JOBINSIGHTS_DATA_DIR', path.join(path.expanduser('~'), '.jobinsights'))
+CACHE_DIR = path.join(DATA_DIR, 'cache')
+CACHE_TTL = 24 * 60 * 60    # Время (сек.), в течение которого справочники не перепроверяются на сервере.
+DETAILS_DB = path.join(DATA_DIR, 'details.sqlite3')     # Локальное хранилище JSON'ов вакансий.
+CHECKPOINT_DIR = path.join(DATA_DIR, 'checkpoints')     # Контрольные точки прерванных поисков.
+CHECKPOINT_EVERY = 100      # Контрольная точка сохраняется каждые N обработанных вакансий.
+QUERIES_DIR = path.join(DATA_DIR, 'queries')            # Сохранённые запросы для инкрементального обновления.
+WAREHOUSE_DB = path.join(DATA_DIR, 'warehouse.sqlite3')    # Аналитическое хранилище всех собранных вакансий.
+WAREHOUSE_BATCH = 500       # Вакансии загружаются в хранилище пачками по N штук (одна транзакция на пачку).
+SKILL_SYNONYMS = path.join(DATA_DIR, 'skill_synonyms.json')    # Синонимы навыков {вариант: каноническое название}.
+MAX_SKILLS = 100_000        # Предельный размер словаря навыков (навыки сверх него не учитываются).
+SALARY_SAMPLE = 10_000      # Квантили ЗП точны до N значений, дальше считаются по случайной выборке из N.
+PROGRESS_INTERVAL = 0.1     # Минимальный интервал (сек.) между событиями прогресса для GUI и лога.
+RUN_REPORTS_DIR = path.join(DATA_DIR, 'runs')           # JSON-отчёты о прогонах (метрики по этапам).
+TRACE_MEMORY = bool(environ.get('JOBINSIGHTS_TRACE_MEMORY'))    # Отслеживать выделения памяти (tracemalloc).
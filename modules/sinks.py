@@ -0,0 +1,195 @@
+# /* coding: UTF-8 */
+
+import csv
+import json
+from abc import ABC, abstractmethod
+from .excel import CustomWorksheet
+from .vacancy import Vacancy, FIELDS
+from .warehouse import Warehouse, warehouse
+from .settings import WAREHOUSE_BATCH
+
+
+class Sink(ABC):
+    """
+    Класс Sink - базовый приёмник вакансий. Парсер передаёт в него вакансии по одной (потоково),
+    по мере их обработки, а по завершении поиска приёмник закрывается.
+    """
+
+    @abstractmethod
+    def write(self, vacancy: Vacancy) -> None:
+        """Записывает очередную вакансию."""
+
+    def close(self) -> None:
+        """Завершает запись (сбрасывает буферы, закрывает файлы)."""
+
+
+class ExcelSink(Sink):
+    def __init__(self, sheet: CustomWorksheet):
+        """
+        Приёмник, записывающий вакансии в главную таблицу книги Excel (со второй строки, под заголовками).
+
+        :param sheet: лист (объект класса CustomWorksheet), куда будет осуществляться запись.
+        """
+
+        self.sheet = sheet
+        self.rows = 1
+
+    def write(self, vacancy: Vacancy) -> None:
+        self.rows += 1
+        self.sheet.write_all_data(vacancy, row=self.rows)
+
+
+class CsvSink(Sink):
+    def __init__(self, file_path: str):
+        """
+        Приёмник, записывающий вакансии в CSV (UTF-8, разделитель - запятая, навыки - через '; ').
+
+        :param file_path: путь до файла.
+        """
+
+        self.file = open(file_path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(FIELDS)
+
+    def write(self, vacancy: Vacancy) -> None:
+        record = vacancy.as_record()
+        record['skills'] = '; '.join(record['skills'])
+        self.writer.writerow(record.values())
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class JsonLinesSink(Sink):
+    def __init__(self, file_path: str):
+        """
+        Приёмник, записывающий вакансии в JSON Lines (по объекту на строку).
+
+        :param file_path: путь до файла.
+        """
+
+        self.file = open(file_path, 'w', encoding='utf-8')
+
+    def write(self, vacancy: Vacancy) -> None:
+        self.file.write(json.dumps(vacancy.as_record(), ensure_ascii=False))
+        self.file.write('\n')
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetSink(Sink):
+    def __init__(self, file_path: str, batch_size: int = 10000):
+        """
+        Приёмник, записывающий вакансии в колоночный формат Parquet группами строк по batch_size.
+
+        Примечание! Требуется необязательная зависимость pyarrow.
+
+        :param file_path: путь до файла.
+        :param batch_size: число вакансий в одной группе строк (row group).
+        """
+
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('Для записи в Parquet установите пакет pyarrow: pip install pyarrow') from None
+
+        self.pa = pyarrow
+        self.schema = pyarrow.schema([('id', pyarrow.string()),
+                                      ('area_id', pyarrow.string()),
+                                      ('name', pyarrow.string()),
+                                      ('salary_from', pyarrow.int64()),
+                                      ('salary_to', pyarrow.int64()),
+                                      ('years_of_experience', pyarrow.int8()),
+                                      ('is_remote', pyarrow.int8()),
+                                      ('days_since_published', pyarrow.int32()),
+                                      ('days_since_created', pyarrow.int32()),
+                                      ('employer_name', pyarrow.string()),
+                                      ('url', pyarrow.string()),
+                                      ('skills', pyarrow.list_(pyarrow.string()))])
+        self.writer = pyarrow.parquet.ParquetWriter(file_path, self.schema)
+        self.batch_size = batch_size
+        self.batch = {name: [] for name in FIELDS}
+
+    def write(self, vacancy: Vacancy) -> None:
+        for name, value in vacancy.as_record().items():
+            self.batch[name].append(value)
+        if len(self.batch['name']) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Записывает накопленную группу строк."""
+
+        if self.batch['name']:
+            self.writer.write_table(self.pa.Table.from_pydict(self.batch, schema=self.schema))
+            self.batch = {name: [] for name in FIELDS}
+
+    def close(self) -> None:
+        self.flush()
+        self.writer.close()
+
+
+class WarehouseSink(Sink):
+    def __init__(self, request: str, store: Warehouse = None, batch_size: int = WAREHOUSE_BATCH):
+        """
+        Приёмник, загружающий вакансии в локальное аналитическое хранилище пачками по batch_size
+        (одна транзакция на пачку).
+
+        :param request: текст запроса (сохраняется вместе с вакансиями).
+        :param store: хранилище (по умолчанию общее для всего приложения).
+        :param batch_size: число вакансий в одной пачке.
+        """
+
+        self.request = request
+        self.store = store if store is not None else warehouse
+        self.batch_size = batch_size
+        self.batch = []
+
+    def write(self, vacancy: Vacancy) -> None:
+        self.batch.append(vacancy)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Загружает накопленную пачку вакансий."""
+
+        if self.batch:
+            self.store.put(self.batch, self.request)
+            self.batch = []
+
+    def close(self) -> None:
+        self.flush()
+
+
+class MultiSink(Sink):
+    def __init__(self, *sinks: Sink):
+        """
+        Приёмник, передающий каждую вакансию сразу в несколько приёмников (например, в отчёт и в файлы данных).
+
+        :param sinks: приёмники вакансий.
+        """
+
+        self.sinks = sinks
+
+    def write(self, vacancy: Vacancy) -> None:
+        for sink in self.sinks:
+            sink.write(vacancy)
+
+    def close(self) -> None:
+        """Закрывает все приёмники, даже если какой-то из них не закрылся (первая ошибка выбрасывается после)."""
+
+        error = None
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as exception:
+                error = error or exception
+        if error is not None:
+            raise error
+
+
+# Приёмники файлов данных по расширению (формату).
+SINKS = {'csv': CsvSink,
+         'jsonl': JsonLinesSink,
+         'parquet': ParquetSink}
@@ -0,0 +1,172 @@
+# /* coding: UTF-8 */
+
+import json
+from array import array
+from os import path
+from threading import Lock
+from typing import Iterable
+from .settings import SKILL_SYNONYMS, MAX_SKILLS
+
+# Синонимы навыков по умолчанию: {вариант написания: каноническое название}.
+# Дополняются (и переопределяются) пользовательской таблицей из файла SKILL_SYNONYMS.
+SYNONYMS = {'Python 3': 'Python',
+            'Python3': 'Python',
+            'Django': 'Django Framework',
+            'Postgres': 'PostgreSQL',
+            'Postgre SQL': 'PostgreSQL',
+            'MS SQL': 'MS SQL Server',
+            'MSSQL': 'MS SQL Server',
+            'JS': 'JavaScript',
+            'Java Script': 'JavaScript',
+            'HTML5': 'HTML',
+            'CSS3': 'CSS',
+            'K8s': 'Kubernetes',
+            'English': 'Английский язык',
+            'Английский': 'Английский язык',
+            'Excel': 'MS Excel',
+            'Microsoft Excel': 'MS Excel',
+            'Git Hub': 'GitHub',
+            'CI CD': 'CI/CD',
+            'Объектно-ориентированное программирование': 'ООП'}
+
+
+def canonical_key(name: str) -> str:
+    """
+    Ключ навыка, по которому различные написания считаются одним навыком:
+    без учёта регистра, лишних пробелов и различия букв 'ё' и 'е'.
+
+    :param name: название навыка.
+    :return: Ключ навыка.
+    """
+
+    return ' '.join(name.casefold().replace('ё', 'е').split())
+
+
+def case_rank(name: str) -> int:
+    """Ранг регистра написания: 0 - только строчные, 1 - только заглавные, 2 - смешанный."""
+
+    return 0 if name.islower() else 1 if name.isupper() else 2
+
+
+class SkillDictionary:
+    def __init__(self, synonyms: dict[str, str] = None, max_size: int = MAX_SKILLS):
+        """
+        Класс SkillDictionary - словарь навыков: приводит различные написания навыка к одному (canonical_key
+        и таблица синонимов) и присваивает каждому навыку целочисленный id. Навыки вакансий хранятся и
+        подсчитываются в виде массивов id, а строки названий существуют в одном экземпляре на навык.
+
+        Отображаемое название навыка - каноническое из таблицы синонимов, иначе первое встреченное написание
+        с наиболее "естественным" регистром: 'Linux' предпочтительнее 'LINUX', а 'LINUX' - 'linux'.
+
+        Один экземпляр может безопасно использоваться из нескольких потоков. Id действительны в пределах
+        процесса (в контрольных точках навыки сохраняются названиями).
+
+        Размер словаря (а с ним и массивов счётчиков SkillCounter) ограничен max_size навыками: когда словарь
+        заполнен, новые навыки не получают id и не учитываются (их число - в dropped).
+
+        :param synonyms: таблица синонимов {вариант написания: каноническое название}.
+        :param max_size: максимальное число навыков в словаре.
+        """
+
+        self.synonyms = {canonical_key(variant): name for variant, name in (synonyms or {}).items()}
+        self.max_size = max_size
+        self.dropped = 0        # Число вхождений навыков, не учтённых из-за заполненного словаря
+        self.names = []         # id -> отображаемое название
+        self.__ids = {}         # ключ навыка -> id
+        self.__raw = {}         # исходное написание -> id (чтобы не нормализовать каждое вхождение)
+        self.__fixed = set()    # id навыков, название которых задано таблицей синонимов
+        self.__lock = Lock()
+
+    @classmethod
+    def load(cls, file_path: str = SKILL_SYNONYMS) -> 'SkillDictionary':
+        """
+        Создаёт словарь с синонимами по умолчанию (SYNONYMS), дополненными пользовательской таблицей
+        из JSON-файла {вариант написания: каноническое название}, если он существует.
+
+        :param file_path: путь до пользовательской таблицы синонимов.
+        :return: Объект SkillDictionary.
+        """
+
+        synonyms = dict(SYNONYMS)
+        if path.exists(file_path):
+            with open(file_path, encoding='utf-8') as f:
+                synonyms.update(json.load(f))
+        return cls(synonyms)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, name: str) -> int | None:
+        """
+        Возвращает id навыка (новый навык добавляется в словарь).
+
+        :param name: название навыка в любом написании.
+        :return: Id навыка или None, если навык новый, а словарь заполнен (max_size).
+        """
+
+        skill_id = self.__raw.get(name)
+        if skill_id is None:
+            with self.__lock:
+                skill_id = self.__intern(name)
+        return skill_id
+
+    def key(self, name: str) -> str:
+        """
+        Возвращает ключ навыка с учётом таблицы синонимов ('Python 3' и 'python' -> 'python'),
+        не добавляя навык в словарь.
+
+        :param name: название навыка в любом написании.
+        :return: Ключ навыка.
+        """
+
+        key = canonical_key(name)
+        display = self.synonyms.get(key)
+        return canonical_key(display) if display is not None else key
+
+    def __intern(self, name: str) -> int | None:
+        key = canonical_key(name)
+        display = self.synonyms.get(key)
+        fixed = display is not None
+        if fixed:
+            key = canonical_key(display)
+        else:
+            display = ' '.join(name.split())
+
+        skill_id = self.__ids.get(key)
+        if skill_id is None and len(self.names) >= self.max_size:
+            self.dropped += 1
+            return None
+        if skill_id is None:
+            skill_id = self.__ids[key] = len(self.names)
+            self.names.append(display)
+        elif fixed and skill_id not in self.__fixed or \
+                skill_id not in self.__fixed and case_rank(display) > case_rank(self.names[skill_id]):
+            self.names[skill_id] = display
+
+        if fixed:
+            self.__fixed.add(skill_id)
+
+        self.__raw[name] = skill_id
+        return skill_id
+
+    def encode(self, names: Iterable[str]) -> array:
+        """
+        Переводит навыки вакансии в массив id. Написания одного навыка ('Python', 'python 3')
+        учитываются в вакансии один раз, навыки сверх размера словаря пропускаются.
+
+        :param names: названия навыков.
+        :return: Массив id навыков (array('I')).
+        """
+
+        skill_ids = dict.fromkeys(map(self.intern, names))
+        skill_ids.pop(None, None)
+        return array('I', skill_ids)
+
+    def decode(self, skill_ids: Iterable[int]) -> list[str]:
+        """Возвращает отображаемые названия навыков по их id."""
+
+        names = self.names
+        return [names[skill_id] for skill_id in skill_ids]
+
+
+skill_dictionary = SkillDictionary.load()
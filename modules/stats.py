@@ -0,0 +1,271 @@
+# /* coding: UTF-8 */
+
+from array import array
+from collections.abc import Hashable, Iterable
+from heapq import nlargest
+from math import inf
+from random import Random
+from .settings import SALARY_SAMPLE
+from .skills import SkillDictionary, skill_dictionary
+
+
+class SpaceSaving:
+    def __init__(self, capacity: int):
+        """
+        Класс SpaceSaving - потоковый подсчёт наиболее частых значений (Metwally, Agrawal, El Abbadi).
+
+        Хранится не более capacity счётчиков. Если значения нет среди отслеживаемых, оно вытесняет
+        значение с минимальным счётчиком и наследует его. Частоты значений, встречающихся чаще,
+        чем total / capacity раз, гарантированно попадают в результат.
+
+        :param capacity: максимальное число отслеживаемых значений.
+        """
+
+        self.capacity = capacity
+        self.counts = {}
+
+    def add(self, value: Hashable, count: int = 1) -> None:
+        """Учитывает очередное значение (count раз)."""
+
+        if value in self.counts or len(self.counts) < self.capacity:
+            self.counts[value] = self.counts.get(value, 0) + count
+            return
+
+        rarest = min(self.counts, key=self.counts.get)
+        self.counts[value] = self.counts.pop(rarest) + count
+
+    def most_common(self, n: int) -> list[tuple[Hashable, int]]:
+        """Возвращает n наиболее частых значений с их частотами (по убыванию частоты)."""
+
+        return sorted(self.counts.items(), key=lambda pair: pair[1], reverse=True)[:n]
+
+    def clear(self) -> None:
+        self.counts.clear()
+
+
+class SalaryStatistics:
+    def __init__(self, sample_size: int = SALARY_SAMPLE):
+        """
+        Класс SalaryStatistics накапливает статистику по заработным платам за один проход
+        и в постоянном объёме памяти: количество, среднее, минимум, максимум, квантили (медиану,
+        10-й и 90-й перцентили), а также модальное значение (SpaceSaving).
+
+        Квантили считаются по выборке из sample_size значений: пока значений не больше sample_size,
+        выборка содержит их все и квантили точны, дальше она пополняется случайно (reservoir sampling).
+        Порядок поступления значений на результат не влияет - в отличие от потоковых оценок (P²),
+        которые на выдаче, отсортированной по ЗП, смещали крайние перцентили на 10-30%.
+
+        Текущие значения доступны в любой момент парсинга через snapshot().
+
+        :param sample_size: размер выборки для квантилей (8 байт на значение).
+        """
+
+        self.sample_size = sample_size
+        self.clear()
+
+    def clear(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.min = inf
+        self.max = -inf
+        self.__sample = array('d')
+        self.__sorted = None
+        self.__random = Random(0)
+        self.__frequent = SpaceSaving(capacity=256)
+
+    def add(self, salary: float) -> None:
+        """Учитывает очередное значение заработной платы."""
+
+        self.count += 1
+        self.mean += (salary - self.mean) / self.count
+        self.min = min(self.min, salary)
+        self.max = max(self.max, salary)
+        self.__frequent.add(salary)
+
+        if len(self.__sample) < self.sample_size:
+            self.__sample.append(salary)
+            self.__sorted = None
+            return
+
+        # Каждое из count значений попадает в выборку с вероятностью sample_size / count
+        position = self.__random.randrange(self.count)
+        if position < self.sample_size:
+            self.__sample[position] = salary
+            self.__sorted = None
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def quantile(self, p: float) -> float | None:
+        """
+        Возвращает квантиль p (с линейной интерполяцией, как statistics.quantiles(method='inclusive')).
+
+        :param p: уровень квантиля от 0 до 1 (0.5 - медиана, 0.9 - 90-й перцентиль).
+        :return: Значение квантиля или None, если значений нет.
+        """
+
+        if not self:
+            return None
+        if self.__sorted is None:
+            self.__sorted = array('d', sorted(self.__sample))
+
+        values = self.__sorted
+        position = p * (len(values) - 1)
+        low = int(position)
+        high = min(low + 1, len(values) - 1)
+        return values[low] + (values[high] - values[low]) * (position - low)
+
+    @property
+    def median(self) -> float | None:
+        return self.quantile(0.5)
+
+    @property
+    def mode(self) -> float | None:
+        frequent = self.__frequent.most_common(1)
+        return frequent[0][0] if frequent else None
+
+    def snapshot(self) -> dict[str, float]:
+        """Возвращает текущие значения всех показателей."""
+
+        if not self:
+            return {'count': 0}
+
+        return {'count': self.count, 'mean': self.mean, 'median': self.median, 'mode': self.mode,
+                'p10': self.quantile(0.1), 'p90': self.quantile(0.9), 'min': self.min, 'max': self.max}
+
+
+class SalarySummary:
+    def __init__(self, count: int = 0, mean: float = 0.0, minimum: float = inf, maximum: float = -inf,
+                 mode: float = None, quantiles: dict[float, float] = None):
+        """
+        Класс SalarySummary - готовые (точные) показатели зарплат, например посчитанные запросом к хранилищу.
+        Интерфейс совпадает с SalaryStatistics, поэтому показатели записываются в книгу и выводятся так же.
+
+        :param count: число значений.
+        :param mean: среднее.
+        :param minimum: минимум.
+        :param maximum: максимум.
+        :param mode: модальное значение.
+        :param quantiles: квантили {уровень: значение} (0.1, 0.5 и 0.9).
+        """
+
+        self.count = count
+        self.mean = mean
+        self.min = minimum
+        self.max = maximum
+        self.mode = mode
+        self.quantiles = quantiles or {}
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def quantile(self, p: float) -> float | None:
+        """Возвращает квантиль p (None, если он не посчитан)."""
+
+        return self.quantiles.get(p)
+
+    @property
+    def median(self) -> float | None:
+        return self.quantile(0.5)
+
+    def snapshot(self) -> dict[str, float]:
+        """Возвращает значения всех показателей (как SalaryStatistics.snapshot)."""
+
+        if not self:
+            return {'count': 0}
+
+        return {'count': self.count, 'mean': self.mean, 'median': self.median, 'mode': self.mode,
+                'p10': self.quantile(0.1), 'p90': self.quantile(0.9), 'min': self.min, 'max': self.max}
+
+
+class SkillCounter:
+    def __init__(self, dictionary: SkillDictionary = None):
+        """
+        Класс SkillCounter - точный подсчёт самых востребованных навыков (ТОП-K).
+
+        Навыки учитываются по id словаря навыков (написания одного навыка уже сведены к одному id),
+        счётчики хранятся в массиве array('I'), индексом в котором служит id навыка: 4 байта на навык словаря
+        независимо от числа вхождений. Память ограничена размером словаря (MAX_SKILLS навыков - до 400 КБ).
+
+        :param dictionary: словарь навыков (по умолчанию общий для всего приложения).
+        """
+
+        self.dictionary = dictionary if dictionary is not None else skill_dictionary
+        self.counts = array('I')
+
+    def update(self, skill_ids: Iterable[int]) -> None:
+        """Учитывает навыки очередной вакансии (массив id навыков)."""
+
+        counts = self.counts
+        for skill_id in skill_ids:
+            if skill_id >= len(counts):
+                self.__grow(skill_id)
+            counts[skill_id] += 1
+
+    def add(self, skill_id: int, count: int = 1) -> None:
+        """Учитывает навык skill_id count раз (например, готовый результат подсчёта из хранилища)."""
+
+        if skill_id >= len(self.counts):
+            self.__grow(skill_id)
+        self.counts[skill_id] += count
+
+    def __grow(self, skill_id: int) -> None:
+        """Дополняет массив счётчиков нулями до текущего размера словаря (не по одному новому id)."""
+
+        counts = self.counts
+        counts.frombytes(bytes(counts.itemsize * (max(len(self.dictionary), skill_id + 1) - len(counts))))
+
+    def most_common(self, n: int) -> list[tuple[str, int]]:
+        """Возвращает n наиболее частых навыков с их частотами (по убыванию частоты)."""
+
+        counts = self.counts
+        top = nlargest(n, range(len(counts)), key=counts.__getitem__)
+        return [(self.dictionary.names[skill_id], counts[skill_id]) for skill_id in top if counts[skill_id]]
+
+    def clear(self) -> None:
+        self.counts = array('I')
+
+    def __getstate__(self) -> dict[str, int]:
+        """Сохраняет счётчики по названиям навыков: id действительны только в пределах процесса."""
+
+        names = self.dictionary.names
+        return {names[skill_id]: count for skill_id, count in enumerate(self.counts) if count}
+
+    def __setstate__(self, state: dict[str, int]) -> None:
+        self.dictionary = skill_dictionary
+        self.counts = array('I')
+        for name, count in state.items():
+            skill_id = self.dictionary.intern(name)
+            if skill_id is not None:
+                self.add(skill_id, count)
+
+
+class VacancyStatistics:
+    def __init__(self):
+        """
+        Класс VacancyStatistics - сводная статистика по группе вакансий (например, по одному региону):
+        число вакансий, число удалённых вакансий, статистика зарплат, границы вилок ЗП и ТОП навыков.
+        """
+
+        self.count = 0
+        self.remote = 0
+        self.salary_min = inf   # Минимум по нижним и верхним границам вилок ЗП.
+        self.salary_max = -inf  # Максимум по нижним и верхним границам вилок ЗП.
+        self.salaries = SalaryStatistics()
+        self.skills = SkillCounter()
+
+    def add(self, vacancy) -> None:
+        """
+        Учитывает очередную вакансию.
+
+        :param vacancy: объект класса Vacancy.
+        """
+
+        self.count += 1
+        self.remote += vacancy.is_remote
+        if vacancy.mean_salary is not None:
+            self.salaries.add(vacancy.mean_salary)
+            bounds = tuple(filter(None, (vacancy.salary_from, vacancy.salary_to)))
+            self.salary_min = min(self.salary_min, *bounds)
+            self.salary_max = max(self.salary_max, *bounds)
+        self.skills.update(vacancy.skills)
@@ -0,0 +1,93 @@
+# /* coding: UTF-8 */
+
+import json
+import sqlite3
+from os import path, makedirs
+from threading import Lock
+from .settings import DETAILS_DB
+
+
+class DetailStore:
+    def __init__(self, db_path: str = DETAILS_DB):
+        """
+        Класс DetailStore - локальное хранилище (SQLite) подробных JSON'ов вакансий по их id.
+
+        Вместе с JSON'ом хранится дата публикации (published_at). Если в выдаче поиска дата совпадает
+        с сохранённой - вакансия не менялась, и повторно запрашивать её у API hh.ru не нужно.
+
+        Примечание! База открывается при первом обращении, объект можно использовать из нескольких потоков.
+
+        :param db_path: путь до файла базы данных.
+        """
+
+        self.db_path = db_path
+        self.__connection = None
+        self.__lock = Lock()
+
+    def __connect(self) -> sqlite3.Connection:
+        """Открывает (и при необходимости создаёт) базу данных."""
+
+        if self.__connection is None:
+            makedirs(path.dirname(self.db_path), exist_ok=True)
+            self.__connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.execute('PRAGMA synchronous=NORMAL')
+            self.__connection.execute('CREATE TABLE IF NOT EXISTS details ('
+                                      'id TEXT PRIMARY KEY, '
+                                      'published_at TEXT NOT NULL, '
+                                      'payload TEXT NOT NULL)')
+        return self.__connection
+
+    def get(self, vacancy_id: str, published_at: str = None) -> dict | None:
+        """
+        Возвращает сохранённый JSON вакансии.
+
+        :param vacancy_id: id вакансии.
+        :param published_at: дата публикации из выдачи поиска; если задана и не совпадает с сохранённой,
+                             копия считается устаревшей.
+        :return: JSON вакансии или None, если актуальной копии нет.
+        """
+
+        with self.__lock:
+            row = self.__connect().execute('SELECT published_at, payload FROM details WHERE id = ?',
+                                           (vacancy_id,)).fetchone()
+
+        if row is None or (published_at is not None and row[0] != published_at):
+            return None
+        return json.loads(row[1])
+
+    def get_many(self, vacancy_ids: list[str]) -> dict[str, dict]:
+        """
+        Возвращает сохранённые JSON'ы вакансий независимо от даты публикации (например, при восстановлении
+        с контрольной точки - ту же версию, что была обработана).
+
+        :param vacancy_ids: id вакансий.
+        :return: Словарь {id вакансии: JSON}, вакансий без сохранённой копии в нём нет.
+        """
+
+        jobs = {}
+        with self.__lock:
+            connection = self.__connect()
+            for start in range(0, len(vacancy_ids), 500):   # Лимит числа параметров запроса SQLite
+                chunk = vacancy_ids[start:start + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                jobs.update(connection.execute(f'SELECT id, payload FROM details WHERE id IN ({placeholders})',
+                                               chunk).fetchall())
+        return {vacancy_id: json.loads(payload) for vacancy_id, payload in jobs.items()}
+
+    def put(self, job: dict) -> None:
+        """
+        Сохраняет (или обновляет) JSON вакансии.
+
+        :param job: Информация о вакансии в формате JSON.
+        """
+
+        payload = json.dumps(job, ensure_ascii=False)
+        with self.__lock:
+            connection = self.__connect()
+            connection.execute('INSERT OR REPLACE INTO details (id, published_at, payload) VALUES (?, ?, ?)',
+                               (job['id'], job['published_at'], payload))
+            connection.commit()
+
+
+detail_store = DetailStore()
@@ -0,0 +1,44 @@
+# /* coding: UTF-8 */
+
+from requests import Session, Response
+from requests.adapters import HTTPAdapter
+from .settings import USER_AGENT, POOL_CONNECTIONS, POOL_MAXSIZE, CONNECT_TIMEOUT, READ_TIMEOUT
+
+
+def create_session(pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE) -> Session:
+    """
+    Создаёт HTTP-сессию с пулом keep-alive соединений и сжатием ответов.
+
+    Примечание! Пул блокирующий: при исчерпании pool_maxsize поток ждёт освобождения соединения,
+    а не открывает новое, поэтому число соединений с api.hh.ru не превышает заданного предела.
+
+    :param pool_connections: число хостов, пулы соединений которых кэшируются.
+    :param pool_maxsize: максимальное число соединений с одним хостом.
+    :return: Объект сессии requests.
+    """
+
+    s = Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+    s.mount('https://', adapter)
+    s.mount('http://', adapter)
+    s.headers.update({'User-Agent': USER_AGENT,
+                      'Accept-Encoding': 'gzip, deflate',
+                      'Connection': 'keep-alive'})
+    return s
+
+
+def get(url: str, params: dict = None, **kwargs) -> Response:
+    """
+    Выполняет GET-запрос через общую сессию приложения (замена requests.get).
+
+    :param url: адрес запроса.
+    :param params: параметры строки запроса.
+    :param kwargs: прочие аргументы requests (по умолчанию задаётся тайм-аут).
+    :return: Объект ответа requests.
+    """
+
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    return session.get(url, params=params, **kwargs)
+
+
+session = create_session()
@@ -1,26 +1,39 @@
 # /* coding: UTF-8 */
 
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
-from PyQt5.QtWidgets import (QLineEdit, QCompleter,
-                             QPushButton, QSlider, QLabel, QProgressBar, QMainWindow, QCheckBox, QComboBox)
+from PyQt5.QtWidgets import (QLineEdit, QCompleter, QWidget, QVBoxLayout, QPushButton, QSlider, QLabel, QProgressBar,
+                             QMainWindow, QCheckBox, QComboBox, QTableWidget, QTableWidgetItem, QAbstractItemView,
+                             QHeaderView, QMessageBox)
 
 from images import icon
-from .api import areas, get_my_area_id, get_page, vacancy_search_order
-from .parser import parser
-from .worker import FileWorker
+from .api import get_area_index, get_my_area_ids, get_vacancy_search_order
+from .checkpoint import Checkpoint
+from .registry import SavedQuery
+from .worker import ReferenceLoader, SearchProbe
+from .jobs import Job, JobQueue, RUNNING
+from .metrics import RunMetrics
+
+# Доля вакансий, для которых в быстром режиме загружаются детали (ради ключевых навыков).
+SKILLS_SAMPLES = {'Навыки: не собирать': 0.0,
+                  'Навыки: по 10% вакансий': 0.1,
+                  'Навыки: по 25% вакансий': 0.25,
+                  'Навыки: по всем вакансиям': 1.0}
 
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.worker = None
-        self.areas_dict = areas
+        self.loader = None
+        self.stats_panel = None
+        self.queue = JobQueue()     # Очередь поисков: каждый поиск - отдельное задание со своим парсером
+        self.current = None         # Номер задания, прогресс которого показывается в шкале
+        self.probes = set()         # Выполняющиеся проверочные запросы (до QThread.finished)
 
         # Название программы и размеры окна
         self.setWindowTitle('Job Insights')
         self.setWindowIcon(icon('pie_chart.png'))
-        self.setFixedSize(500, 350)
+        self.setFixedSize(500, 500)
 
         # Окно ввода вакансии
         self.job_field = QLineEdit(self)
@@ -32,11 +45,22 @@ class MainWindow(QMainWindow):
         self.search_button = QPushButton(icon('search.png'), '', self)
         self.search_button.setGeometry(400, 30, 45, 30)
 
-        # Кнопка СТОП
+        # Кнопка СТОП (отменяет все поиски очереди)
         self.stop_button = QPushButton(icon('cancel.png'), '', self)
         self.stop_button.setGeometry(445, 30, 45, 30)
+        self.stop_button.setToolTip('Остановить все поиски')
         self.stop_button.setEnabled(False)
 
+        # Кнопка продолжения прерванного поиска (с последней контрольной точки)
+        self.resume_button = QPushButton('Продолжить', self)
+        self.resume_button.setGeometry(400, 65, 90, 25)
+        self.resume_button.setToolTip('Продолжить последний прерванный поиск')
+
+        # Кнопка панели статистики прогона (длительности этапов, HTTP-статусы, память)
+        self.stats_button = QPushButton('Статистика', self)
+        self.stats_button.setGeometry(400, 95, 90, 25)
+        self.stats_button.setToolTip('Показать метрики выбранного в очереди поиска')
+
         # Надпись Регион:
         self.region = QLabel('Регион:', self)
         self.region.setGeometry(10, 80, 40, 20)
@@ -45,10 +69,6 @@ class MainWindow(QMainWindow):
         self.area_box = QLineEdit(self)
         self.area_box.setPlaceholderText('Все регионы')
         self.area_box.setGeometry(60, 80, 200, 20)
-        suggestions = self.areas_dict.values()  # Тут подхватываются города из инициализатора API hh.ru
-        completer = QCompleter(suggestions, self.area_box)
-        completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-        self.area_box.setCompleter(completer)
 
         # Слайдер и количество анализируемых страниц
         self.pages_slider = QSlider(Qt.Orientation.Horizontal, self)
@@ -66,6 +86,11 @@ class MainWindow(QMainWindow):
         self.status_label.setGeometry(280, 260, 210, 45)
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignRight)
 
+        # Скорость обработки, объём полученных данных и оставшееся время
+        self.rate_label = QLabel('', self)
+        self.rate_label.setGeometry(280, 230, 210, 20)
+        self.rate_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+
         # Шкала прогресса поиска
         self.progress_bar = QProgressBar(self)
         self.progress_bar.setGeometry(10, 310, 480, 30)
@@ -78,18 +103,58 @@ class MainWindow(QMainWindow):
         vacancy_font.setItalic(True)
         self.vacancy_label.setFont(vacancy_font)
 
+        # Очередь поисков: ожидающие, выполняемые и завершённые (выбранный поиск отображается в шкале прогресса)
+        self.queue_table = QTableWidget(0, 3, self)
+        self.queue_table.setGeometry(10, 350, 480, 110)
+        self.queue_table.setHorizontalHeaderLabels(['Запрос', 'Статус', '%'])
+        self.queue_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.queue_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        self.queue_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
+        self.queue_table.verticalHeader().setVisible(False)
+        self.queue_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.queue_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.queue_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+
+        # Кнопка отмены выбранного поиска
+        self.cancel_button = QPushButton('Отменить', self)
+        self.cancel_button.setGeometry(400, 465, 90, 25)
+        self.cancel_button.setToolTip('Отменить выбранный поиск (выполняемый будет сохранён с текущим содержимым)')
+        self.cancel_button.setEnabled(False)
+
         # Галочка отсева вакансий без указания дохода
         self.salary_button = QCheckBox('Только с указанием дохода', self)
         self.salary_button.setGeometry(10, 110, 230, 20)
         self.salary_button.isChecked()
 
+        # Галочка полного охвата (запрос делится на части, чтобы обойти лимит выдачи в 2000 вакансий)
+        self.coverage_button = QCheckBox('Полный охват (больше 2000 вакансий)', self)
+        self.coverage_button.setGeometry(10, 170, 250, 20)
+        self.coverage_button.setToolTip('Число страниц не учитывается: обходятся все найденные вакансии.')
+
+        # Галочка инкрементального обновления (запрос сохраняется, повторно загружаются только новые вакансии)
+        self.refresh_button = QCheckBox('Только новые с прошлого запуска', self)
+        self.refresh_button.setGeometry(10, 200, 250, 20)
+        self.refresh_button.setToolTip('Запрос сохраняется. При повторном запуске загружаются только вакансии,\n'
+                                       'опубликованные после прошлого запуска, и объединяются с прежними.')
+
+        # Галочка быстрого режима (вакансии строятся из выдачи поиска, без запроса деталей каждой вакансии)
+        self.lean_button = QCheckBox('Быстрый режим', self)
+        self.lean_button.setGeometry(280, 110, 210, 20)
+        self.lean_button.setToolTip('1 запрос на 100 вакансий вместо 101. Ключевые навыки загружаются\n'
+                                    'только для выбранной доли вакансий, дата создания - без учёта переиздания.')
+
+        # Выпадающий список выборки вакансий для навыков (в быстром режиме)
+        self.skills_box = QComboBox(self)
+        self.skills_box.setGeometry(280, 140, 210, 20)
+        self.skills_box.addItems(SKILLS_SAMPLES)
+        self.skills_box.setEnabled(False)
+
         # Подпись для сортировки
         self.order_by_label = QLabel('Сортировать:', self)
         self.order_by_label.setGeometry(10, 140, 90, 20)
 
         # Выпадающий список сортировки
         self.order_by_box = QComboBox(self)
-        self.order_by_box.addItems(vacancy_search_order)
         self.order_by_box.setGeometry(95, 140, 165, 20)
 
         # Подпись для периода публикации
@@ -104,7 +169,68 @@ class MainWindow(QMainWindow):
         # Связывание виджетов с функциями
         self.pages_slider.valueChanged.connect(self.update_pages_number)
         self.search_button.clicked.connect(self.search)
-        self.stop_button.clicked.connect(parser.stop_parsing)
+        self.resume_button.clicked.connect(self.resume)
+        self.stop_button.clicked.connect(self.queue.cancel_all)
+        self.cancel_button.clicked.connect(self.cancel_selected)
+        self.stats_button.clicked.connect(self.show_stats_panel)
+        self.lean_button.toggled.connect(self.skills_box.setEnabled)
+        self.queue_table.itemSelectionChanged.connect(self.select_job)
+        self.queue.jobChanged.connect(self.update_job)
+        self.queue.queueFinished.connect(self.searching_completed)
+
+        # Справочники hh.ru загружаются в фоне, до их получения поиск недоступен
+        self.unlock_buttons(key=False)
+        self.stop_button.setEnabled(False)
+        self.load_reference_data()
+
+    def load_reference_data(self):
+        """Запускает фоновую загрузку справочников API hh.ru (регионы, сортировки, курсы валют)."""
+
+        self.status_label.setText('Статус: Загрузка справочников...')
+        self.loader = ReferenceLoader()
+        self.loader.dataLoaded.connect(self.reference_data_loaded)
+        self.loader.loadFailed.connect(self.reference_data_failed)
+        self.loader.start()
+
+    def reference_data_loaded(self):
+        """Заполняет виджеты справочными данными и разблокирует элементы поиска."""
+
+        suggestions = get_area_index().sorted_labels()  # Тут подхватываются города из инициализатора API hh.ru
+        completer = QCompleter(suggestions, self.area_box)
+        completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        completer.setModelSorting(QCompleter.ModelSorting.CaseInsensitivelySortedModel)  # Бинарный поиск по префиксу
+        self.area_box.setCompleter(completer)
+
+        self.order_by_box.addItems(get_vacancy_search_order())
+
+        self.unlock_buttons(key=True)
+        self.status_label.setText('Статус: Ожидание')
+
+    def reference_data_failed(self, error: str):
+        """
+        Сообщает об ошибке загрузки справочников и повторяет попытку через 5 секунд.
+
+        :param error: Текст ошибки.
+        """
+
+        print(f'Не удалось загрузить справочники hh.ru: {error}')
+        self.status_label.setText('Статус: Нет связи с hh.ru.\nПовторная попытка...')
+        QTimer.singleShot(5000, self.load_reference_data)
+
+    @property
+    def current_job(self) -> Job | None:
+        return self.queue.jobs.get(self.current)
+
+    def show_stats_panel(self):
+        """Открывает окно с метриками выбранного поиска, обновляемыми раз в секунду."""
+
+        job = self.current_job
+        metrics = job.parser.metrics if job is not None else RunMetrics()
+        if self.stats_panel is None:
+            self.stats_panel = StatsPanel(metrics)
+        self.stats_panel.metrics = metrics
+        self.stats_panel.show()
+        self.stats_panel.raise_()
 
     def update_pages_number(self, value: int):
         """
@@ -115,29 +241,66 @@ class MainWindow(QMainWindow):
 
         self.pages_display.setText(f'Число страниц поиска: {value}')
 
-    def update_progress_bar(self, value: int):
+    def select_job(self):
+        """Показывает в шкале прогресса (и в окне статистики) поиск, выбранный в очереди."""
+
+        rows = self.queue_table.selectionModel().selectedRows()
+        if not rows:
+            return
+        self.current = rows[0].row()    # Задания не удаляются из очереди, номер задания совпадает с номером строки
+        job = self.current_job
+        self.cancel_button.setEnabled(job.active)
+        self.show_job_progress(job)
+        if self.stats_panel is not None:
+            self.stats_panel.metrics = job.parser.metrics
+
+    def show_job_progress(self, job: Job):
         """
-        Обновляет значение шкалы прогресса.
+        Обновляет шкалу прогресса, название текущей вакансии и строку скорости по состоянию задания.
 
-        :param value: Значение прогресса (от 0 до 100).
+        :param job: Задание очереди.
         """
 
-        self.progress_bar.setValue(value)
+        self.progress_bar.setValue(job.percent)
+        self.vacancy_label.setText(job.text if job.status == RUNNING else f'{job.title}: {job.status}')
+        self.rate_label.setText(job.stats if job.status == RUNNING else '')
 
-    def update_progress_text(self, vacancy_name: str):
+    def update_job(self, number: int):
         """
-        Обновляет название вакансии, отображаемое в шкале прогресса.
+        Обновляет строку задания в очереди, а для выбранного задания - и шкалу прогресса.
 
-        :param vacancy_name: Название текущей обрабатываемой вакансии.
+        :param number: Номер задания.
         """
 
-        self.vacancy_label.setText(vacancy_name)
+        job = self.queue.jobs[number]
+        if number >= self.queue_table.rowCount():
+            self.queue_table.insertRow(number)
+            self.queue_table.setItem(number, 0, QTableWidgetItem(job.title))
+            self.queue_table.setItem(number, 1, QTableWidgetItem())
+            self.queue_table.setItem(number, 2, QTableWidgetItem())
+
+        status = job.status if job.error is None else f'{job.status}: {job.error}'
+        self.queue_table.item(number, 1).setText(job.status)
+        self.queue_table.item(number, 1).setToolTip(status)
+        self.queue_table.item(number, 2).setText(str(job.percent))
+
+        if number == self.current:
+            self.cancel_button.setEnabled(job.active)
+            self.show_job_progress(job)
+
+        running, pending = len(self.queue.running), len(self.queue.pending)
+        if running or pending:
+            self.stop_button.setEnabled(True)
+            self.status_label.setText(f'Статус: Выполняется поисков: {running}.\nВ очереди: {pending}.')
 
     def unlock_buttons(self, key):
         """
         Разблокирует или блокирует кнопки и поля ввода в зависимости от значения ключа.
 
-        :param key: Значение True разблокирует элементы (кроме кнопки СТОП), False - блокирует (также кроме СТОП).
+        Поиски выполняются в очереди, поэтому во время поиска элементы остаются доступны (можно добавлять новые).
+        Кнопка СТОП доступна, пока в очереди есть ожидающие или выполняемые поиски.
+
+        :param key: Значение True разблокирует элементы, False - блокирует.
         """
 
         self.search_button.setEnabled(key)
@@ -145,17 +308,37 @@ class MainWindow(QMainWindow):
         self.area_box.setEnabled(key)
         self.pages_slider.setEnabled(key)
         self.salary_button.setEnabled(key)
+        self.coverage_button.setEnabled(key)
+        self.refresh_button.setEnabled(key)
+        self.lean_button.setEnabled(key)
+        self.skills_box.setEnabled(key and self.lean_button.isChecked())
         self.order_by_box.setEnabled(key)
         self.period_box.setEnabled(key)
-        self.stop_button.setEnabled(not key)
+        self.update_resume_button(key)
+
+    def update_resume_button(self, key: bool = True):
+        """
+        Кнопка "Продолжить" доступна, только если есть контрольная точка поиска, которого нет в очереди.
+
+        :param key: Значение False блокирует кнопку в любом случае.
+        """
+
+        self.resume_button.setEnabled(key and Checkpoint.latest(exclude=self.queue.checkpoints) is not None)
 
     def searching_completed(self):
-        """Вызывается по завершении процесса поиска вакансий и обновляет интерфейс после завершения работы."""
+        """Вызывается, когда в очереди не осталось ожидающих и выполняемых поисков, и обновляет интерфейс."""
 
         self.unlock_buttons(key=True)
-        self.vacancy_label.setText('')
-        self.progress_bar.setValue(0)
-        self.status_label.setText(f'Статус: Файл создан.\nПоиск завершён.')
+        self.stop_button.setEnabled(False)
+        self.cancel_button.setEnabled(False)
+        self.rate_label.setText('')
+        self.status_label.setText(f'Статус: Файлы созданы.\nВсе поиски завершены.')
+
+    def cancel_selected(self):
+        """Отменяет поиск, выбранный в очереди."""
+
+        if self.current is not None:
+            self.queue.cancel(self.current)
 
     def period_edit(self):
         """Возвращает валидное значение числа дней, за которое могли быть опубликованы вакансии."""
@@ -174,14 +357,17 @@ class MainWindow(QMainWindow):
 
         request = self.job_field.text()
         region = self.area_box.text()
-        area_id = get_my_area_id(region, self.areas_dict)
+        area_ids = get_my_area_ids(region)  # Несколько регионов можно перечислить через запятую
+        area_id = area_ids[0] if len(area_ids) == 1 else area_ids or None
         pages = self.pages_slider.value()
         period = self.period_edit()
-        order_by = vacancy_search_order[self.order_by_box.currentText()]
+        order_by = get_vacancy_search_order()[self.order_by_box.currentText()]
         only_with_salary = self.salary_button.isChecked()
+        full_coverage = self.coverage_button.isChecked()
+        lean = self.lean_button.isChecked()
+        skills_sample = SKILLS_SAMPLES[self.skills_box.currentText()] if lean else 0.0
 
-        _, found = get_page(request, area_id, period, only_with_salary)
-        if not request or not found:
+        if not request:
             self.status_label.setText(f"Статус: Не найдено вакансий.")
             return
 
@@ -191,14 +377,131 @@ class MainWindow(QMainWindow):
                    'pages': pages,
                    'period': period,
                    'order_by': order_by,
-                   'only_with_salary': only_with_salary}
+                   'only_with_salary': only_with_salary,
+                   'full_coverage': full_coverage,
+                   'lean': lean,
+                   'skills_sample': skills_sample}
+
+        saved_query = None
+        if self.refresh_button.isChecked():
+            name = f'{request} ({region or "Все регионы"})'
+            saved_query = SavedQuery.load(name) or SavedQuery(name, options)
+
+        # Проверочный запрос (с ожиданием лимита и повторами) выполняется в фоне, поиск на это время недоступен
+        self.search_button.setEnabled(False)
+        self.status_label.setText('Статус: Проверка запроса...')
+        # Ссылка на поток хранится до QThread.finished: кнопка разблокируется сигналом из run(), и новый поиск
+        # может начаться, пока прежний поток ещё работает (сборка его обёртки уронила бы Qt)
+        probe = SearchProbe(request, area_id, period, only_with_salary)
+        probe.probeFinished.connect(lambda found: self.search_probed(options, saved_query, found))
+        probe.probeFailed.connect(self.search_probe_failed)
+        probe.finished.connect(lambda: self.probes.discard(probe))
+        self.probes.add(probe)
+        probe.start()
+
+    def search_probed(self, options: dict, saved_query: SavedQuery | None, found: int):
+        """
+        Ставит поиск в очередь, если проверочный запрос нашёл вакансии.
 
-        # Создаём тред для поиска вакансий
-        self.unlock_buttons(key=False)
-        self.status_label.setText(f"Статус: Идёт поиск.\nПо запросу найдено {found} вакансий.")
-        self.worker = FileWorker(options=options)
+        :param options: параметры запроса.
+        :param saved_query: сохранённый запрос для инкрементального обновления.
+        :param found: число найденных вакансий.
+        """
+
+        self.search_button.setEnabled(True)
+        if not found:
+            self.status_label.setText(f"Статус: Не найдено вакансий.")
+            return
+
+        if self.start_job(options, saved_query=saved_query) is not None:
+            print(f'По запросу {options["request"]} найдено {found} вакансий.')
+
+    def search_probe_failed(self, error: str):
+        """
+        Сообщает об ошибке проверочного запроса (нет связи с hh.ru, исчерпаны повторы) и разблокирует поиск.
+
+        :param error: Текст ошибки.
+        """
+
+        self.search_button.setEnabled(True)
+        self.status_label.setText('Статус: Ошибка запроса к hh.ru.')
+        QMessageBox.warning(self, 'Ошибка!', f'Не удалось выполнить запрос к hh.ru:\n{error}')
+
+    def resume(self):
+        """Продолжает последний прерванный поиск с его контрольной точки."""
+
+        # Контрольные точки заданий очереди пропускаются: их пишут (или будут писать) сами задания
+        checkpoint = Checkpoint.latest(exclude=self.queue.checkpoints)
+        if checkpoint is None:
+            self.resume_button.setEnabled(False)
+            self.status_label.setText('Статус: Нет прерванных поисков\nвне очереди.')
+            return
+
+        self.job_field.setText(checkpoint.options['request'])
+        if self.start_job(checkpoint.options, resume=True) is not None:
+            print(f'Продолжение поиска {checkpoint.options["request"]}: '
+                  f'обработано {checkpoint.done} из {len(checkpoint.entries)} вакансий.')
+
+    def start_job(self, options: dict, resume: bool = False, saved_query: SavedQuery = None) -> Job | None:
+        """
+        Добавляет поиск в очередь заданий и выбирает его в таблице очереди.
+        Если задание очереди уже пишет в ту же книгу, поиск не добавляется (сообщение - в строке статуса).
+
+        :param options: параметры запроса.
+        :param resume: продолжить поиск с контрольной точки.
+        :param saved_query: сохранённый запрос для инкрементального обновления.
+        :return: Объект Job или None, если такой поиск уже есть в очереди.
+        """
+
+        job = self.queue.submit(options, resume=resume, saved_query=saved_query)
+        if job is None:
+            self.status_label.setText('Статус: Такой поиск\nуже есть в очереди.')
+            return None
+
+        self.queue_table.selectRow(job.number)
+        self.update_resume_button()
+        return job
+
+
+class StatsPanel(QWidget):
+    def __init__(self, metrics: RunMetrics, interval: int = 1000):
+        """
+        Класс StatsPanel - окно с живой сводкой метрик прогона: длительности этапов, ожидание лимита запросов,
+        HTTP-статусы и пиковая память. Пока окно открыто, сводка обновляется каждые interval мс.
+
+        :param metrics: метрики прогона (объект RunMetrics парсера).
+        :param interval: период обновления, мс.
+        """
+
+        super().__init__()
+        self.metrics = metrics
+
+        self.setWindowTitle('Job Insights: статистика прогона')
+        self.setWindowIcon(icon('pie_chart.png'))
+        self.setMinimumSize(420, 300)
+
+        self.text = QLabel(self)
+        self.text.setFont(QFont('Courier New', 9))
+        self.text.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        self.text.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.text)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        """Перерисовывает сводку метрик."""
+
+        self.text.setText(self.metrics.summary() if self.metrics.started else 'Поиск ещё не запускался.')
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
 
-        self.worker.progressStatus.connect(self.update_progress_bar)
-        self.worker.progressText.connect(self.update_progress_text)
-        self.worker.taskFinished.connect(self.searching_completed)
-        self.worker.start()
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
@@ -1,22 +1,73 @@
 # /* coding: UTF-8 */
 
-from datetime import datetime, date
+from datetime import date
+from functools import cache
+from operator import attrgetter
 from re import search
-from .api import rates, russian_areas
+from statistics import mean
+from .api import get_rates, get_russian_areas
+from .skills import skill_dictionary
+
+# Схема главной таблицы: (атрибут Vacancy, заголовок столбца) в порядке следования столбцов.
+COLUMNS = (('name', 'Должность'),
+           ('salary_from', 'Зарплата от, ₽'),
+           ('salary_to', 'Зарплата до, ₽'),
+           ('years_of_experience', 'Минимум лет опыта'),
+           ('is_remote', 'Удалёнка'),
+           ('days_since_published', 'Опубликовано\n(дней)'),
+           ('days_since_created', 'Создано\n(дней)'),
+           ('employer_name', 'Работодатель'),
+           ('url', 'Подробнее'))
+
+# Поля вакансии для машиночитаемых форматов (CSV, JSON Lines, Parquet).
+FIELDS = ('id', 'area_id', 'name', 'salary_from', 'salary_to', 'years_of_experience', 'is_remote',
+          'days_since_published', 'days_since_created', 'employer_name', 'url', 'skills')
+
+row_values = attrgetter(*(attr for attr, _ in COLUMNS))
+
+
+@cache
+def experience_years(name: str) -> int:
+    """
+    Минимальный опыт работы (лет) по названию градации опыта hh.ru, например 'От 1 года до 3 лет' -> 1.
+    Градаций всего несколько, поэтому результат кэшируется.
+    """
+
+    exp = search(r'\d', name)
+    return int(exp.group()) if exp else 0
+
+
+def days_since(stamp: str, today: int) -> int:
+    """
+    Число дней между датой stamp и днём today.
+
+    :param stamp: Дата в формате ISO 8601 ('2023-07-27T10:53:02+0300'); учитывается дата в часовом поясе вакансии.
+    :param today: Порядковый номер текущей даты (date.toordinal()).
+    """
+
+    return today - date.fromisoformat(stamp[:10]).toordinal()
 
 
 class Vacancy:
-    max_row = 2  # Новая строка при записи данных каждого объекта в файл
+    __slots__ = FIELDS
+
+    columns = COLUMNS
 
     def __init__(self, job: dict):
         """
         Класс Vacancy представляет собой объект для хранения данных о вакансии.
 
-        :param job: Информация о вакансии в формате JSON.
+        Примечание! Порядок столбцов при записи задаётся схемой COLUMNS, а не порядком атрибутов.
+
+        Вакансию можно построить и из краткого элемента выдачи поиска (быстрый режим): в нём нет ключевых навыков
+        (skills - пустой массив) и даты первичного создания (используется дата создания created_at).
+
+        Навыки хранятся массивом id словаря навыков (skill_dictionary), названия - через skill_names.
+
+        :param job: Информация о вакансии в формате JSON (детали вакансии или элемент выдачи поиска).
         """
 
-        self.row = Vacancy.max_row
-        Vacancy.max_row += 1
+        self.id = job['id']
 
         self.area_id = job['area']['id']
 
@@ -24,19 +75,45 @@ class Vacancy:
 
         self.salary_from, self.salary_to = self.__get_salary_range(job['salary'])
 
-        exp = search(r'\d', job['experience']['name'])
-        self.years_of_experience = int(exp.group()) if exp else 0
+        self.years_of_experience = experience_years(job['experience']['name'])
 
         self.is_remote = int(job['schedule']['name'] == 'Удаленная работа')
 
         self.days_since_published = self.__find_timedelta(job['published_at'])
-        self.days_since_created = self.__find_timedelta(job['initial_created_at'])
+        self.days_since_created = self.__find_timedelta(job.get('initial_created_at') or job['created_at'])
 
         self.employer_name = job['employer']['name']
 
         self.url = job['alternate_url']
 
-        self.skills = [skill for dct in job['key_skills'] for skill in dct.values()]
+        self.skills = skill_dictionary.encode(skill for dct in job.get('key_skills', ()) for skill in dct.values())
+
+    def as_row(self) -> tuple:
+        """Возвращает кортеж значений столбцов главной таблицы (в порядке схемы COLUMNS)."""
+
+        return row_values(self)
+
+    def as_record(self) -> dict:
+        """Возвращает вакансию в виде словаря {поле: значение} (отсутствующая ЗП - None, навыки - список названий)."""
+
+        record = {field: getattr(self, field) for field in FIELDS}
+        record['salary_from'] = self.salary_from or None
+        record['salary_to'] = self.salary_to or None
+        record['skills'] = self.skill_names
+        return record
+
+    @property
+    def skill_names(self) -> list[str]:
+        """Канонические названия ключевых навыков вакансии."""
+
+        return skill_dictionary.decode(self.skills)
+
+    @property
+    def mean_salary(self) -> float | None:
+        """Среднее значение диапазона заработной платы (None, если ЗП не указана)."""
+
+        bounds = tuple(filter(None, (self.salary_from, self.salary_to)))
+        return mean(bounds) if bounds else None
 
     def __get_salary_range(self, salary: dict) -> tuple:
         """
@@ -50,10 +127,11 @@ class Vacancy:
             return '', ''
 
         k = 1               # Расчёт чистой ЗП проводится только для РФ по НДФЛ 13%.
-        if salary['gross'] and self.area_id in russian_areas:
+        if salary['gross'] and self.area_id in get_russian_areas():
             k = 0.87
 
         bottom, top, currency = salary['from'], salary['to'], salary['currency']
+        rates = get_rates()
 
         def calculate_salary(bound: int | None) -> int:
             """Рассчитывает значение границы (нижней или верхней) с учётом курса валюты и ставки налога."""
@@ -70,5 +148,18 @@ class Vacancy:
         :return: Количество дней между текущей датой и указанной датой.
         """
 
-        published = datetime.strptime(date_obj, '%Y-%m-%dT%H:%M:%S%z')
-        return (date.today() - published.date()).days
+        return days_since(date_obj, date.today().toordinal())
+
+    @classmethod
+    def from_values(cls, values) -> 'Vacancy':
+        """
+        Создаёт вакансию из уже нормализованных значений полей (в порядке FIELDS), минуя разбор JSON.
+
+        :param values: Значения полей (например, строка VacancyColumns).
+        :return: Объект Vacancy.
+        """
+
+        vacancy = cls.__new__(cls)
+        for field, value in zip(FIELDS, values):
+            setattr(vacancy, field, value)
+        return vacancy
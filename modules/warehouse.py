@@ -0,0 +1,262 @@
+# /* coding: UTF-8 */
+
+import sqlite3
+from datetime import date, datetime, timedelta
+from os import path, makedirs
+from threading import Lock
+from typing import Iterable
+from .settings import WAREHOUSE_DB
+from .skills import SkillDictionary, skill_dictionary, canonical_key
+from .stats import SalarySummary, VacancyStatistics
+from .vacancy import Vacancy
+
+# Столбцы таблицы vacancies в порядке значений, которые готовит Warehouse.put.
+VACANCY_COLUMNS = ('id', 'area_id', 'name', 'salary_from', 'salary_to', 'salary_mean', 'years_of_experience',
+                   'is_remote', 'published_on', 'created_on', 'employer_name', 'url', 'request', 'loaded_at')
+
+# Новая вакансия добавляется, известная - обновляется (строка и её навыки не удаляются, как при REPLACE).
+UPSERT = (f'INSERT INTO vacancies ({", ".join(VACANCY_COLUMNS)}) '
+          f'VALUES ({", ".join("?" * len(VACANCY_COLUMNS))}) ON CONFLICT (id) DO UPDATE SET '
+          + ', '.join(f'{column} = excluded.{column}' for column in VACANCY_COLUMNS[1:]))
+
+SCHEMA = ('CREATE TABLE IF NOT EXISTS vacancies ('
+          'id INTEGER PRIMARY KEY, '
+          'area_id TEXT NOT NULL, '
+          'name TEXT NOT NULL, '
+          'salary_from INTEGER, '
+          'salary_to INTEGER, '
+          'salary_mean REAL, '
+          'years_of_experience INTEGER NOT NULL, '
+          'is_remote INTEGER NOT NULL, '
+          'published_on TEXT NOT NULL, '
+          'created_on TEXT NOT NULL, '
+          'employer_name TEXT NOT NULL, '
+          'url TEXT NOT NULL, '
+          'request TEXT, '
+          'loaded_at TEXT NOT NULL)',
+          'CREATE TABLE IF NOT EXISTS skills ('
+          'id INTEGER PRIMARY KEY, '
+          'key TEXT NOT NULL UNIQUE, '
+          'name TEXT NOT NULL)',
+          'CREATE TABLE IF NOT EXISTS vacancy_skills ('
+          'skill_id INTEGER NOT NULL, '
+          'vacancy_id INTEGER NOT NULL, '
+          'PRIMARY KEY (skill_id, vacancy_id)) WITHOUT ROWID',
+          'CREATE INDEX IF NOT EXISTS vacancy_skills_vacancy ON vacancy_skills (vacancy_id)',
+          'CREATE INDEX IF NOT EXISTS vacancies_area ON vacancies (area_id, published_on)',
+          'CREATE INDEX IF NOT EXISTS vacancies_employer ON vacancies (employer_name)',
+          'CREATE INDEX IF NOT EXISTS vacancies_published ON vacancies (published_on)',
+          'CREATE INDEX IF NOT EXISTS vacancies_salary ON vacancies (salary_mean)',
+          'CREATE TEMP TABLE IF NOT EXISTS query_areas (id TEXT PRIMARY KEY)')
+
+
+class Warehouse:
+    def __init__(self, db_path: str = WAREHOUSE_DB, dictionary: SkillDictionary = None):
+        """
+        Класс Warehouse - локальное аналитическое хранилище (SQLite) всех вакансий, собранных всеми поисками.
+
+        Вакансия хранится один раз (по id hh.ru) в последней загруженной версии, навыки - по каноническим
+        названиям словаря навыков. Индексы по навыку, региону, работодателю, дате публикации и ЗП позволяют
+        считать статистику по любому срезу (statistics) без повторного парсинга.
+
+        Примечание! База открывается при первом обращении, объект можно использовать из нескольких потоков.
+
+        :param db_path: путь до файла базы данных.
+        :param dictionary: словарь навыков (по умолчанию общий для всего приложения).
+        """
+
+        self.db_path = db_path
+        self.dictionary = dictionary if dictionary is not None else skill_dictionary
+        self.__connection = None
+        self.__skill_ids = {}   # id навыка словаря -> (id навыка в базе, сохранённое название)
+        self.__lock = Lock()
+
+    def __connect(self) -> sqlite3.Connection:
+        """Открывает (и при необходимости создаёт) базу данных."""
+
+        if self.__connection is None:
+            makedirs(path.dirname(self.db_path), exist_ok=True)
+            self.__connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.execute('PRAGMA synchronous=NORMAL')
+            self.__connection.create_function('casefold', 1, str.casefold, deterministic=True)
+            for statement in SCHEMA:
+                self.__connection.execute(statement)
+        return self.__connection
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connect().execute('SELECT count(*) FROM vacancies').fetchone()[0]
+
+    def put(self, vacancies: Iterable[Vacancy], request: str = None) -> None:
+        """
+        Загружает (или обновляет) пачку вакансий одной транзакцией.
+
+        Навыки вакансии перезаписываются, только если они есть у загружаемой версии: вакансия быстрого режима
+        (из выдачи поиска, без навыков) не стирает навыки, сохранённые ранее по деталям вакансии.
+
+        :param vacancies: объекты класса Vacancy.
+        :param request: текст запроса, которым найдены вакансии.
+        """
+
+        today = date.today().toordinal()
+        loaded_at = datetime.now().isoformat(timespec='seconds')
+
+        rows, skills = [], []
+        for vacancy in vacancies:
+            rows.append((int(vacancy.id), vacancy.area_id, vacancy.name,
+                         vacancy.salary_from or None, vacancy.salary_to or None, vacancy.mean_salary,
+                         vacancy.years_of_experience, vacancy.is_remote,
+                         date.fromordinal(today - vacancy.days_since_published).isoformat(),
+                         date.fromordinal(today - vacancy.days_since_created).isoformat(),
+                         vacancy.employer_name, vacancy.url, request, loaded_at))
+            skills.append(vacancy.skills)
+
+        if not rows:
+            return
+
+        with self.__lock:
+            connection = self.__connect()
+            with connection:
+                links = [(self.__skill_id(skill_id), row[0]) for row, skill_ids in zip(rows, skills)
+                         for skill_id in skill_ids]
+                connection.executemany(UPSERT, rows)
+                connection.executemany('DELETE FROM vacancy_skills WHERE vacancy_id = ?',
+                                       [row[:1] for row, skill_ids in zip(rows, skills) if skill_ids])
+                connection.executemany('INSERT OR IGNORE INTO vacancy_skills VALUES (?, ?)', links)
+
+    def __skill_id(self, skill_id: int) -> int:
+        """Возвращает id навыка в базе по id словаря навыков (новый навык добавляется, название обновляется)."""
+
+        name = self.dictionary.names[skill_id]
+        stored = self.__skill_ids.get(skill_id)
+        if stored is not None and stored[1] == name:
+            return stored[0]
+
+        connection = self.__connection
+        connection.execute('INSERT INTO skills (key, name) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET name = ?',
+                           (canonical_key(name), name, name))
+        row_id = connection.execute('SELECT id FROM skills WHERE key = ?', (canonical_key(name),)).fetchone()[0]
+        self.__skill_ids[skill_id] = row_id, name
+        return row_id
+
+    def __where(self, text: str = None, skills: Iterable[str] = (), area_ids: Iterable[int | str] = None,
+                employer: str = None, days: int = None, remote: bool = None) -> tuple[str, list]:
+        """
+        Строит условие WHERE по фильтрам statistics (регионы записываются во временную таблицу query_areas).
+
+        :return: Кортеж (условие, параметры).
+        """
+
+        conditions, params = ['1'], []
+
+        if text:
+            conditions.append('instr(casefold(name), ?)')
+            params.append(text.casefold())
+
+        for skill in skills:
+            conditions.append('id IN (SELECT vacancy_id FROM vacancy_skills WHERE skill_id = '
+                              '(SELECT id FROM skills WHERE key = ?))')
+            params.append(self.dictionary.key(skill))
+
+        if area_ids is not None:
+            self.__connection.execute('DELETE FROM query_areas')
+            self.__connection.executemany('INSERT OR IGNORE INTO query_areas VALUES (?)',
+                                          [(str(area_id),) for area_id in area_ids])
+            conditions.append('area_id IN (SELECT id FROM query_areas)')
+
+        if employer:
+            conditions.append('employer_name = ?')
+            params.append(employer)
+
+        if days is not None:
+            conditions.append('published_on >= ?')
+            params.append((date.today() - timedelta(days=days)).isoformat())
+
+        if remote is not None:
+            conditions.append('is_remote = ?')
+            params.append(int(remote))
+
+        return ' AND '.join(conditions), params
+
+    def __salaries(self, where: str, params: list) -> SalarySummary:
+        """
+        Считает точные показатели средних значений вилок ЗП вакансий, подходящих под условие where.
+
+        :param where: условие WHERE (см. __where).
+        :param params: параметры условия.
+        :return: Объект SalarySummary.
+        """
+
+        connection = self.__connection
+        salaries = f'FROM vacancies WHERE {where} AND salary_mean IS NOT NULL'
+        count, mean, minimum, maximum = connection.execute(
+            f'SELECT count(*), avg(salary_mean), min(salary_mean), max(salary_mean) {salaries}', params).fetchone()
+        if not count:
+            return SalarySummary()
+
+        mode, = connection.execute(f'SELECT salary_mean {salaries} GROUP BY salary_mean '
+                                   'ORDER BY count(*) DESC, salary_mean LIMIT 1', params).fetchone()
+
+        quantiles = {}
+        for p in (0.1, 0.5, 0.9):
+            # Линейная интерполяция между соседними значениями (как statistics.quantiles(method='inclusive'))
+            position = p * (count - 1)
+            low = int(position)
+            values = [value for value, in connection.execute(f'SELECT salary_mean {salaries} '
+                                                             'ORDER BY salary_mean LIMIT 2 OFFSET ?',
+                                                             (*params, low))]
+            high = values[-1]
+            quantiles[p] = values[0] + (high - values[0]) * (position - low)
+
+        return SalarySummary(count, mean, minimum, maximum, mode, quantiles)
+
+    def statistics(self, text: str = None, skills: Iterable[str] = (), area_ids: Iterable[int | str] = None,
+                   employer: str = None, days: int = None, remote: bool = None, top: int = 20) -> VacancyStatistics:
+        """
+        Считает статистику по вакансиям хранилища, подходящим под все заданные фильтры. Результат - тот же
+        VacancyStatistics, что накапливает парсер, поэтому его можно записать в книгу (write_salary_statistics,
+        write_skills, write_remote_data) или вывести в консоль.
+
+        Показатели ЗП считаются запросами к базе точно (а не по выборке, как при парсинге): квантили -
+        выборкой по индексу ЗП (ORDER BY/LIMIT/OFFSET), мода - группировкой.
+
+        :param text: подстрока названия вакансии (регистр не важен).
+        :param skills: навыки, которые должны быть у вакансии (все сразу; в любом написании, с учётом синонимов).
+        :param area_ids: id городов (регионов) вакансии; вложенные регионы нужно перечислить явно
+                         (AreaIndex.descendants).
+        :param employer: название работодателя (точное совпадение).
+        :param days: вакансии, опубликованные не ранее чем days дней назад.
+        :param remote: только удалённые (True) или только не удалённые (False) вакансии.
+        :param top: число самых востребованных навыков в результате.
+        :return: Объект VacancyStatistics.
+        """
+
+        stats = VacancyStatistics()
+
+        with self.__lock:
+            connection = self.__connect()
+            where, params = self.__where(text, skills, area_ids, employer, days, remote)
+
+            stats.count, stats.remote, low, high = connection.execute(
+                'SELECT count(*), coalesce(sum(is_remote), 0), min(coalesce(salary_from, salary_to)), '
+                f'max(coalesce(salary_to, salary_from)) FROM vacancies WHERE {where}', params).fetchone()
+
+            stats.salaries = self.__salaries(where, params)
+
+            top_skills = connection.execute('SELECT skills.name, count(*) AS total FROM vacancy_skills '
+                                            'JOIN skills ON skills.id = vacancy_skills.skill_id '
+                                            f'WHERE vacancy_id IN (SELECT id FROM vacancies WHERE {where}) '
+                                            'GROUP BY skill_id ORDER BY total DESC LIMIT ?',
+                                            (*params, top)).fetchall()
+
+        if stats.salaries:
+            stats.salary_min, stats.salary_max = low, high
+        for name, total in top_skills:
+            skill_id = self.dictionary.intern(name)
+            if skill_id is not None:
+                stats.skills.add(skill_id, total)
+        return stats
+
+
+warehouse = Warehouse()
@@ -1,10 +1,10 @@
 # /* coding: UTF-8 */
-import os
-from os import path, mkdir
+
 from PyQt5.QtCore import QThread, pyqtSignal
-from .excel import CustomWorkbook, CustomWorksheet
-from .parser import parser
-from .api import areas
+from .report import Report
+from .progress import ProgressEvent
+from .api import load_reference_data, get_page
+from .fetcher import RetryPolicy
 
 
 class FileWorker(QThread):
@@ -12,162 +12,114 @@ class FileWorker(QThread):
     Класс FileWorker представляет собой объект для работы с файлами Excel. Класс унаследован от QThread,
     что позволяет выполнять работу в фоновом режиме для избежания блокировки пользовательского интерфейса.
 
+    Само формирование книги выполняет объект Report, FileWorker лишь передаёт его прогресс на GUI.
+    Каждое задание очереди (JobQueue) выполняется в своём FileWorker.
+
     Класс FileWorker имеет следующие сигналы:
-        1) progressStatus: Сигнал с информацией о прогрессе выполнения задачи (тип int).
-        2) progressText: Сигнал с текстовой информацией о прогрессе выполнения задачи (тип str).
-        3) taskFinished: Сигнал, который отправляется при завершении задачи.
+        1) progressUpdated: Сигнал с событием прогресса (тип ProgressEvent): процент, название текущей вакансии,
+           скорость обработки, объём данных и оставшееся время.
+        2) taskFailed: Сигнал с текстом ошибки, если формирование книги завершилось исключением (тип str).
+        3) taskFinished: Сигнал, который отправляется при завершении задачи (в том числе после ошибки).
+
+    Сигналы прогресса отправляются не чаще PROGRESS_INTERVAL, чтобы не переполнять очередь событий GUI.
     """
 
-    progressStatus = pyqtSignal(int)
-    progressText = pyqtSignal(str)
+    progressUpdated = pyqtSignal(object)
+    taskFailed = pyqtSignal(str)
     taskFinished = pyqtSignal()
 
-    def __init__(self, options: dict):
-        """Конструктор класса FileWorker."""
-
-        super().__init__()
-        self.request = None
-        self.region = None
-        self.pages = None
-        self.area_id = None
-        self.period = None
-        self.order_by = None
-        self.only_with_salary = None
-
-        for attr_name, value in options.items():
-            self.__setattr__(attr_name, value)
-
-    def __check_region(self):
-        """Подпись для файла Excel, если региона нет в JSON'e c HeadHunter, то поиск осуществляется везде."""
-        if self.region not in areas.values():
-            self.region = 'Все регионы'
-
-    @staticmethod
-    def get_path() -> str:
-        """
-        Статический метод, который создаёт директорию для хранения файлов и возвращает её.
-
-        :return: Путь до директории с файлами.
+    def __init__(self, report: Report):
         """
-        desktop_path = os.path.expanduser("~/Desktop")
-        directory = os.path.join(desktop_path, "Мои запросы")
-        if not os.path.exists(directory):
-            os.mkdir(directory)
-        return directory
+        Конструктор класса FileWorker.
 
-    def create_workbook(self) -> CustomWorkbook:
+        :param report: объект Report, формирующий книгу (со своим парсером).
         """
-        Метод создает книгу Excel и возвращает ее объект.
-
-        :return: Объект книги Excel.
-        """
-
-        directory = self.get_path()
-        self.__check_region()
-        return CustomWorkbook(directory, self.request, self.region)
 
-    @staticmethod
-    def create_sheets(workbook: CustomWorkbook) -> tuple:
-        """
-        Метод создаёт листы в книге Excel и возвращает их объекты.
-
-        :param workbook: Объект книги Excel.
-
-        :return: Кортеж из объектов листов Excel.
-        """
-
-        ws_1 = CustomWorksheet('Вакансии', workbook)
-        ws_2 = CustomWorksheet('Навыки_табл', workbook)
-        ws_3 = CustomWorksheet('Зарплата_табл', workbook)
-        ws_4 = CustomWorksheet('Удалёнка_табл', workbook)
-        return ws_1, ws_2, ws_3, ws_4
-
-    @staticmethod
-    def hide_data_sheets(*sheets: CustomWorksheet):
-        """
-        Метод скрывает листы с данными в Excel файле, так как они будут представлены на диаграммах.
+        super().__init__()
+        self.report = report
 
-        :param sheets: Переменное количество объектов листов Excel, которые необходимо скрыть.
+    def report_progress(self, event: ProgressEvent):
         """
+        Передаёт прогресс парсинга на GUI.
 
-        for s in sheets:
-            s.hide()
-
-    @staticmethod
-    def format_main_table(table: CustomWorksheet, formats_from: CustomWorkbook):
+        :param event: Событие прогресса (процент, название текущей вакансии, скорость и оставшееся время).
         """
-        Форматирует главную таблицу.
 
-        :param table: Объект кастомного листа (сводная таблица данных).
-        :param formats_from: Объект, предоставляющий необходимые форматы для ячеек таблицы.
-        """
+        self.progressUpdated.emit(event)
 
-        headlines_format, string_format, numbers_format, days_format = formats_from.make_cells_formats()
-        table.add_headlines(headlines_format)
-        table.set_cell_formats(string_format, numbers_format, days_format)
-        table.add_conditional_formatting()
-        table.freeze_panes(1, 0)
-        table.cut_unused_cells(col=9)
+    def run(self):
+        """Запускает процесс формирования и заполнения книги Excel, по завершении сохраняет отчёт о прогоне."""
+
+        try:
+            self.report.run(progress=self.report_progress)
+        except Exception as ex:
+            self.taskFailed.emit(f'{ex.__class__.__name__}: {ex}')
+        finally:
+            # Отчёт о прогоне не должен мешать завершению задачи: без taskFinished очередь не запустит следующую
+            try:
+                print(f'Отчёт о прогоне сохранён: {self.report.save_run_report()}')
+            except Exception as ex:
+                print(f'Не удалось сохранить отчёт о прогоне: {ex.__class__.__name__}: {ex}')
+            self.taskFinished.emit()
+
+
+class ReferenceLoader(QThread):
+    """
+    Класс ReferenceLoader загружает справочные данные API hh.ru в фоновом режиме,
+    чтобы главное окно появлялось сразу, не дожидаясь ответа сервера.
 
-    def write_data(self, table: CustomWorksheet, *others: CustomWorksheet):
-        """
-        Заполняет все таблицы собранными данными.
+    Класс ReferenceLoader имеет следующие сигналы:
+        1) dataLoaded: Сигнал об успешной загрузке справочников.
+        2) loadFailed: Сигнал с текстом ошибки, если справочники загрузить не удалось (тип str).
+    """
 
-        :param table: Объект кастомного листа (главная таблица).
-        :param others: Дополнительные листы, в которые будут записаны данные (навыки, зарплата, удаленка).
-        """
+    dataLoaded = pyqtSignal()
+    loadFailed = pyqtSignal(str)
 
-        parser.parse_page(self.request,
-                          self.area_id,
-                          self.pages,
-                          self.period,
-                          self.only_with_salary,
-                          self.order_by,
-                          table,
-                          worker=self)
+    def run(self):
+        """Запускает загрузку справочников."""
 
-        salaries, skills = parser.get_collected_data()
+        try:
+            load_reference_data()
+        except Exception as ex:
+            self.loadFailed.emit(f'{ex.__class__.__name__}: {ex}')
+        else:
+            self.dataLoaded.emit()
 
-        others[0].write_skills(skills)
-        others[1].write_salary_statistics(salaries)
-        others[2].write_remote_data()
 
-    @staticmethod
-    def create_charts(workbook: CustomWorkbook):
-        """
-        Создает диаграммы для полученных данных.
+class SearchProbe(QThread):
+    """
+    Класс SearchProbe проверяет в фоновом режиме, найдено ли что-нибудь по запросу (один запрос к API hh.ru),
+    чтобы ожидание лимита запросов и паузы перед повторами (RetryPolicy) не блокировали интерфейс.
 
-        :param workbook: Объект книги Excel.
-        """
+    Класс SearchProbe имеет следующие сигналы:
+        1) probeFinished: Сигнал с числом найденных вакансий (тип int).
+        2) probeFailed: Сигнал с текстом ошибки, если запрос не удался даже после повторов (тип str).
+    """
 
-        workbook.create_bar_chart('Навыки')
-        workbook.create_column_chart('Зарплата')
-        workbook.create_pie_chart('Удалёнка')
+    probeFinished = pyqtSignal(int)
+    probeFailed = pyqtSignal(str)
 
-    def close_workbook(self, workbook: CustomWorkbook):
+    def __init__(self, request: str, area_id: int | list[int] | None, period: int, only_with_salary: bool):
         """
-        Закрывает книгу и завершает процесс работы.
+        Конструктор класса SearchProbe.
 
-        :param workbook: Объект книги Excel.
+        :param request: текст запроса пользователя.
+        :param area_id: id города (региона) пользователя, список id или None (все регионы).
+        :param period: период, в который были опубликованы вакансии.
+        :param only_with_salary: учитывать только вакансии с указанной ЗП.
         """
 
-        workbook.close()
-        print(f'Файл {self.request} закрыт.')
-        self.taskFinished.emit()
+        super().__init__()
+        self.args = (request, area_id, period, only_with_salary)
+        self.retry = RetryPolicy()
 
     def run(self):
-        """Запускает процесс формирования и заполнения книги Excel."""
-
-        workbook = self.create_workbook()
-
-        main_table, *charts = self.create_sheets(workbook)
-
-        self.hide_data_sheets(*charts)
-
-        self.format_main_table(main_table, formats_from=workbook)
-
-        self.write_data(main_table, *charts)
-
-        self.create_charts(workbook)
-
-        self.close_workbook(workbook)
+        """Выполняет проверочный запрос числа найденных вакансий."""
+
+        try:
+            _, found = self.retry.call('search_page', get_page, *self.args)
+        except Exception as ex:
+            self.probeFailed.emit(f'{ex.__class__.__name__}: {ex}')
+        else:
+            self.probeFinished.emit(found)
@@ -0,0 +1,23 @@
+# /* coding: UTF-8 */
+
+import os
+import tempfile
+import pytest
+from benchmarks.mock_server import MockServer, Corpus
+
+# Тесты не обращаются к hh.ru: API имитирует локальный сервер бенчмарков, данные приложения - во временной
+# директории. Переменные окружения задаются до импорта modules (settings читает их при импорте).
+SERVER = MockServer(Corpus(0)).start()
+os.environ['JOBINSIGHTS_API_URL'] = SERVER.url
+os.environ['JOBINSIGHTS_DATA_DIR'] = tempfile.mkdtemp(prefix='jobinsights-tests-')
+
+
+@pytest.fixture
+def server() -> MockServer:
+    """Локальный сервер API. Набор вакансий задаётся тестом (server.corpus), по умолчанию он пуст."""
+
+    from modules.api import load_reference_data
+
+    load_reference_data()
+    yield SERVER
+    SERVER.corpus = Corpus(0)
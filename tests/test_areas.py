@@ -0,0 +1,32 @@
+# /* coding: UTF-8 */
+
+from modules.areas import AreaIndex
+
+AREAS = {'1': 'Россия', '2': 'Москва', '3': 'Тверская область', '4': 'Тверь', '5': 'Ивановка',
+         '6': 'Алтайский край', '7': 'Ивановка', '8': 'Ивановка', '9': 'Москва'}
+PARENTS = {'1': None, '2': '1', '3': '1', '4': '3', '5': '3', '6': '1', '7': '6', '8': '6', '9': '3'}
+
+
+def test_lookup_and_labels(capsys):
+    index = AreaIndex(AREAS, PARENTS)
+
+    assert index.lookup(' тверь ') == 4
+    assert index.lookup('Москва') == 2  # первый в порядке обхода
+    assert index.lookup('Москва (Тверская область)') == 9
+    assert index.lookup('Ивановка (Тверская область)') == 5
+    assert index.lookup('Ивановка (Алтайский край)') == 7
+    assert index.lookup('Ивановка (Алтайский край) [8]') == 8
+    assert index.lookup('Неизвестно') is None
+    assert 'Тверь' in index
+    assert capsys.readouterr().out.count('совпадает') == 1
+
+
+def test_descendants_and_complete():
+    index = AreaIndex(AREAS, PARENTS)
+
+    assert sorted(index.descendants(3), key=int) == ['3', '4', '5', '9']
+    assert index.descendants('4') == ['4']
+    assert index.complete('ив') == ['Ивановка (Алтайский край)', 'Ивановка (Алтайский край) [8]',
+                                    'Ивановка (Тверская область)']
+    assert index.complete('ив', limit=1) == ['Ивановка (Алтайский край)']
+    assert len(index.sorted_labels()) == len(AREAS)
@@ -0,0 +1,28 @@
+# /* coding: UTF-8 */
+
+from time import sleep
+from modules.checkpoint import Checkpoint
+from modules.report import Report
+
+
+def test_latest_skips_excluded(tmp_path):
+    directory = str(tmp_path)
+    older = Checkpoint({'request': 'python'}, directory)
+    older.save_entries([])
+    sleep(0.01)
+    newer = Checkpoint({'request': 'java'}, directory)
+    newer.save_entries([])
+
+    assert Checkpoint.latest(directory).options == newer.options
+    assert Checkpoint.latest(directory, exclude={newer.key}).options == older.options
+    assert Checkpoint.latest(directory, exclude={newer.key, older.key}) is None
+
+
+def test_workbook_path_ignores_pages(server, tmp_path):
+    options = {'request': 'python', 'region': '', 'area_id': None, 'pages': 5}
+
+    first = Report(options, directory=str(tmp_path))
+    second = Report(options | {'pages': 20}, directory=str(tmp_path))
+
+    assert first.checkpoint.key != second.checkpoint.key
+    assert first.workbook_path() == second.workbook_path()
@@ -0,0 +1,88 @@
+# /* coding: UTF-8 */
+
+import pytest
+from threading import Event, Thread
+from time import monotonic, sleep
+from modules.fetcher import Cancelled, DetailFetcher, RateLimiter
+
+
+def start_waiters(limiter: RateLimiter, count: int, acquired: list, cancel: dict = None) -> list[Thread]:
+    """Запускает count потоков, встающих в очередь лимита по порядку номеров (с интервалом 20 мс)."""
+
+    def wait(number: int):
+        try:
+            limiter.acquire((cancel or {}).get(number))
+            acquired.append(number)
+        except Cancelled:
+            acquired.append(-number)
+
+    threads = []
+    for number in range(count):
+        threads.append(Thread(target=wait, args=(number,)))
+        threads[-1].start()
+        sleep(0.02)
+    return threads
+
+
+def test_tokens_are_granted_in_fifo_order():
+    limiter = RateLimiter(rate=10)
+    limiter.acquire()
+
+    acquired = []
+    for thread in start_waiters(limiter, 6, acquired):
+        thread.join(5)
+
+    assert acquired == list(range(6))
+
+
+def test_cancelled_waiter_leaves_queue():
+    limiter = RateLimiter(rate=2)
+    limiter.acquire()
+
+    acquired, cancel = [], {1: Event()}
+    threads = start_waiters(limiter, 3, acquired, cancel)
+    cancel[1].set()
+    for thread in threads:
+        thread.join(5)
+
+    assert acquired == [-1, 0, 2]
+
+
+def test_backoff_halves_rate_and_pauses_everyone():
+    limiter = RateLimiter(rate=8, capacity=8, min_rate=1, max_rate=8.1)
+
+    assert limiter.backoff(0.3) == 0.3
+    assert limiter.rate == 4
+    assert limiter.backoff(5) == pytest.approx(0.3, abs=0.05)  # ответ на запрос, отправленный до паузы
+    assert limiter.rate == 4
+
+    started = monotonic()
+    limiter.acquire()
+    assert monotonic() - started >= 0.25
+
+    for _ in range(100):
+        limiter.success()
+    assert limiter.rate == 8.1
+
+
+def test_backoff_respects_min_rate():
+    limiter = RateLimiter(rate=4, min_rate=1)
+    for _ in range(4):
+        limiter.backoff(0)
+
+    assert limiter.rate == 1
+
+
+def test_fetch_all_submits_a_bounded_window():
+    consumed = []
+
+    def items():
+        for number in range(100):
+            consumed.append(number)
+            yield {'id': str(number)}
+
+    results = DetailFetcher(max_workers=2).fetch_all(items(), needs_detail=lambda item: False)
+
+    assert next(results) == (200, {'id': '0'})
+    assert len(consumed) <= 2 * 2 + 1
+    assert [job['id'] for _, job in results] == [str(number) for number in range(1, 100)]
@@ -0,0 +1,30 @@
+# /* coding: UTF-8 */
+
+import tracemalloc
+from modules.metrics import RunMetrics
+
+
+def test_memory_tracing_is_shared_between_runs():
+    first, second = RunMetrics(), RunMetrics()
+    first.start(trace_memory=True)
+    second.start(trace_memory=True)
+    data = [bytes(1000) for _ in range(1000)]
+
+    first.finish()
+    assert tracemalloc.is_tracing()
+    assert first.top_allocations
+
+    second.finish()
+    assert not tracemalloc.is_tracing()
+    assert second.top_allocations and len(data) == 1000
+
+
+def test_external_tracing_is_left_running():
+    tracemalloc.start()
+    try:
+        metrics = RunMetrics()
+        metrics.start(trace_memory=True)
+        metrics.finish()
+        assert tracemalloc.is_tracing() and metrics.top_allocations
+    finally:
+        tracemalloc.stop()
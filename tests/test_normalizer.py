@@ -0,0 +1,22 @@
+# /* coding: UTF-8 */
+
+from datetime import date
+from benchmarks.mock_server import Corpus
+from modules.normalizer import normalize
+from modules.vacancy import Vacancy, FIELDS
+
+
+def test_batch_matches_vacancy(server):
+    corpus = Corpus(300)
+    details = [corpus.detail_of(number) for number in range(300)]
+    items = [corpus.item_of(number, server.url) for number in range(300)]
+
+    for jobs in (details, items):
+        expected = [Vacancy(job) for job in jobs]
+        columns = normalize(jobs, today=date.today())
+
+        assert len(columns) == len(expected)
+        for vacancy, batch_vacancy, index in zip(expected, columns, range(len(columns))):
+            assert columns.values(index) == tuple(getattr(vacancy, field) for field in FIELDS)
+            assert batch_vacancy.as_record() == vacancy.as_record()
+            assert batch_vacancy.as_row() == vacancy.as_row()
@@ -0,0 +1,90 @@
+# /* coding: UTF-8 */
+
+import os
+import pytest
+from time import sleep
+from benchmarks.mock_server import Corpus
+from modules.report import Report
+from modules.registry import SavedQuery
+from modules.checkpoint import Checkpoint
+
+
+def make_options(**options) -> dict:
+    return {'request': 'python', 'region': '', 'area_id': None, 'pages': 2, 'period': 30,
+            'order_by': 'relevance', 'only_with_salary': False, 'full_coverage': False} | options
+
+
+def test_full_coverage_without_results(server, tmp_path):
+    report = Report(make_options(full_coverage=True), directory=str(tmp_path))
+
+    file_path = report.run()
+
+    assert report.finished
+    assert report.parser.total.count == 0
+    assert os.path.exists(file_path)
+
+
+def test_refresh_without_new_vacancies(server, tmp_path):
+    server.corpus = Corpus(50, period=10)
+    sleep(1)    # Даты в API - с точностью до секунды: самая свежая вакансия должна быть старше первого запуска
+    options = make_options(full_coverage=True)
+    saved_query = SavedQuery('python (без новых вакансий)', options, directory=str(tmp_path / 'queries'))
+
+    first = Report(options, directory=str(tmp_path), saved_query=saved_query)
+    first.run()
+    second = Report(options, directory=str(tmp_path), saved_query=saved_query)
+    second.run()
+
+    assert first.finished and second.finished
+    assert first.parser.total.count == second.parser.total.count == 50
+
+
+
+@pytest.mark.parametrize('full_coverage', [False, True])
+def test_refresh_drops_vanished_vacancies(server, tmp_path, full_coverage):
+    server.corpus = Corpus(50, period=10)
+    options = make_options(full_coverage=full_coverage)
+    saved_query = SavedQuery(f'python (снятые вакансии, {full_coverage})', options,
+                             directory=str(tmp_path / 'queries'))
+    Report(options, directory=str(tmp_path), saved_query=saved_query).run()
+
+    server.corpus = Corpus(40, period=10)   # Вакансии 40-49 сняты с публикации
+    refreshed = Report(options, directory=str(tmp_path), saved_query=saved_query)
+    refreshed.run()
+
+    assert refreshed.finished
+    assert sorted(item['id'] for item, _ in refreshed.parser.entries) == [str(10_000_000 + i) for i in range(40)]
+
+
+def test_refresh_keeps_vacancies_beyond_search_depth(server, tmp_path):
+    server.corpus = Corpus(2500, period=10)
+    options = make_options(full_coverage=True, lean=True)
+    saved_query = SavedQuery('python (больше 2000)', options, directory=str(tmp_path / 'queries'))
+    Report(options, directory=str(tmp_path), saved_query=saved_query).run()
+
+    refreshed = Report(options, directory=str(tmp_path), saved_query=saved_query)
+    refreshed.run()
+
+    assert refreshed.finished
+    assert len(refreshed.parser.entries) == 2500
+
+def test_resume_replays_stored_details(server, tmp_path):
+    server.corpus = Corpus(120, period=10)
+    options = make_options()
+    first = Report(options, directory=str(tmp_path))
+    first.run()
+
+    # Контрольная точка после всех вакансий; даты публикации в выдаче изменились (вакансии обновлены)
+    entries = [(item | {'published_at': '2000-01-01T00:00:00+0300'}, regions)
+               for item, regions in first.parser.entries]
+    checkpoint = Checkpoint(options | {'request': 'python (продолжение)'})
+    checkpoint.save_entries(entries)
+    checkpoint.save_state(len(entries), (first.parser.total, first.parser.regions))
+
+    requests = server.requests
+    resumed = Report(checkpoint.options, directory=str(tmp_path), resume=True)
+    resumed.run()
+
+    assert resumed.finished
+    assert resumed.parser.total.count == 120
+    assert server.requests == requests
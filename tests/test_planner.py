@@ -0,0 +1,48 @@
+# /* coding: UTF-8 */
+
+from datetime import datetime
+from benchmarks.mock_server import Corpus
+from modules.planner import QueryPlanner, SEARCH_DEPTH, MIN_WINDOW, DATE_FORMAT
+
+
+def make_planner(period: int = 30) -> QueryPlanner:
+    return QueryPlanner('python', period, only_with_salary=False, order_by='publication_time')
+
+
+def window(shard: dict) -> tuple[datetime, datetime]:
+    return datetime.strptime(shard['date_from'], DATE_FORMAT), datetime.strptime(shard['date_to'], DATE_FORMAT)
+
+
+def test_nothing_found(server):
+    assert make_planner().plan([None]) == []
+
+
+def test_small_query_is_one_shard(server):
+    server.corpus = Corpus(150, period=10)
+
+    shards = make_planner().plan([None])
+
+    assert [(shard['region'], shard['area_id'], shard['found']) for shard in shards] == [(None, None, 150)]
+
+
+def test_split_by_publication_window(server):
+    server.corpus = Corpus(5000, period=20)
+
+    shards = make_planner().plan([None])
+    windows = sorted(map(window, shards))
+
+    assert len(shards) >= 3
+    assert all(shard['found'] <= SEARCH_DEPTH and shard['area_id'] is None for shard in shards)
+    assert all(previous[1] == current[0] for previous, current in zip(windows, windows[1:]))
+    assert sum(shard['found'] for shard in shards) >= 5000
+
+
+def test_split_by_areas_when_window_is_too_small(server):
+    server.corpus = Corpus(2500, period=0)
+
+    shards = make_planner().plan([None])
+
+    assert len(shards) > 1
+    assert all(shard['area_id'] is not None and shard['found'] <= SEARCH_DEPTH for shard in shards)
+    assert all(window(shard)[1] - window(shard)[0] <= MIN_WINDOW for shard in shards)
+    assert sum(shard['found'] for shard in shards) == 2500
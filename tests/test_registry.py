@@ -0,0 +1,14 @@
+# /* coding: UTF-8 */
+
+from modules.registry import SavedQuery
+
+
+def test_all_skips_unreadable_files(tmp_path):
+    directory = str(tmp_path)
+    SavedQuery('python', {'request': 'python'}, directory).save()
+    SavedQuery('java', {'request': 'java'}, directory).save()
+    (tmp_path / 'broken.pickle').write_bytes(b'not a pickle')
+    (tmp_path / 'empty.pickle').write_bytes(b'')
+
+    assert [query.name for query in SavedQuery.all(directory)] == ['java', 'python']
+    assert SavedQuery.load('python', directory).options == {'request': 'python'}
@@ -0,0 +1,34 @@
+# /* coding: UTF-8 */
+
+import pytest
+from modules.sinks import Sink, MultiSink
+
+
+class ListSink(Sink):
+    def __init__(self, fail: bool = False):
+        self.vacancies = []
+        self.closed = False
+        self.fail = fail
+
+    def write(self, vacancy) -> None:
+        self.vacancies.append(vacancy)
+
+    def close(self) -> None:
+        self.closed = True
+        if self.fail:
+            raise OSError('close failed')
+
+
+def test_sink_requires_write():
+    with pytest.raises(TypeError):
+        Sink()
+
+
+def test_multi_sink_closes_every_sink():
+    sinks = ListSink(), ListSink(fail=True), ListSink()
+    multi_sink = MultiSink(*sinks)
+    multi_sink.write('vacancy')
+
+    with pytest.raises(OSError, match='close failed'):
+        multi_sink.close()
+    assert all(sink.closed and sink.vacancies == ['vacancy'] for sink in sinks)
@@ -0,0 +1,36 @@
+# /* coding: UTF-8 */
+
+import pickle
+from modules.skills import SkillDictionary, SYNONYMS
+from modules.stats import SkillCounter
+
+
+def test_variants_and_synonyms_share_id():
+    dictionary = SkillDictionary(SYNONYMS)
+
+    assert dictionary.intern('linux') == dictionary.intern('LINUX') == dictionary.intern(' Linux ')
+    assert dictionary.intern('Python 3') == dictionary.intern('python')
+    assert dictionary.decode([dictionary.intern('LINUX')]) == ['Linux']
+    assert dictionary.decode([dictionary.intern('postgres')]) == ['PostgreSQL']
+    assert list(dictionary.encode(['Python', 'python3', 'SQL'])) == [dictionary.intern('Python'),
+                                                                     dictionary.intern('SQL')]
+
+
+def test_dictionary_size_is_capped():
+    dictionary = SkillDictionary(max_size=2)
+    skill_ids = dictionary.encode(['Python', 'SQL', 'Git', 'python'])
+
+    assert len(dictionary) == 2
+    assert dictionary.intern('Docker') is None
+    assert dictionary.decode(skill_ids) == ['Python', 'SQL']
+    assert dictionary.dropped == 2
+
+
+def test_counter_top_and_pickle():
+    dictionary = SkillDictionary(SYNONYMS)
+    counter = SkillCounter(dictionary)
+    for names in (['Python', 'SQL'], ['python 3', 'Git', 'sql'], ['Python']):
+        counter.update(dictionary.encode(names))
+
+    assert counter.most_common(2) == [('Python', 3), ('SQL', 2)]
+    assert pickle.loads(pickle.dumps(counter)).most_common(3) == counter.most_common(3)
@@ -0,0 +1,78 @@
+# /* coding: UTF-8 */
+
+import pickle
+import random
+import pytest
+from statistics import fmean, quantiles
+from modules.stats import SpaceSaving, SalaryStatistics
+
+
+def exact_quantile(values: list[float], p: float) -> float:
+    return quantiles(values, n=100, method='inclusive')[round(p * 100) - 1]
+
+
+def collect(values: list[float], sample_size: int = 10_000) -> SalaryStatistics:
+    stats = SalaryStatistics(sample_size)
+    for value in values:
+        stats.add(value)
+    return stats
+
+
+def salaries(size: int, order: str) -> list[float]:
+    rnd = random.Random(size)
+    values = [rnd.lognormvariate(11.5, 0.5) for _ in range(size)]
+    if order != 'random':
+        values.sort(reverse=order == 'desc')
+    return values
+
+
+@pytest.mark.parametrize('order', ['random', 'asc', 'desc'])
+@pytest.mark.parametrize('size', [1, 7, 200, 1000])
+def test_quantiles_are_exact_within_sample(size, order):
+    values = salaries(size, order)
+
+    stats = collect(values)
+
+    for p in (0.1, 0.5, 0.9):
+        assert stats.quantile(p) == pytest.approx(exact_quantile(values, p) if size > 1 else values[0])
+
+
+@pytest.mark.parametrize('order', ['random', 'asc', 'desc'])
+def test_sampled_quantiles_do_not_depend_on_order(order):
+    # Выдача, отсортированная по ЗП (order_by=salary_asc/desc), не должна смещать крайние перцентили
+    values = salaries(50_000, order)
+
+    stats = collect(values)
+
+    for p in (0.1, 0.5, 0.9):
+        assert stats.quantile(p) == pytest.approx(exact_quantile(values, p), rel=0.03)
+
+
+def test_quantiles_survive_pickling():
+    stats = collect(salaries(3_000, 'asc'), sample_size=1_000)
+    restored = pickle.loads(pickle.dumps(stats))
+    restored.add(1.0)
+    stats.add(1.0)
+
+    assert restored.snapshot() == stats.snapshot()
+    assert SalaryStatistics().quantile(0.5) is None
+
+
+def test_space_saving_keeps_frequent_values():
+    counter = SpaceSaving(capacity=10)
+    for value in [1] * 500 + list(range(100, 1000)) + [2] * 300:
+        counter.add(value)
+
+    assert [value for value, _ in counter.most_common(2)] == [1, 2]
+    assert len(counter.counts) == 10
+
+
+def test_salary_statistics():
+    rnd = random.Random(1)
+    values = [rnd.randrange(30, 400) * 1000 for _ in range(1000)] + [150_000] * 50
+    stats = collect(values)
+
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(fmean(values))
+    assert (stats.min, stats.max, stats.mode) == (min(values), max(values), 150_000)
+    assert stats.median == exact_quantile(values, 0.5)
@@ -0,0 +1,67 @@
+# /* coding: UTF-8 */
+
+import pytest
+from statistics import fmean, median, quantiles
+from benchmarks.mock_server import Corpus
+from modules.sinks import WarehouseSink
+from modules.vacancy import Vacancy
+from modules.warehouse import Warehouse
+
+
+@pytest.fixture
+def store(tmp_path) -> Warehouse:
+    return Warehouse(str(tmp_path / 'warehouse.sqlite3'))
+
+
+def test_lean_vacancy_keeps_skills(server, store):
+    corpus = Corpus(40)
+    store.put([Vacancy(corpus.detail_of(number)) for number in range(40)])
+    detailed = store.statistics(top=50).skills.most_common(50)
+
+    store.put([Vacancy(corpus.item_of(number, server.url)) for number in range(40)])
+
+    assert len(store) == 40
+    assert store.statistics(top=50).skills.most_common(50) == detailed
+
+
+@pytest.mark.parametrize('size', [7, 30, 301])
+def test_salary_statistics_are_exact(server, store, size):
+    vacancies = [Vacancy(Corpus(size).detail_of(number)) for number in range(size)]
+    store.put(vacancies)
+    salaries = [vacancy.mean_salary for vacancy in vacancies if vacancy.mean_salary is not None]
+    deciles = quantiles(salaries, n=10, method='inclusive')
+
+    stats = store.statistics()
+
+    assert stats.count == size
+    assert stats.remote == sum(vacancy.is_remote for vacancy in vacancies)
+    assert stats.salaries.count == len(salaries)
+    assert stats.salaries.mean == pytest.approx(fmean(salaries))
+    assert stats.salaries.median == pytest.approx(median(salaries))
+    assert stats.salaries.quantile(0.1) == pytest.approx(deciles[0])
+    assert stats.salaries.quantile(0.9) == pytest.approx(deciles[-1])
+
+
+def test_filters(server, store):
+    corpus = Corpus(100)
+    vacancies = [Vacancy(corpus.detail_of(number)) for number in range(100)]
+    store.put(vacancies)
+
+    with_python = [vacancy for vacancy in vacancies if 'Python' in vacancy.skill_names]
+    remote = [vacancy for vacancy in vacancies if vacancy.is_remote]
+
+    assert store.statistics(skills=['python 3']).count == len(with_python)
+    assert store.statistics(remote=True).count == len(remote)
+    assert store.statistics(area_ids=[vacancies[0].area_id]).count == \
+           sum(vacancy.area_id == vacancies[0].area_id for vacancy in vacancies)
+    assert store.statistics(employer='Нет такого работодателя').count == 0
+
+
+def test_sink_loads_into_empty_store(server, store):
+    corpus = Corpus(5)
+    sink = WarehouseSink('python', store=store, batch_size=2)
+    for number in range(5):
+        sink.write(Vacancy(corpus.detail_of(number)))
+    sink.close()
+
+    assert len(store) == 5